@@ -0,0 +1,27 @@
+"""
+Guard for operator-only endpoints.
+
+Admin routes take `Depends(require_admin)` and must be called with the
+`X-Admin-Token` header matching `ADMIN_TOKEN`. Without `ADMIN_TOKEN` set,
+every admin route answers 404, as if it didn't exist.
+"""
+
+import os
+import secrets
+
+from fastapi import Header, HTTPException
+
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")
+
+
+def is_admin(token: str | None) -> bool:
+    # compare_digest only takes ASCII str; compare bytes so any header value is just wrong
+    return bool(ADMIN_TOKEN) and token is not None and secrets.compare_digest(token.encode(), ADMIN_TOKEN.encode())
+
+
+def require_admin(x_admin_token: str | None = Header(default=None)) -> None:
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not is_admin(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
@@ -1,41 +1,253 @@
 # app/routers/game_router.py
 
+import asyncio
 import logging
 import time
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import AsyncGenerator, List
+from typing import AsyncGenerator, List, Literal
 import random
+from datetime import date
 
-from fastapi import Depends, FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse, PlainTextResponse
 from sqlalchemy import delete, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .db import Question, async_session_maker, get_async_session,create_db_and_tables
+from .admin import require_admin
+from .catalog import get_catalog, load_catalog, set_catalog
+from .catalog_file import CATALOG_FILE, open_catalog_file
+from .db import (
+    DATABASE_SNAPSHOT,
+    Question,
+    async_session_maker,
+    create_state_tables,
+    engine,
+    get_async_session,
+    state_engine,
+    state_session_maker,
+)
 from .db_init import init_db
+from .db_readonly import readonly_db
+from .db_snapshot import read_snapshot_meta
+from .readiness import Readiness, catalog_ready, preconnect
+from .http_cache import SEEDED_RESPONSE_MAX_AGE, cached_json_response
+from .profiling import RequestProfiler
+from .query_stats import query_stats
+from .reloader import DatasetWatcher
 from .db_init_trivia import seed_questions
 from .schema import (
     CountResponse,
+    DailyChallengeResponse,
+    GameBatchVerifyRequest,
+    GameBatchVerifyResponse,
     HealthResponse,
+    LeaderboardRankResponse,
+    LeaderboardResponse,
+    LeaderboardSubmitRequest,
+    LeaderboardSubmitResponse,
+    PlayerPairsResponse,
+    PlayerSearchResponse,
+    PlayerWeightsResponse,
+    PlayerWeightsUpdate,
+    ProfileListResponse,
+    ProfileOut,
+    QueryShapeOut,
+    QueryStatsResponse,
     RandomPlayersResponse,
     RandomQuestionResponse,
     RandomQuestionsResponse,
+    ReadinessResponse,
+    SessionCreateRequest,
+    SessionStateOut,
+    StatName,
+    TriviaBatchVerifyRequest,
+    TriviaBatchVerifyResponse,
+    TriviaStatsResponse,
     TriviaVerifyRequest,
     TriviaVerifyResponse,
     VerifyRequest,
     VerifyResponse,
 )
+from .services.analytics_services import AnswerAnalytics
+from .services.challenge_services import ChallengeService
 from .services.game_services import GameService
+from .services.leaderboard_services import LeaderboardService
+from .services.rating_services import DEFAULT_RATING, QuestionRatings
 from .services.trivia_services import TriviaService
+from .sessions import GameState, SessionStore, SqliteSessionStore, create_session_store
 
 
 logger = logging.getLogger(__name__)
 
+leaderboard_service = LeaderboardService(state_session_maker)
+answer_analytics = AnswerAnalytics(state_session_maker)
+question_ratings = QuestionRatings(state_session_maker)
+session_store = create_session_store()
+dataset_watcher = DatasetWatcher()
+readiness = Readiness("database", "caches")
+request_profiler = RequestProfiler()
+
+
+def get_leaderboard_service() -> LeaderboardService:
+    return leaderboard_service
+
+
+def get_session_store() -> SessionStore:
+    return session_store
+
+
+def get_answer_analytics() -> AnswerAnalytics:
+    return answer_analytics
+
+
+def get_question_ratings() -> QuestionRatings:
+    return question_ratings
+
+
+async def record_session_answers(
+    store: SessionStore,
+    session_id: str | None,
+    answers: list[tuple[bool, int | None]],
+    ratings: QuestionRatings | None = None,
+) -> None:
+    """Track answers in the session and, for trivia, update the Elo ratings."""
+    state = await store.get(session_id) if session_id else None
+    if ratings is not None:
+        # Anonymous answers still rate the question, against a default player
+        player_rating = state.rating if state is not None else DEFAULT_RATING
+        for correct, item_id in answers:
+            player_rating = ratings.record(item_id, correct, player_rating)
+        if state is not None:
+            state.rating = player_rating
+    if state is None:
+        return
+    for correct, item_id in answers:
+        state.record_answer(correct, item_id)
+    await store.save(session_id, state)
+
+
+def _session_out(session_id: str, state: GameState) -> SessionStateOut:
+    return SessionStateOut(session_id=session_id, **state.to_dict())
+
+
+async def _load_catalog_at_startup() -> None:
+    if DATABASE_SNAPSHOT:
+        # Prebuilt read-only snapshot: nothing to seed
+        try:
+            meta = read_snapshot_meta(DATABASE_SNAPSHOT)
+            logger.info(f"Serving read-only snapshot {meta.get('version')}")
+        except Exception as e:
+            logger.error(f"Error reading snapshot metadata: {e}")
+    else:
+        await seed_database()
+
+    try:
+        if CATALOG_FILE:
+            catalog = open_catalog_file(CATALOG_FILE)
+            logger.info(f"Catalog {catalog.version} mapped from {CATALOG_FILE}")
+        else:
+            async with async_session_maker() as session:
+                catalog = await load_catalog(session)
+            logger.info(f"Catalog {catalog.version} loaded into memory")
+        set_catalog(catalog)
+    except Exception as e:
+        logger.error(f"Error loading catalog: {e}")
+
+
+# Set by preload() when the catalog was built in the gunicorn master
+preloaded = False
+
+
+def preload() -> None:
+    """
+    Seed and load the catalog before gunicorn forks its workers.
+
+    Called from the `when_ready` hook with `preload_app`, so the catalog lives
+    in pages the workers share copy-on-write and their lifespan skips it.
+    The work runs on a throwaway event loop, and the engines' pooled
+    connections are closed afterwards so no worker inherits one.
+    """
+    global preloaded
+
+    async def run() -> None:
+        try:
+            await _load_catalog_at_startup()
+        finally:
+            await engine.dispose()
+            await state_engine.dispose()
+
+    asyncio.run(run())
+    preloaded = get_catalog() is not None
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
+    if preloaded:
+        logger.info(f"Serving catalog {get_catalog().version} preloaded before fork")
+    else:
+        await _load_catalog_at_startup()
+
+    if not DATABASE_SNAPSHOT and not CATALOG_FILE:
+        # A snapshot is immutable; only a writable database can be hot-reloaded
+        dataset_watcher.start()
+
+    try:
+        await create_state_tables()
+        loaded = await leaderboard_service.load()
+        logger.info(f"Leaderboards loaded ({loaded} players)")
+        await question_ratings.load()
+        if isinstance(session_store, SqliteSessionStore):
+            await session_store.purge_expired()
+    except Exception as e:
+        logger.error(f"Error loading leaderboards: {e}")
+    leaderboard_service.start()
+    answer_analytics.start()
+    question_ratings.start()
+    session_store.start()
+    await warm_up()
+
+    yield
+    # Shutdown
+    readiness.reset()
+    await dataset_watcher.stop()
+    await leaderboard_service.stop()
+    await answer_analytics.stop()
+    await question_ratings.stop()
+    await session_store.stop()
+    if readonly_db is not None:
+        readonly_db.close()
+    logger.info("Application shutting down")
+
+
+async def warm_up() -> None:
+    """Open the connection pools and fill the caches the first requests hit."""
+    try:
+        await preconnect(engine)
+        if state_engine is not engine:
+            await preconnect(state_engine)
+        if readonly_db is not None:
+            await readonly_db.fetchone("SELECT 1")
+        readiness.mark("database")
+    except Exception as e:
+        logger.error(f"Error connecting to the database: {e}")
+
+    catalog = get_catalog()
+    try:
+        # An empty catalog keeps /ready red through its own check; a reload
+        # that fills it finds these caches cold but correct
+        if catalog_ready(catalog):
+            catalog.players.sample_pairs(1)
+            question_ratings.pick(DEFAULT_RATING)
+            async with async_session_maker() as session:
+                await ChallengeService.get_daily_challenge(session, ChallengeService.today())
+        readiness.mark("caches")
+    except Exception as e:
+        logger.error(f"Error warming caches: {e}")
+
+
+async def seed_database() -> None:
     # Startup - Initialize database with players and questions
     logger.info("Initializing database...")
     try:
@@ -49,10 +261,6 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
         logger.info("Questions seeded successfully")
     except Exception as e:
         logger.error(f"Error seeding questions: {e}")
-    
-    yield
-    # Shutdown
-    logger.info("Application shutting down")
 
 
 app = FastAPI(title="Higher or Lower - Football Edition", lifespan=lifespan)
@@ -83,12 +291,28 @@ async def request_timing_middleware(request, call_next):
     return response
 
 
+@app.middleware("http")
+async def profiling_middleware(request, call_next):
+    if request_profiler.wants(request):
+        return await request_profiler.run(request, call_next)
+    return await call_next(request)
+
+
 
 @app.get("/health", response_model=HealthResponse)
 async def health_check() -> HealthResponse:
     return HealthResponse(status="ok")
 
 
+@app.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response) -> ReadinessResponse:
+    checks = readiness.checks(get_catalog())
+    if all(checks.values()):
+        return ReadinessResponse(status="ready", checks=checks)
+    response.status_code = 503
+    return ReadinessResponse(status="not_ready", checks=checks)
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index() -> HTMLResponse:
     root = Path(__file__).resolve().parents[1]
@@ -142,37 +366,203 @@ async def trivia_page() -> HTMLResponse:
 
 @app.get("/api/player/random", response_model=RandomPlayersResponse)
 async def get_random_players(
+    stat: StatName = Query(default="market_value", description="Stat the round is played on"),
+    session_id: str | None = Query(default=None, description="Avoid players this session has seen"),
     session: AsyncSession = Depends(get_async_session),
+    store: SessionStore = Depends(get_session_store),
 ) -> RandomPlayersResponse:
+    state = await store.get(session_id) if session_id else None
+    try:
+        result = await GameService.get_two_random_players(session, stat, state)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    if state is not None:
+        await store.save(session_id, state)
+    return result
+
+
+@app.get("/api/player/pair", response_model=RandomPlayersResponse)
+async def get_seeded_pair(
+    request: Request,
+    seed: int = Query(..., ge=0, le=2**63 - 1, description="Same seed, same pair"),
+    stat: StatName = Query(default="market_value", description="Stat the round is played on"),
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    try:
+        cached = await GameService.get_seeded_pair(session, seed, stat)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return cached_json_response(request, cached, f"public, max-age={SEEDED_RESPONSE_MAX_AGE}")
+
+
+@app.get("/api/player/search", response_model=PlayerSearchResponse)
+async def search_players(
+    q: str = Query(..., min_length=1, max_length=100, description="Name prefix, accents optional"),
+    limit: int = Query(default=10, ge=1, le=50),
+    session: AsyncSession = Depends(get_async_session),
+) -> PlayerSearchResponse:
+    return await GameService.search_players(session, q, limit)
+
+
+@app.get("/api/player/pairs", response_model=PlayerPairsResponse)
+async def get_random_pairs(
+    count: int = Query(default=10, ge=1, le=100, description="Number of pairs to return"),
+    stat: StatName = Query(default="market_value", description="Stat the rounds are played on"),
+    session: AsyncSession = Depends(get_async_session),
+) -> PlayerPairsResponse:
     try:
-        return await GameService.get_two_random_players(session)
+        return await GameService.get_random_pairs(session, count, stat)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@app.put(
+    "/api/admin/players/weights",
+    response_model=PlayerWeightsResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def set_player_weights(
+    payload: PlayerWeightsUpdate,
+    session: AsyncSession = Depends(get_async_session),
+) -> PlayerWeightsResponse:
+    if DATABASE_SNAPSHOT or CATALOG_FILE:
+        # Other workers serve the immutable snapshot and would never see the change
+        raise HTTPException(
+            status_code=409, detail="Player weights are read-only with a snapshot or catalog file; rebuild it"
+        )
+    try:
+        return await GameService.set_player_weights(session, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
 @app.post("/api/game/verify", response_model=VerifyResponse)
 async def verify_game(
     payload: VerifyRequest,
     session: AsyncSession = Depends(get_async_session),
+    store: SessionStore = Depends(get_session_store),
 ) -> VerifyResponse:
     try:
-        return await GameService.verify_guess(session, payload)
+        if readonly_db is not None:
+            result = await GameService.verify_guess_readonly(readonly_db, payload)
+        else:
+            result = await GameService.verify_guess(session, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    await record_session_answers(store, payload.session_id, [(result.correct, None)])
+    return result
+
+
+@app.post("/api/game/verify/batch", response_model=GameBatchVerifyResponse)
+async def verify_game_batch(
+    payload: GameBatchVerifyRequest,
+    session: AsyncSession = Depends(get_async_session),
+) -> GameBatchVerifyResponse:
+    try:
+        return await GameService.verify_guesses(session, payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
 
 
+@app.websocket("/ws/game")
+async def game_channel(
+    websocket: WebSocket,
+    stat: StatName = Query(default="market_value"),
+    session: AsyncSession = Depends(get_async_session),
+) -> None:
+    """
+    Higher-or-Lower over a single connection.
+
+    Server -> client:
+        {"t": "pair", "l": {"id", "n", "img"}, "r": {...}}
+        {"t": "res", "c": correct, "lv": left_value, "rv": right_value, "s": score, "k": best_streak}
+        {"t": "err", "m": message}
+    Client -> server:
+        {"g": "l" | "r"}
+
+    The pair, including the hidden values, is kept in the handler, so a
+    guess is graded without touching the database.
+    """
+    await websocket.accept()
+    score = 0
+    best_streak = 0
+    # Connection-local, only used to avoid repeating players
+    state = GameState(game="higher_lower")
+
+    async def next_pair() -> list | None:
+        try:
+            players = (await GameService.get_two_random_players(session, stat, state)).players
+        except ValueError as exc:
+            await websocket.send_json({"t": "err", "m": str(exc)})
+            return None
+        finally:
+            # Release the pooled connection between rounds
+            await session.close()
+        left, right = players
+        await websocket.send_json(
+            {
+                "t": "pair",
+                "l": {"id": left.id, "n": left.name, "img": left.image_url},
+                "r": {"id": right.id, "n": right.name, "img": right.image_url},
+            }
+        )
+        return players
+
+    try:
+        pair = await next_pair()
+        while pair is not None:
+            try:
+                message = await websocket.receive_json()
+            except ValueError:
+                # Not JSON: answered like any other malformed guess
+                message = None
+            guess = {"l": "left", "r": "right"}.get(message.get("g")) if isinstance(message, dict) else None
+            if guess is None:
+                await websocket.send_json({"t": "err", "m": "Expected {\"g\": \"l\" | \"r\"}"})
+                continue
+
+            left, right = pair
+            result = GameService.compare(guess, left.stat_value, right.stat_value)
+            score = score + 1 if result.correct else 0
+            best_streak = max(best_streak, score)
+            await websocket.send_json(
+                {
+                    "t": "res",
+                    "c": result.correct,
+                    "lv": result.left_value,
+                    "rv": result.right_value,
+                    "s": score,
+                    "k": best_streak,
+                }
+            )
+            pair = await next_pair()
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Game channel closed", extra={"score": score, "best_streak": best_streak})
+
+
 @app.get("/api/trivia/question", response_model=RandomQuestionResponse)
 async def get_random_question(
     exclude: str | None = Query(
         default=None,
         description="Comma separated question IDs that have already been asked",
     ),
+    session_id: str | None = Query(default=None, description="Pick a question near this session's rating"),
     session: AsyncSession = Depends(get_async_session),
+    store: SessionStore = Depends(get_session_store),
+    ratings: QuestionRatings = Depends(get_question_ratings),
 ) -> RandomQuestionResponse:
     try:
         exclude_ids: List[int] = []
         if exclude:
             exclude_ids = [int(x) for x in exclude.split(",") if x.strip().isdigit()]
+        state = await store.get(session_id) if session_id else None
+        if state is not None:
+            return await TriviaService.get_adaptive_question(
+                session, ratings, state.rating, [*exclude_ids, *state.seen_ids]
+            )
         return await TriviaService.get_random_question(session, exclude_ids)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
@@ -189,6 +579,20 @@ async def get_random_questions(
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
 
+@app.get("/api/trivia/deck", response_model=RandomQuestionsResponse)
+async def get_seeded_deck(
+    request: Request,
+    seed: int = Query(..., ge=0, le=2**63 - 1, description="Same seed, same deck"),
+    limit: int = Query(default=20, ge=1, le=100, description="Number of questions in the deck"),
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    try:
+        cached = await TriviaService.get_seeded_deck(session, seed, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return cached_json_response(request, cached, f"public, max-age={SEEDED_RESPONSE_MAX_AGE}")
+
+
 @app.get("/api/trivia/count", response_model=CountResponse)
 async def get_trivia_count(
     session: AsyncSession = Depends(get_async_session),
@@ -200,8 +604,183 @@ async def get_trivia_count(
 async def verify_trivia_answer(
     payload: TriviaVerifyRequest,
     session: AsyncSession = Depends(get_async_session),
+    store: SessionStore = Depends(get_session_store),
+    analytics: AnswerAnalytics = Depends(get_answer_analytics),
+    ratings: QuestionRatings = Depends(get_question_ratings),
 ) -> TriviaVerifyResponse:
     try:
-        return await TriviaService.verify_answer(session, payload)
+        if readonly_db is not None:
+            result = await TriviaService.verify_answer_readonly(readonly_db, payload)
+        else:
+            result = await TriviaService.verify_answer(session, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    analytics.record(payload.question_id, payload.selected_answer, result.correct)
+    await record_session_answers(
+        store, payload.session_id, [(result.correct, payload.question_id)], ratings
+    )
+    return result
+
+
+@app.post("/api/trivia/verify/batch", response_model=TriviaBatchVerifyResponse)
+async def verify_trivia_answers(
+    payload: TriviaBatchVerifyRequest,
+    session: AsyncSession = Depends(get_async_session),
+    store: SessionStore = Depends(get_session_store),
+    analytics: AnswerAnalytics = Depends(get_answer_analytics),
+    ratings: QuestionRatings = Depends(get_question_ratings),
+) -> TriviaBatchVerifyResponse:
+    try:
+        if readonly_db is not None:
+            result = await TriviaService.verify_answers_readonly(readonly_db, payload)
+        else:
+            result = await TriviaService.verify_answers(session, payload)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    for answer, graded in zip(payload.answers, result.results):
+        analytics.record(answer.question_id, answer.selected_answer, graded.correct)
+    await record_session_answers(
+        store, payload.session_id, [(r.correct, r.question_id) for r in result.results], ratings
+    )
+    return result
+
+
+@app.get("/api/challenge/daily", response_model=DailyChallengeResponse)
+async def get_daily_challenge(
+    request: Request,
+    day: date | None = Query(default=None, alias="date", description="UTC day, defaults to today"),
+    session: AsyncSession = Depends(get_async_session),
+) -> Response:
+    day = day or ChallengeService.today()
+    try:
+        cached = await ChallengeService.get_daily_challenge(session, day)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return cached_json_response(request, cached, ChallengeService.cache_control(day))
+
+
+@app.get(
+    "/api/admin/trivia/stats",
+    response_model=TriviaStatsResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def get_trivia_stats(
+    min_answers: int = Query(default=1, ge=1, description="Skip questions answered fewer times"),
+    session: AsyncSession = Depends(get_async_session),
+    analytics: AnswerAnalytics = Depends(get_answer_analytics),
+) -> TriviaStatsResponse:
+    return await analytics.stats(session, min_answers)
+
+
+@app.get(
+    "/api/admin/db/queries",
+    response_model=QueryStatsResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def get_query_stats(
+    limit: int = Query(default=20, ge=1, le=500),
+    order: Literal["total", "mean", "max", "count"] = Query(default="total"),
+) -> QueryStatsResponse:
+    return QueryStatsResponse(
+        slow_query_ms=query_stats.slow_ms,
+        queries=[
+            QueryShapeOut(
+                statement=s.statement,
+                count=s.count,
+                total_ms=round(s.total * 1000, 3),
+                mean_ms=round(s.total / s.count * 1000, 3),
+                max_ms=round(s.max * 1000, 3),
+                slow=s.slow,
+                plan=s.plan,
+                scans=s.scans,
+            )
+            for s in query_stats.top(limit, order)
+        ],
+    )
+
+
+@app.delete("/api/admin/db/queries", status_code=204, dependencies=[Depends(require_admin)])
+async def reset_query_stats() -> Response:
+    query_stats.reset()
+    return Response(status_code=204)
+
+
+@app.get(
+    "/api/admin/profiles",
+    response_model=ProfileListResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def list_profiles() -> ProfileListResponse:
+    return ProfileListResponse(
+        profiles=[ProfileOut(name=p.name, size=p.size, created_at=p.created_at) for p in request_profiler.profiles()]
+    )
+
+
+@app.get(
+    "/api/admin/profiles/{name}",
+    response_class=PlainTextResponse,
+    dependencies=[Depends(require_admin)],
+)
+async def get_profile(name: str) -> FileResponse:
+    try:
+        path = request_profiler.path_for(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return FileResponse(path, media_type="text/plain; charset=utf-8")
+
+
+@app.post("/api/session", response_model=SessionStateOut)
+async def create_game_session(
+    payload: SessionCreateRequest,
+    store: SessionStore = Depends(get_session_store),
+) -> SessionStateOut:
+    session_id, state = await store.create(payload.game)
+    return _session_out(session_id, state)
+
+
+@app.get("/api/session/{session_id}", response_model=SessionStateOut)
+async def get_game_session(
+    session_id: str,
+    store: SessionStore = Depends(get_session_store),
+) -> SessionStateOut:
+    state = await store.get(session_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail="Session not found or expired")
+    return _session_out(session_id, state)
+
+
+@app.post("/api/leaderboard", response_model=LeaderboardSubmitResponse)
+async def submit_score(
+    payload: LeaderboardSubmitRequest,
+    leaderboard: LeaderboardService = Depends(get_leaderboard_service),
+) -> LeaderboardSubmitResponse:
+    try:
+        return leaderboard.submit(payload)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+
+@app.get("/api/leaderboard/{game}", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    game: str,
+    limit: int = Query(default=10, ge=1, le=100, description="Number of top entries to return"),
+    leaderboard: LeaderboardService = Depends(get_leaderboard_service),
+) -> LeaderboardResponse:
+    try:
+        return leaderboard.top(game, limit)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+
+
+@app.get("/api/leaderboard/{game}/rank", response_model=LeaderboardRankResponse)
+async def get_leaderboard_rank(
+    game: str,
+    player_name: str = Query(..., min_length=1, max_length=50),
+    leaderboard: LeaderboardService = Depends(get_leaderboard_service),
+) -> LeaderboardRankResponse:
+    try:
+        return leaderboard.rank(game, player_name)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
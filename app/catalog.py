@@ -0,0 +1,353 @@
+"""
+In-memory, immutable views of the player and question catalogs.
+
+A `Catalog` is built from the database and published with `set_catalog()`.
+Services read it through `get_catalog()` once per request and use only that
+reference, so a request keeps seeing one consistent snapshot even if a reload
+swaps in a new catalog halfway through. When no catalog has been published
+the services fall back to querying the database. Fallbacks that need a whole
+catalog (seeded rounds and decks, search, the daily challenge) share the parts
+loaded by `fallback_players()` / `fallback_questions()` instead of loading
+one per request.
+
+Configuration:
+    FALLBACK_CATALOG_TTL  seconds a fallback catalog part is reused (default 60)
+"""
+
+import hashlib
+import os
+import random
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field, replace
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .db import DEFAULT_STAT, PLAYER_STATS, Player, Question
+from .sampling import AliasSampler
+from .schema import PlayerOut, QuestionOut
+from .search import NamePrefixIndex
+from .sessions import SeenPlayers
+
+try:
+    import numpy as np
+except ImportError:  # optional; pure-Python fallbacks are used without it
+    np = None
+
+FALLBACK_CATALOG_TTL = float(os.getenv("FALLBACK_CATALOG_TTL", "60"))
+
+# Redraws of the second player of a pair before giving up on its weight
+PAIR_REDRAWS = 16
+# Redraws of a pair before accepting one with an already seen player
+UNSEEN_REDRAWS = 32
+
+
+def _digest(rows: list[tuple]) -> str:
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr(row).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+@dataclass(frozen=True, slots=True)
+class PlayerCatalog:
+    """
+    Players stored column-wise, indexed by offset (position in `ids`).
+
+    Each stat is a contiguous `array("q")`; `eligible[stat]` lists the
+    offsets that have a known value for it (market value is always known,
+    the other stats use 0 for "unknown"). Ids are sorted, so id -> offset
+    is a binary search. Draws are weighted by `weights` through one alias
+    sampler per stat over its eligible offsets. Batch sampling and
+    comparisons run on NumPy views of the same buffers when NumPy is installed.
+
+    Built from the database, the columns are `array`s and tuples. Opened from a
+    catalog file (app/catalog_file.py), they are zero-copy views of the shared
+    mapping with the same sequence interface.
+    """
+
+    ids: array
+    names: tuple[str, ...]
+    image_urls: tuple[str, ...]
+    stats: dict[str, array]
+    eligible: dict[str, array]
+    weights: array
+    samplers: dict[str, AliasSampler]
+    name_index: NamePrefixIndex
+    version: str
+
+    @classmethod
+    def build(cls, rows: list[dict]) -> "PlayerCatalog":
+        rows = sorted(rows, key=lambda r: r["id"])
+        stats = {
+            stat: array("q", (r.get(column, 0) for r in rows))
+            for stat, column in PLAYER_STATS.items()
+        }
+        eligible = {
+            stat: array("q", range(len(rows)))
+            if stat == DEFAULT_STAT
+            else array("q", (i for i, v in enumerate(values) if v > 0))
+            for stat, values in stats.items()
+        }
+        names = tuple(r["name"] for r in rows)
+        weights = array("d", (r.get("weight", 1.0) for r in rows))
+        return cls(
+            ids=array("q", (r["id"] for r in rows)),
+            names=names,
+            image_urls=tuple(r["image_url"] for r in rows),
+            stats=stats,
+            eligible=eligible,
+            weights=weights,
+            samplers={
+                stat: AliasSampler([weights[i] for i in offsets])
+                for stat, offsets in eligible.items()
+            },
+            name_index=NamePrefixIndex(names),
+            version=_digest([tuple(r.get(k) for k in sorted(r)) for r in rows]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def offset_of(self, player_id: int) -> int | None:
+        i = bisect_left(self.ids, player_id)
+        if i < len(self.ids) and self.ids[i] == player_id:
+            return i
+        return None
+
+    def value(self, offset: int, stat: str = DEFAULT_STAT) -> int:
+        return self.stats[stat][offset]
+
+    def player(self, offset: int, stat: str = DEFAULT_STAT) -> PlayerOut:
+        return PlayerOut(
+            id=self.ids[offset],
+            name=self.names[offset],
+            image_url=self.image_urls[offset],
+            stat_value=self.stats[stat][offset],
+        )
+
+    def search(self, query: str, limit: int = 10, stat: str = DEFAULT_STAT) -> list[PlayerOut]:
+        return [self.player(offset, stat) for offset in self.name_index.search(query, limit)]
+
+    def with_weights(self, weights: dict[int, float]) -> "PlayerCatalog":
+        """
+        A copy with new weights (offset -> weight). Only the alias blocks
+        holding the changed offsets are rebuilt.
+        """
+        new_weights = array("d", self.weights)
+        for offset, weight in weights.items():
+            new_weights[offset] = weight
+        samplers = {}
+        for stat, offsets in self.eligible.items():
+            changes = {}
+            for offset, weight in weights.items():
+                i = bisect_left(offsets, offset)
+                if i < len(offsets) and offsets[i] == offset:
+                    changes[i] = weight
+            samplers[stat] = self.samplers[stat].updated(changes) if changes else self.samplers[stat]
+        return replace(
+            self,
+            weights=new_weights,
+            samplers=samplers,
+            version=_digest([(self.version,), *sorted(weights.items())]),
+        )
+
+    def sample_pairs(
+        self, count: int, stat: str = DEFAULT_STAT, rng: random.Random | None = None
+    ) -> list[tuple[int, int]]:
+        """
+        `count` pairs of distinct player offsets eligible for `stat`, each
+        drawn with probability proportional to its weight.
+
+        With an explicit `rng` the draw is a pure function of its state (used
+        for seeded, reproducible decks); otherwise it is vectorized when
+        NumPy is available.
+        """
+        pool = self.eligible[stat]
+        sampler = self.samplers[stat]
+        if sampler.nonzero < 2:
+            raise ValueError("Not enough players in the database")
+
+        if rng is None and np is not None and count > 1:
+            pool_np = np.frombuffer(pool, dtype=np.int64)
+            gen = np.random.default_rng()
+            left = sampler.draw_many(count, gen)
+            right = sampler.draw_many(count, gen)
+            for _ in range(PAIR_REDRAWS):
+                clash = np.flatnonzero(left == right)
+                if not len(clash):
+                    break
+                right[clash] = sampler.draw_many(len(clash), gen)
+            else:
+                # Pathologically skewed weights: take any other player
+                clash = left == right
+                right[clash] = (left[clash] + gen.integers(1, len(pool_np), size=clash.sum())) % len(pool_np)
+            return list(zip(pool_np[left].tolist(), pool_np[right].tolist()))
+
+        rng = rng or random
+        pairs = []
+        for _ in range(count):
+            left = sampler.draw(rng)
+            for _ in range(PAIR_REDRAWS):
+                right = sampler.draw(rng)
+                if right != left:
+                    break
+            else:
+                right = (left + rng.randrange(1, len(pool))) % len(pool)
+            pairs.append((pool[left], pool[right]))
+        return pairs
+
+    def sample_unseen_pair(
+        self, seen: SeenPlayers, stat: str = DEFAULT_STAT, rng: random.Random | None = None
+    ) -> tuple[int, int]:
+        """
+        A pair whose players are not in `seen`, then marks them seen.
+
+        `seen` is cleared once it covers half the pool, so at least a quarter
+        of pairs (uniform weights) are unseen and rejection sampling takes
+        O(1) expected draws.
+        """
+        if seen.count * 2 >= min(len(self.eligible[stat]), seen.capacity):
+            seen.clear()
+        for _ in range(UNSEEN_REDRAWS):
+            ((left, right),) = self.sample_pairs(1, stat, rng)
+            if left not in seen and right not in seen:
+                break
+        seen.add(left)
+        seen.add(right)
+        return left, right
+
+    def compare(
+        self, left_offsets: list[int], right_offsets: list[int], stat: str = DEFAULT_STAT
+    ) -> list[int]:
+        """Sign of left - right for each pair: 1, 0 or -1."""
+        values = self.stats[stat]
+        if np is not None and len(left_offsets) > 1:
+            column = np.frombuffer(values, dtype=np.int64)
+            return np.sign(
+                column[np.asarray(left_offsets)] - column[np.asarray(right_offsets)]
+            ).tolist()
+        return [
+            (values[l] > values[r]) - (values[l] < values[r])
+            for l, r in zip(left_offsets, right_offsets)
+        ]
+
+
+@dataclass(frozen=True, slots=True)
+class QuestionCatalog:
+    questions: tuple[QuestionOut, ...]
+    by_id: dict[int, QuestionOut]
+    answers: dict[int, str]
+    version: str
+
+    @classmethod
+    def build(cls, questions: list[tuple[QuestionOut, str]]) -> "QuestionCatalog":
+        questions = sorted(questions, key=lambda q: q[0].id)
+        return cls(
+            questions=tuple(q for q, _ in questions),
+            by_id={q.id: q for q, _ in questions},
+            answers={q.id: answer for q, answer in questions},
+            version=_digest([(*q.model_dump().values(), answer) for q, answer in questions]),
+        )
+
+    def __len__(self) -> int:
+        return len(self.questions)
+
+
+@dataclass(frozen=True, slots=True)
+class Catalog:
+    players: PlayerCatalog
+    questions: QuestionCatalog
+    version: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        object.__setattr__(self, "version", f"{self.players.version[:8]}{self.questions.version[:8]}")
+
+    def with_players(self, players: PlayerCatalog) -> "Catalog":
+        return replace(self, players=players)
+
+    def with_questions(self, questions: QuestionCatalog) -> "Catalog":
+        return replace(self, questions=questions)
+
+
+async def load_player_catalog(session: AsyncSession) -> PlayerCatalog:
+    columns = ["id", "name", "image_url", "weight", *PLAYER_STATS.values()]
+    result = await session.execute(select(*(getattr(Player, c) for c in columns)))
+    return PlayerCatalog.build([dict(zip(columns, row)) for row in result.all()])
+
+
+async def load_question_catalog(session: AsyncSession) -> QuestionCatalog:
+    result = await session.execute(select(Question))
+    return QuestionCatalog.build(
+        [
+            (
+                QuestionOut(
+                    id=q.id,
+                    question_text=q.question_text,
+                    option_a=q.option_a,
+                    option_b=q.option_b,
+                    option_c=q.option_c,
+                    option_d=q.option_d,
+                    difficulty=q.difficulty,
+                    category=q.category,
+                ),
+                q.correct_answer,
+            )
+            for q in result.scalars().all()
+        ]
+    )
+
+
+async def load_catalog(session: AsyncSession) -> Catalog:
+    return Catalog(
+        players=await load_player_catalog(session),
+        questions=await load_question_catalog(session),
+    )
+
+
+_current: Catalog | None = None
+# (database URL, part) -> (loaded at, catalog part), for the unpublished fallback
+_fallback: dict[tuple[str, str], tuple[float, object]] = {}
+
+
+def get_catalog() -> Catalog | None:
+    return _current
+
+
+def set_catalog(catalog: Catalog | None) -> None:
+    # A single reference assignment: readers see either the old or the new catalog
+    global _current
+    _current = catalog
+    _fallback.clear()
+
+
+async def _fallback_part(session: AsyncSession, part: str, load):
+    key = (str(session.bind.url), part)
+    now = time.monotonic()
+    entry = _fallback.get(key)
+    if entry is not None and now - entry[0] < FALLBACK_CATALOG_TTL:
+        return entry[1]
+    value = await load(session)
+    _fallback[key] = (now, value)
+    return value
+
+
+async def fallback_players(session: AsyncSession) -> PlayerCatalog:
+    """Players from the database for when no catalog is published, reused for `FALLBACK_CATALOG_TTL`."""
+    return await _fallback_part(session, "players", load_player_catalog)
+
+
+async def fallback_questions(session: AsyncSession) -> QuestionCatalog:
+    """Questions from the database for when no catalog is published, reused for `FALLBACK_CATALOG_TTL`."""
+    return await _fallback_part(session, "questions", load_question_catalog)
+
+
+async def fallback_catalog(session: AsyncSession) -> Catalog:
+    return Catalog(players=await fallback_players(session), questions=await fallback_questions(session))
+
+
+def forget_fallback() -> None:
+    """Drop the fallback catalog parts, e.g. after writing to the catalog tables."""
+    _fallback.clear()
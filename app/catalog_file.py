@@ -0,0 +1,249 @@
+"""
+Memory-mapped binary catalog shared by all worker processes.
+
+`write_catalog_file()` serializes a `Catalog` into one fixed-layout file:
+
+    header      magic, format version, column count, player/question versions
+    directory   one entry per column: name, type, item count, offset, size
+    columns     8-byte aligned; "q" int64, "d" float64, or "s" strings
+                (int64 offsets[count + 1] followed by the UTF-8 blob)
+
+Besides the raw player columns, the file holds what a `PlayerCatalog` derives
+from them (eligible offsets, alias tables, search keys), so opening it costs
+no per-worker work. `open_catalog_file()` maps it read-only, and the player
+catalog it returns reads straight from the mapping through `memoryview`s.
+Every worker shares one page-cache copy. Questions are few and are decoded
+into an ordinary `QuestionCatalog`.
+
+Configuration:
+    CATALOG_FILE  path of a catalog file to serve instead of loading from the database
+
+Usage:
+    python -m app.catalog_file [output_path]
+"""
+
+import asyncio
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import Iterator, Sequence
+
+from .catalog import Catalog, PlayerCatalog, QuestionCatalog, load_catalog
+from .db import DATABASE_SNAPSHOT, PLAYER_STATS, async_session_maker, create_db_and_tables
+from .sampling import AliasSampler
+from .schema import QuestionOut
+from .search import NamePrefixIndex
+
+
+CATALOG_FILE = os.getenv("CATALOG_FILE")
+DEFAULT_CATALOG_FILE_PATH = Path(__file__).resolve().parents[1] / "snapshot" / "catalog.bin"
+
+MAGIC = b"HLCATLG\0"
+FORMAT_VERSION = 1
+# magic, format version, column count, players version, questions version
+_HEADER = struct.Struct("<8sII16s16s")
+# name, type, item count, data offset, data size
+_ENTRY = struct.Struct("<32s1s7xQQQ")
+
+QUESTION_FIELDS = (
+    "question_text",
+    "option_a",
+    "option_b",
+    "option_c",
+    "option_d",
+    "correct_answer",
+    "difficulty",
+    "category",
+)
+# Arguments of AliasSampler.from_tables, in order
+ALIAS_TABLES = ("weights", "prob", "alias", "block_totals", "top_prob", "top_alias")
+
+
+class StringColumn(Sequence[str]):
+    """Read-only string sequence over an offsets array and a UTF-8 blob."""
+
+    def __init__(self, offsets: memoryview, blob: memoryview) -> None:
+        self._offsets = offsets
+        self._blob = blob
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("string column index out of range")
+        return str(self._blob[self._offsets[i] : self._offsets[i + 1]], "utf-8")
+
+    def __iter__(self) -> Iterator[str]:
+        return (self[i] for i in range(len(self)))
+
+
+def _encode_strings(values: Sequence[str]) -> bytes:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = [0]
+    for item in encoded:
+        offsets.append(offsets[-1] + len(item))
+    return struct.pack(f"<{len(offsets)}q", *offsets) + b"".join(encoded)
+
+
+def _columns(catalog: Catalog) -> list[tuple[str, str, int, bytes]]:
+    players = catalog.players
+    columns = [
+        ("player.id", "q", players.ids),
+        ("player.name", "s", players.names),
+        ("player.image_url", "s", players.image_urls),
+        ("player.weight", "d", players.weights),
+        ("search.keys", "s", players.name_index._keys),
+        ("search.offsets", "q", players.name_index._offsets),
+    ]
+    for stat in PLAYER_STATS:
+        sampler = players.samplers[stat]
+        columns.append((f"stat.{stat}", "q", players.stats[stat]))
+        columns.append((f"eligible.{stat}", "q", players.eligible[stat]))
+        tables = sampler.tables()
+        for table in ALIAS_TABLES:
+            kind = "q" if table.endswith("alias") else "d"
+            columns.append((f"alias.{stat}.{table}", kind, tables[table]))
+        columns.append((f"alias.{stat}.block_size", "q", [sampler.block_size]))
+
+    questions = catalog.questions.questions
+    columns.append(("question.id", "q", [q.id for q in questions]))
+    for field in QUESTION_FIELDS:
+        if field == "correct_answer":
+            values = [catalog.questions.answers[q.id] for q in questions]
+        else:
+            values = [getattr(q, field) for q in questions]
+        columns.append((f"question.{field}", "s", values))
+
+    encoded = []
+    for name, kind, values in columns:
+        values = list(values)
+        data = _encode_strings(values) if kind == "s" else struct.pack(f"<{len(values)}{kind}", *values)
+        encoded.append((name, kind, len(values), data))
+    return encoded
+
+
+def write_catalog_file(catalog: Catalog, path: Path) -> None:
+    columns = _columns(catalog)
+    header_size = _HEADER.size + _ENTRY.size * len(columns)
+
+    entries = []
+    offset = header_size
+    for name, kind, count, data in columns:
+        offset += -offset % 8
+        entries.append(_ENTRY.pack(name.encode("ascii"), kind.encode("ascii"), count, offset, len(data)))
+        offset += len(data)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("wb") as f:
+        f.write(
+            _HEADER.pack(
+                MAGIC,
+                FORMAT_VERSION,
+                len(columns),
+                catalog.players.version.encode("ascii"),
+                catalog.questions.version.encode("ascii"),
+            )
+        )
+        for entry in entries:
+            f.write(entry)
+        for (_, _, _, data), entry in zip(columns, entries):
+            f.seek(_ENTRY.unpack(entry)[3])
+            f.write(data)
+    # Workers that already mapped the old file keep reading its inode
+    os.replace(tmp_path, path)
+
+
+class CatalogFile:
+    """A read-only mapping of a catalog file, with zero-copy column views."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        with self.path.open("rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        buffer = memoryview(self._mmap)
+
+        magic, format_version, count, players_version, questions_version = _HEADER.unpack_from(buffer)
+        if magic != MAGIC or format_version != FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a catalog file (format {FORMAT_VERSION})")
+        self.players_version = players_version.decode("ascii")
+        self.questions_version = questions_version.decode("ascii")
+
+        self._columns: dict[str, memoryview | StringColumn] = {}
+        for i in range(count):
+            name, kind, items, offset, size = _ENTRY.unpack_from(buffer, _HEADER.size + i * _ENTRY.size)
+            data = buffer[offset : offset + size]
+            if kind == b"s":
+                split = 8 * (items + 1)
+                column = StringColumn(data[:split].cast("q"), data[split:])
+            else:
+                column = data.cast(kind.decode("ascii"))
+            self._columns[name.rstrip(b"\0").decode("ascii")] = column
+
+    def column(self, name: str) -> memoryview | StringColumn:
+        return self._columns[name]
+
+    def player_catalog(self) -> PlayerCatalog:
+        c = self.column
+        samplers = {
+            stat: AliasSampler.from_tables(
+                *(c(f"alias.{stat}.{table}") for table in ALIAS_TABLES),
+                block_size=c(f"alias.{stat}.block_size")[0],
+            )
+            for stat in PLAYER_STATS
+        }
+        return PlayerCatalog(
+            ids=c("player.id"),
+            names=c("player.name"),
+            image_urls=c("player.image_url"),
+            stats={stat: c(f"stat.{stat}") for stat in PLAYER_STATS},
+            eligible={stat: c(f"eligible.{stat}") for stat in PLAYER_STATS},
+            weights=c("player.weight"),
+            samplers=samplers,
+            name_index=NamePrefixIndex.from_sorted(c("search.keys"), c("search.offsets")),
+            version=self.players_version,
+        )
+
+    def question_catalog(self) -> QuestionCatalog:
+        columns = {field: self.column(f"question.{field}") for field in QUESTION_FIELDS}
+        questions = []
+        for i, question_id in enumerate(self.column("question.id")):
+            values = {field: column[i] for field, column in columns.items()}
+            answer = values.pop("correct_answer")
+            questions.append((QuestionOut(id=question_id, **values), answer))
+        catalog = QuestionCatalog.build(questions)
+        if catalog.version != self.questions_version:
+            raise ValueError(f"{self.path}: question data does not match its version")
+        return catalog
+
+    def catalog(self) -> Catalog:
+        return Catalog(players=self.player_catalog(), questions=self.question_catalog())
+
+
+def open_catalog_file(path: str | Path) -> Catalog:
+    """The catalog stored in `path`; players are served from the shared mapping."""
+    return CatalogFile(path).catalog()
+
+
+async def build_catalog_file(path: Path) -> Catalog:
+    """Load the catalog from the database and write it to `path`."""
+    if not DATABASE_SNAPSHOT:
+        # Bring an older database up to the current columns, as startup does
+        await create_db_and_tables()
+    async with async_session_maker() as session:
+        catalog = await load_catalog(session)
+    write_catalog_file(catalog, path)
+    return catalog
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_CATALOG_FILE_PATH
+    built = asyncio.run(build_catalog_file(target))
+    print(f"Catalog {built.version} ({len(built.players)} players) written to {target}")
@@ -0,0 +1,234 @@
+"""
+Deterministic synthetic players and trivia questions for scale testing.
+
+The same `--seed` always yields the same rows, whatever the output format,
+and rows are generated one at a time, so 10M players stream in constant
+memory. Players have Unicode names (accented Latin plus some Cyrillic, Greek
+and Japanese), a log-normal market value (median about 1.5M, capped at 200M,
+rounded like real valuations), and plausible goals, caps and ages. About one
+in ten uses the placeholder portrait, so it gets the reduced draw weight.
+Questions mix categories, difficulties and answer letters.
+
+Outputs:
+    csv    players in the `players_source.csv` layout; questions by column
+    jsonl  one JSON object per line; question files load as a TRIVIA_SOURCE
+    db     bulk inserts (Core executemany, in chunks) into DATABASE_URL,
+           replacing the table unless --append is given
+
+Usage:
+    python -m app.datagen players 100000 --format csv --output players.csv
+    python -m app.datagen questions 5000 --format jsonl --output questions.jsonl
+    python -m app.datagen players 1000000 --format db --seed 7
+"""
+
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import math
+import random
+import sys
+from pathlib import Path
+from typing import Iterable, Iterator, TextIO
+
+from sqlalchemy import delete, insert
+
+from .db import DATABASE_SNAPSHOT, Player, Question, create_db_and_tables, engine
+from .services.player_importer import default_weight
+
+
+DB_CHUNK_SIZE = 10_000
+
+PLAYER_FIELDS = ("name", "image_url", "stat_value", "goals", "caps", "age")
+QUESTION_FIELDS = (
+    "question_text",
+    "option_a",
+    "option_b",
+    "option_c",
+    "option_d",
+    "correct_answer",
+    "difficulty",
+    "category",
+)
+
+# Name pools by script; Latin names are the large majority
+LATIN_FIRST = [
+    "Luka", "Kylian", "Erling", "Joško", "Ørjan", "Iñaki", "Zoë", "Hakan", "Sérgio", "João",
+    "Thiago", "Łukasz", "Mesut", "Răzvan", "Dušan", "Søren", "Håkon", "Ángel", "Hélder", "İlkay",
+    "Marc-André", "N'Golo", "Kalvin", "Declan", "Bukayo", "Pedri", "Gavi", "Jude", "Federico", "Ousmane",
+]
+LATIN_LAST = [
+    "Modrić", "Mbappé", "Haaland", "Gvardiol", "Ødegaard", "Williams", "Çalhanoğlu", "Müller", "Gündoğan",
+    "Szczęsny", "Vlahović", "Højbjerg", "Núñez", "Félix", "Kanté", "Ter Stegen", "Rice", "Saka",
+    "González", "Dembélé", "Valverde", "Šeško", "Kovačić", "Lewandowski", "Andrés", "Özil", "Nagelsmann",
+]
+# Built surnames keep names varied at millions of rows
+SYLLABLES = ["Ko", "Ma", "Ri", "Ša", "Ød", "Ün", "Ló", "Vá", "Ber", "Gon", "Hal", "Piè", "Dra", "Zé", "Kri", "Ñu"]
+SUFFIXES = ["ić", "sen", "ez", "ini", "ov", "son", "ão", "ski", "oğlu", "aert", "elli", "ou"]
+OTHER_NAMES = [
+    (["Александр", "Игорь", "Артём", "Фёдор"], ["Головин", "Акинфеев", "Дзюба", "Смолов"]),
+    (["Γιώργος", "Κώστας", "Νίκος"], ["Καραγκούνης", "Τσιμίκας", "Μασούρας"]),
+    (["翔", "大輔", "拓実", "三笘"], ["南野", "久保", "遠藤", "冨安"]),
+]
+CLUBS = [
+    "Real Madrid", "FC Barcelona", "Bayern München", "Manchester City", "Liverpool", "Juventus",
+    "Paris Saint-Germain", "Benfica", "Porto", "Ajax", "Galatasaray", "Fenerbahçe", "Borussia Dortmund",
+    "Atlético Madrid", "Internazionale", "AC Milan", "Sporting CP", "Celtic", "Club Brugge", "Olympiakos",
+    "Dinamo Zagreb", "Crvena zvezda", "Slavia Praha", "Beşiktaş", "Shakhtar Donetsk", "Napoli",
+]
+COUNTRIES = [
+    "Brazil", "Argentina", "France", "Germany", "Spain", "Italy", "Portugal", "Netherlands", "Croatia",
+    "Türkiye", "Norway", "Denmark", "Poland", "Serbia", "Japan", "Morocco", "Senegal", "Uruguay",
+]
+COMPETITIONS = ["World Cup", "Champions League", "Europa League", "Copa América", "EURO", "Premier League"]
+
+DIFFICULTIES = (("easy", 0.4), ("medium", 0.4), ("hard", 0.2))
+ANSWERS = "ABCD"
+
+DEFAULT_PORTRAIT = "https://img.example.com/portrait/header/default.jpg?lm=1"
+# Market value: log-normal around 1.5M, in valuation steps, capped
+MARKET_VALUE_MEDIAN = 1_500_000
+MARKET_VALUE_SIGMA = 1.6
+MARKET_VALUE_MAX = 200_000_000
+
+
+def _market_value(rng: random.Random) -> int:
+    value = rng.lognormvariate(math.log(MARKET_VALUE_MEDIAN), MARKET_VALUE_SIGMA)
+    step = 25_000 if value < 1_000_000 else 100_000 if value < 10_000_000 else 500_000
+    return int(min(max(round(value / step) * step, 25_000), MARKET_VALUE_MAX))
+
+
+def _name(rng: random.Random) -> str:
+    if rng.random() < 0.08:
+        first, last = rng.choice(OTHER_NAMES)
+        return f"{rng.choice(first)} {rng.choice(last)}"
+    if rng.random() < 0.5:
+        return f"{rng.choice(LATIN_FIRST)} {rng.choice(LATIN_LAST)}"
+    surname = rng.choice(SYLLABLES) + rng.choice(SYLLABLES).lower() + rng.choice(SUFFIXES)
+    return f"{rng.choice(LATIN_FIRST)} {surname}"
+
+
+def generate_players(count: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f"players:{seed}")
+    for i in range(count):
+        age = round(rng.triangular(17, 39, 26))
+        # Careers scale with age; attackers (a third) score most of the goals
+        career = max(age - 17, 0)
+        scoring = rng.choice((0.05, 0.15, 0.45))
+        caps = int(rng.expovariate(1 / 25) * career / 10) if rng.random() < 0.35 else 0
+        image_url = DEFAULT_PORTRAIT if rng.random() < 0.1 else f"https://img.example.com/players/{seed}/{i}.jpg"
+        yield {
+            "name": _name(rng),
+            "image_url": image_url,
+            "stat_value": _market_value(rng),
+            "goals": int(rng.gammavariate(2.0, 12.0) * scoring * career / 4),
+            "caps": caps,
+            "age": age,
+            "weight": default_weight(image_url),
+        }
+
+
+def _question(rng: random.Random) -> tuple[str, list[str], str]:
+    """Question text, four distinct options (correct one first) and category."""
+    kind = rng.randrange(4)
+    if kind == 0:
+        options = rng.sample(CLUBS, 4)
+        return f"Which club did {_name(rng)} join in {rng.randint(1990, 2025)}?", options, "Transfers"
+    if kind == 1:
+        competition = rng.choice(COMPETITIONS)
+        options = rng.sample(COUNTRIES if competition in ("World Cup", "Copa América", "EURO") else CLUBS, 4)
+        return f"Who won the {rng.randint(1960, 2025)} {competition}?", options, competition
+    if kind == 2:
+        options = [str(n) for n in rng.sample(range(5, 120), 4)]
+        return f"How many goals did {_name(rng)} score for {rng.choice(COUNTRIES)}?", options, "Records"
+    options = [_name(rng) for _ in range(4)]
+    while len(set(options)) < 4:
+        options = [_name(rng) for _ in range(4)]
+    return f"Who captained {rng.choice(CLUBS)} in the {rng.randint(1990, 2025)} season?", options, "Clubs"
+
+
+def generate_questions(count: int, seed: int = 0) -> Iterator[dict]:
+    rng = random.Random(f"questions:{seed}")
+    difficulties = [d for d, _ in DIFFICULTIES]
+    weights = [w for _, w in DIFFICULTIES]
+    for _ in range(count):
+        text, options, category = _question(rng)
+        correct = options[0]
+        rng.shuffle(options)
+        yield {
+            "question_text": text,
+            "option_a": options[0],
+            "option_b": options[1],
+            "option_c": options[2],
+            "option_d": options[3],
+            "correct_answer": ANSWERS[options.index(correct)],
+            "difficulty": rng.choices(difficulties, weights)[0],
+            "category": category,
+        }
+
+
+def write_csv(rows: Iterable[dict], fields: tuple[str, ...], out: TextIO) -> int:
+    writer = csv.DictWriter(out, fieldnames=fields, extrasaction="ignore", lineterminator="\n")
+    writer.writeheader()
+    count = 0
+    for count, row in enumerate(rows, 1):
+        writer.writerow(row)
+    return count
+
+
+def write_jsonl(rows: Iterable[dict], fields: tuple[str, ...], out: TextIO) -> int:
+    count = 0
+    for count, row in enumerate(rows, 1):
+        out.write(json.dumps({f: row[f] for f in fields}, ensure_ascii=False))
+        out.write("\n")
+    return count
+
+
+async def write_db(rows: Iterable[dict], model, append: bool = False) -> int:
+    """Insert `rows` in chunks, in one transaction."""
+    if DATABASE_SNAPSHOT:
+        raise ValueError("DATABASE_SNAPSHOT is read-only; unset it to write generated data")
+    await create_db_and_tables()
+    count = 0
+    rows = iter(rows)
+    async with engine.begin() as conn:
+        if not append:
+            await conn.execute(delete(model))
+        while chunk := list(itertools.islice(rows, DB_CHUNK_SIZE)):
+            await conn.execute(insert(model), chunk)
+            count += len(chunk)
+    return count
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app.datagen", description=__doc__.split("\n\n")[0])
+    parser.add_argument("kind", choices=("players", "questions"))
+    parser.add_argument("count", type=int)
+    parser.add_argument("--format", choices=("csv", "jsonl", "db"), default="csv")
+    parser.add_argument("--output", default="-", help="file for csv/jsonl (default: stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--append", action="store_true", help="db: keep existing rows")
+    args = parser.parse_args(argv)
+
+    if args.kind == "players":
+        rows, fields, model = generate_players(args.count, args.seed), PLAYER_FIELDS, Player
+    else:
+        rows, fields, model = generate_questions(args.count, args.seed), QUESTION_FIELDS, Question
+
+    if args.format == "db":
+        written = asyncio.run(write_db(rows, model, args.append))
+        print(f"{written} {args.kind} written to the database", file=sys.stderr)
+        return
+
+    writer = write_csv if args.format == "csv" else write_jsonl
+    if args.output == "-":
+        written = writer(rows, fields, sys.stdout)
+    else:
+        with Path(args.output).open("w", newline="", encoding="utf-8") as out:
+            written = writer(rows, fields, out)
+    print(f"{written} {args.kind} written to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
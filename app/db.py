@@ -1,11 +1,15 @@
 from collections.abc import AsyncGenerator
+from datetime import datetime, timezone
 import os
+from pathlib import Path
 
 from dotenv import load_dotenv
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, inspect
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase
 
+from .query_stats import QUERY_STATS, instrument_engine
+
 
 load_dotenv()
 
@@ -13,6 +17,24 @@ load_dotenv()
 DEFAULT_DB_URL = "sqlite+aiosqlite:///./test.db"
 DATABASE_URL = os.getenv("DATABASE_URL", DEFAULT_DB_URL)
 
+# Mutable game data (leaderboards, ...) always lives in the writable database,
+# even when the catalogs are served from a read-only snapshot.
+STATE_DATABASE_URL = DATABASE_URL
+
+# Path to a prebuilt catalog snapshot (see app/db_snapshot.py). When set, the
+# app opens it read-only and skips seeding entirely.
+DATABASE_SNAPSHOT = os.getenv("DATABASE_SNAPSHOT")
+
+
+def snapshot_url(path: str | Path) -> str:
+    """SQLAlchemy URL opening a snapshot file as an immutable, read-only database."""
+    resolved = Path(path).resolve().as_posix()
+    return f"sqlite+aiosqlite:///file:{resolved}?mode=ro&immutable=1&uri=true"
+
+
+if DATABASE_SNAPSHOT:
+    DATABASE_URL = snapshot_url(DATABASE_SNAPSHOT)
+
 
 class Base(DeclarativeBase):
     pass
@@ -24,7 +46,22 @@ class Player(Base):
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     name = Column(String(100), nullable=False)
     image_url = Column(String(255), nullable=False)
-    stat_value = Column(Integer, nullable=False)
+    stat_value = Column(Integer, nullable=False)  # market value
+    goals = Column(Integer, nullable=False, default=0, server_default="0")
+    caps = Column(Integer, nullable=False, default=0, server_default="0")
+    age = Column(Integer, nullable=False, default=0, server_default="0")
+    # Relative chance of being drawn (see app/sampling.py)
+    weight = Column(Float, nullable=False, default=1.0, server_default="1.0")
+
+
+# Stats a round can be played on, mapped to their `Player` column
+PLAYER_STATS = {
+    "market_value": "stat_value",
+    "goals": "goals",
+    "caps": "caps",
+    "age": "age",
+}
+DEFAULT_STAT = "market_value"
 
 
 class Question(Base):
@@ -41,13 +78,102 @@ class Question(Base):
     category = Column(String(50), nullable=False)  # e.g., 'Premier League', 'Champions League'
 
 
+class LeaderboardEntry(Base):
+    __tablename__ = "leaderboard_entries"
+    __table_args__ = (Index("ix_leaderboard_game_player", "game", "player_name"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    game = Column(String(20), nullable=False)  # 'higher_lower' or 'trivia'
+    player_name = Column(String(50), nullable=False)
+    score = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=lambda: datetime.now(timezone.utc))
+
+
+class QuestionStat(Base):
+    __tablename__ = "question_stats"
+
+    question_id = Column(Integer, primary_key=True)
+    answers = Column(Integer, nullable=False, default=0)
+    correct = Column(Integer, nullable=False, default=0)
+    picks_a = Column(Integer, nullable=False, default=0)
+    picks_b = Column(Integer, nullable=False, default=0)
+    picks_c = Column(Integer, nullable=False, default=0)
+    picks_d = Column(Integer, nullable=False, default=0)
+
+
+class QuestionRating(Base):
+    __tablename__ = "question_ratings"
+
+    question_id = Column(Integer, primary_key=True)
+    rating = Column(Float, nullable=False)
+
+
+class GameSession(Base):
+    __tablename__ = "game_sessions"
+
+    id = Column(String(32), primary_key=True)
+    state = Column(Text, nullable=False)  # JSON-encoded GameState
+    expires_at = Column(Float, nullable=False, index=True)  # unix timestamp
+
+
+class DatasetVersion(Base):
+    """Digest of the source file last imported, per catalog table (see app/reloader.py)."""
+
+    __tablename__ = "dataset_versions"
+
+    source = Column(String(20), primary_key=True)  # 'players' or 'questions'
+    digest = Column(String(64), nullable=False)
+
+
+# Tables loaded from the static sources (CSV, question bank, snapshot)
+CATALOG_TABLES = ("players", "questions")
+
+
 engine = create_async_engine(DATABASE_URL, future=True, echo=False)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+state_engine = create_async_engine(STATE_DATABASE_URL, future=True, echo=False) if DATABASE_SNAPSHOT else engine
+state_session_maker = (
+    async_sessionmaker(state_engine, expire_on_commit=False, class_=AsyncSession)
+    if DATABASE_SNAPSHOT
+    else async_session_maker
+)
+
+if QUERY_STATS:
+    # Per-statement timing and plans, see app/query_stats.py
+    instrument_engine(engine)
+    if state_engine is not engine:
+        instrument_engine(state_engine)
+
+
+def _add_missing_columns(sync_conn) -> None:
+    """Add columns introduced after a table was created (`create_all` never alters)."""
+    inspector = inspect(sync_conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing or column.server_default is None:
+                continue
+            column_type = column.type.compile(dialect=sync_conn.dialect)
+            default = column.server_default.arg
+            sync_conn.exec_driver_sql(
+                f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type} NOT NULL DEFAULT {default}"
+            )
+
 
 async def create_db_and_tables() -> None:
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+
+
+async def create_state_tables() -> None:
+    """Create the non-catalog tables in the writable state database."""
+    tables = [t for t in Base.metadata.sorted_tables if t.name not in CATALOG_TABLES]
+    async with state_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all, tables=tables)
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
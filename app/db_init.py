@@ -1,18 +1,17 @@
 import asyncio
-from pathlib import Path
 
 from .db import async_session_maker, create_db_and_tables
-from .services.player_importer import import_players_from_csv
+from .services.player_importer import import_players, players_source_path
 
 
 async def init_db() -> None:
     await create_db_and_tables()
 
-    root = Path(__file__).resolve().parents[1]
-    csv_path = root / "app" / "db" / "players_source.csv"
+    # players_source.csv by default, or the SQL dump with PLAYERS_SOURCE=sql
+    source_path = players_source_path()
 
     async with async_session_maker() as session:
-        await import_players_from_csv(session, csv_path)
+        await import_players(session, source_path)
 
 
 if __name__ == "__main__":
@@ -3,8 +3,13 @@ Script to seed the database with football trivia questions.
 Run this script once to populate the questions table.
 """
 
+import ast
 import asyncio
-from sqlalchemy import insert
+import json
+from pathlib import Path
+
+from sqlalchemy import delete, insert
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .db import engine, Base, Question, async_session_maker
 
@@ -2776,25 +2781,51 @@ SAMPLE_QUESTIONS = [
 
 
 
-async def seed_questions():
+def load_question_bank(path: Path) -> list[dict]:
+    """
+    Read a question bank without importing it.
+
+    `.json` files hold a list of question dicts and `.jsonl` files one per
+    line; Python files are parsed for a literal `SAMPLE_QUESTIONS = [...]`
+    assignment (never executed).
+    """
+    text = path.read_text(encoding="utf-8")
+    if path.suffix == ".json":
+        return json.loads(text)
+    if path.suffix == ".jsonl":
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+    for node in ast.parse(text).body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "SAMPLE_QUESTIONS" for t in node.targets)
+        ):
+            return ast.literal_eval(node.value)
+    raise ValueError(f"No SAMPLE_QUESTIONS found in {path}")
+
+
+async def replace_questions(session: AsyncSession, questions: list[dict]) -> None:
+    """Replace every stored question with `questions` in one transaction."""
+    try:
+        await session.execute(delete(Question))
+
+        for question_data in questions:
+            session.add(Question(**question_data))
+
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+
+
+async def seed_questions(questions: list[dict] | None = None):
     """Seed the database with sample questions."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
     async with async_session_maker() as session:
-        try:
-            from sqlalchemy import delete
-
-            # Reset and load all available questions (97 total)
-            await session.execute(delete(Question))
-
-            for question_data in SAMPLE_QUESTIONS:
-                session.add(Question(**question_data))
-
-            await session.commit()
-        except Exception as e:
-            await session.rollback()
-            raise
+        # Reset and load all available questions
+        await replace_questions(session, SAMPLE_QUESTIONS if questions is None else questions)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+"""
+Direct read-only sqlite3 access for the static catalogs.
+
+Every aiosqlite statement is shipped to a dedicated background thread and
+back, which dominates the cost of primary-key lookups. This module opens plain
+`sqlite3` connections with `mode=ro`, keeps one per thread and runs reads
+either inline on the event loop thread or through a small thread pool.
+
+Configuration:
+    READONLY_DB_MODE     off (default) | inline | pool
+    READONLY_DB_THREADS  pool size for the `pool` mode (default 4)
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Sequence
+
+from sqlalchemy.engine import make_url
+
+from .db import DATABASE_SNAPSHOT, DATABASE_URL
+
+
+READONLY_DB_MODE = os.getenv("READONLY_DB_MODE", "off").lower()
+READONLY_DB_THREADS = int(os.getenv("READONLY_DB_THREADS", "4"))
+
+
+class ReadOnlyDatabase:
+    """Per-thread `mode=ro` sqlite3 connections with an async query API."""
+
+    def __init__(
+        self,
+        path: str | Path,
+        mode: str = "inline",
+        immutable: bool = False,
+        max_workers: int = 4,
+    ) -> None:
+        if mode not in ("inline", "pool"):
+            raise ValueError(f"Unknown read-only mode: {mode}")
+
+        resolved = Path(path).resolve().as_posix()
+        self.uri = f"file:{resolved}?mode=ro" + ("&immutable=1" if immutable else "")
+        self.mode = mode
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections: list[sqlite3.Connection] = []
+        self._executor = (
+            ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sqlite-ro")
+            if mode == "pool"
+            else None
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.uri, uri=True, check_same_thread=False)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def fetchone_sync(self, sql: str, params: Sequence[Any] = ()) -> tuple | None:
+        return self._connection().execute(sql, params).fetchone()
+
+    def fetchall_sync(self, sql: str, params: Sequence[Any] = ()) -> list[tuple]:
+        return self._connection().execute(sql, params).fetchall()
+
+    async def fetchone(self, sql: str, params: Sequence[Any] = ()) -> tuple | None:
+        if self._executor is None:
+            return self.fetchone_sync(sql, params)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.fetchone_sync, sql, params)
+
+    async def fetchall(self, sql: str, params: Sequence[Any] = ()) -> list[tuple]:
+        if self._executor is None:
+            return self.fetchall_sync(sql, params)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.fetchall_sync, sql, params)
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+
+
+def sqlite_path_from_url(url: str) -> str | None:
+    """File path of a SQLite URL, or None for other backends and in-memory DBs."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite":
+        return None
+    if not parsed.database or parsed.database == ":memory:":
+        return None
+    return parsed.database
+
+
+def create_readonly_db() -> ReadOnlyDatabase | None:
+    """Build the read-only layer configured by the environment, if any."""
+    if READONLY_DB_MODE == "off":
+        return None
+    if DATABASE_SNAPSHOT:
+        return ReadOnlyDatabase(
+            DATABASE_SNAPSHOT,
+            mode=READONLY_DB_MODE,
+            immutable=True,
+            max_workers=READONLY_DB_THREADS,
+        )
+    path = sqlite_path_from_url(DATABASE_URL)
+    if path is None:
+        return None
+    return ReadOnlyDatabase(path, mode=READONLY_DB_MODE, max_workers=READONLY_DB_THREADS)
+
+
+readonly_db = create_readonly_db()
@@ -0,0 +1,140 @@
+"""
+Build a compacted, fully indexed, read-only SQLite snapshot of the game catalogs.
+
+The snapshot holds the `players` and `questions` tables plus a `snapshot_meta`
+table with a version stamp derived from the source data. It is meant to be
+built once (e.g. during `docker build`) and opened at runtime through
+`DATABASE_SNAPSHOT`, which skips seeding altogether.
+
+Usage:
+    python -m app.db_snapshot [output_path]
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+
+from .db import Base, Player, Question
+from .db_init_trivia import SAMPLE_QUESTIONS
+from .services.player_importer import (
+    default_weight,
+    normalize_sql_dump,
+    parse_players_csv,
+    players_source_path,
+)
+
+
+DEFAULT_SNAPSHOT_PATH = Path(__file__).resolve().parents[1] / "snapshot" / "catalog.db"
+
+# Secondary indexes for the lookups the services perform on top of the
+# primary keys created by the models.
+SNAPSHOT_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_players_stat_value ON players (stat_value)",
+    "CREATE INDEX IF NOT EXISTS ix_questions_category ON questions (category)",
+    "CREATE INDEX IF NOT EXISTS ix_questions_difficulty ON questions (difficulty)",
+)
+
+
+def compute_version(players: list[dict], questions: list[dict]) -> str:
+    """Stable content hash of the catalog data."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(players, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    digest.update(json.dumps(questions, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _read_sql_dump_players(sql_path: Path) -> list[dict]:
+    script, _ = normalize_sql_dump(sql_path.read_text(encoding="utf-8"))
+    conn = sqlite3.connect(":memory:")
+    try:
+        conn.execute("CREATE TABLE players (name TEXT, image_url TEXT, stat_value INTEGER)")
+        conn.executescript(script)
+        rows = conn.execute("SELECT name, image_url, stat_value FROM players ORDER BY rowid").fetchall()
+    finally:
+        conn.close()
+    return [
+        {"name": n, "image_url": i, "stat_value": v, "weight": default_weight(i)} for n, i, v in rows
+    ]
+
+
+def build_snapshot(
+    output_path: Path,
+    csv_path: Path | None = None,
+    questions: list[dict] | None = None,
+) -> str:
+    """
+    Write the snapshot to `output_path` and return its version stamp.
+
+    Players come from `csv_path`, which may also be a `.sql` dump; it defaults
+    to the source selected by `PLAYERS_SOURCE`.
+    """
+    csv_path = csv_path or players_source_path()
+    if not csv_path.exists():
+        players = []
+    elif csv_path.suffix == ".sql":
+        players = _read_sql_dump_players(csv_path)
+    else:
+        players = parse_players_csv(csv_path)
+    questions = list(SAMPLE_QUESTIONS if questions is None else questions)
+    version = compute_version(players, questions)
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+
+    engine = create_engine(f"sqlite:///{tmp_path}")
+    try:
+        Base.metadata.create_all(engine, tables=[Player.__table__, Question.__table__])
+        with engine.begin() as conn:
+            if players:
+                conn.execute(insert(Player), players)
+            if questions:
+                conn.execute(insert(Question), questions)
+    finally:
+        engine.dispose()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE snapshot_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        conn.executemany(
+            "INSERT INTO snapshot_meta (key, value) VALUES (?, ?)",
+            [
+                ("version", version),
+                ("built_at", datetime.now(timezone.utc).isoformat()),
+                ("players", str(len(players))),
+                ("questions", str(len(questions))),
+            ],
+        )
+        for statement in SNAPSHOT_INDEXES:
+            conn.execute(statement)
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA journal_mode=DELETE")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+    os.replace(tmp_path, output_path)
+    return version
+
+
+def read_snapshot_meta(path: str | Path) -> dict[str, str]:
+    """Return the `snapshot_meta` key/value pairs of an existing snapshot."""
+    resolved = Path(path).resolve().as_posix()
+    conn = sqlite3.connect(f"file:{resolved}?mode=ro&immutable=1", uri=True)
+    try:
+        return dict(conn.execute("SELECT key, value FROM snapshot_meta").fetchall())
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SNAPSHOT_PATH
+    stamp = build_snapshot(target)
+    print(f"Snapshot {stamp} written to {target}")
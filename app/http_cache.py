@@ -0,0 +1,72 @@
+"""
+Pre-serialized JSON responses for endpoints whose output is deterministic.
+
+A `CachedBody` is a response serialized once, with its ETag. `ResponseCache`
+keeps the most recently used ones, keyed by whatever the output is a pure
+function of (always including the catalog version). `cached_json_response()`
+serves a body with `ETag` and `Cache-Control`, or an empty 304 when the
+client's `If-None-Match` already matches.
+"""
+
+import hashlib
+import os
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+
+# Lifetime of seeded responses. The ETag embeds the catalog version, so a
+# reload is picked up on revalidation.
+SEEDED_RESPONSE_MAX_AGE = int(os.getenv("SEEDED_RESPONSE_MAX_AGE", "3600"))
+
+
+@dataclass(frozen=True, slots=True)
+class CachedBody:
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_model(cls, model: BaseModel, version: str) -> "CachedBody":
+        body = model.model_dump_json().encode("utf-8")
+        return cls(body=body, etag=f'"{version}-{hashlib.sha256(body).hexdigest()[:16]}"')
+
+
+class ResponseCache:
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, CachedBody] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_build(self, key: Hashable, build: Callable[[], CachedBody]) -> CachedBody:
+        cached = self._entries.get(key)
+        if cached is None:
+            cached = self._entries[key] = build()
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return cached
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def _etag_matches(header: str | None, etag: str) -> bool:
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak validators are fine for GET: compare the opaque part only
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+
+def cached_json_response(request: Request, cached: CachedBody, cache_control: str) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
@@ -0,0 +1,63 @@
+"""
+Background task that runs an async callable every `interval` seconds.
+
+Shared by the write-behind queue, the analytics and rating flushers and the
+dataset watcher. `stop()` never cancels a run in progress: it sets a stop
+flag and wakes the loop, the current run finishes, and the loop exits
+before starting another. Owners then do their own final flush, so a batch
+that was being written when shutdown began is never lost mid-await.
+"""
+
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    def __init__(self, run: Callable[[], Awaitable[object]], interval: float) -> None:
+        self._run_once = run
+        self.interval = interval
+        self._wake = asyncio.Event()
+        self._stopping = False
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def wake(self) -> None:
+        """Run as soon as the current wait or run is over, without waiting out the interval."""
+        self._wake.set()
+
+    async def _loop(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._stopping:
+                break
+            try:
+                await self._run_once()
+            except Exception as e:
+                logger.error(f"Periodic task {self._run_once.__qualname__} failed: {e}")
+
+    def start(self) -> None:
+        if self.interval > 0 and self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Let a run in progress finish, then end the loop."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wake.set()
+        try:
+            await self._task
+        finally:
+            self._task = None
@@ -0,0 +1,191 @@
+"""
+Opt-in per-request profiling.
+
+A request is profiled when it carries `X-Profile: 1` together with a valid
+`X-Admin-Token`, or when it is picked by `PROFILE_SAMPLE_RATE`. It then runs
+under `FoldedStackTracer`, a deterministic `sys.setprofile` hook that records
+self time per call stack. The result is written to `PROFILE_DIR` in folded
+format (`frame;frame;frame microseconds` per line). flamegraph.pl, speedscope
+and inferno read it directly. The response gets an `X-Profile-Id` header
+naming the file.
+
+The hook sees the event-loop thread only. Time spent awaiting I/O (the
+database runs on aiosqlite's thread) is not charged to the request. The hook
+is per-thread, so while it is installed it fires for everything the loop
+runs: other requests, the background flushers, the dataset watcher. Events
+are only recorded when a context variable set by the profiled request is
+visible, i.e. in its own task and the tasks it spawns, so none of that
+concurrent work ends up in the profile; it only pays the hook's overhead.
+One request is profiled at a time. With profiling off, the middleware costs
+one header lookup per request.
+
+Configuration:
+    PROFILE_DIR          where profiles are written (default <tmp>/higher-lower-profiles)
+    PROFILE_SAMPLE_RATE  fraction of requests profiled without the header (default 0)
+    PROFILE_KEEP         newest profiles kept on disk (default 50)
+"""
+
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from fastapi import Request, Response
+
+from .admin import is_admin
+
+
+PROFILE_DIR = Path(os.getenv("PROFILE_DIR", Path(tempfile.gettempdir()) / "higher-lower-profiles"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "50"))
+
+PROFILE_SUFFIX = ".folded"
+_PROFILE_NAME = re.compile(r"^[\w.-]+\.folded$")
+
+# Tracer of the request being profiled, in that request's context only
+_active_tracer: ContextVar["FoldedStackTracer | None"] = ContextVar("active_tracer", default=None)
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{code.co_qualname}"
+
+
+def _builtin_name(func) -> str:
+    return f"{getattr(func, '__module__', None) or 'builtins'}:{getattr(func, '__qualname__', repr(func))}"
+
+
+class FoldedStackTracer:
+    """
+    Self time per call stack, in microseconds, of the code that runs in the
+    context `start()` was called from (and contexts copied from it later).
+
+    Coroutines fire a return when they suspend and a call when they resume,
+    so the stack stays balanced across awaits, and a task switch always
+    happens outside the task's context. Frames that were already running
+    when tracing started pop without having been pushed; those events are
+    ignored.
+    """
+
+    def __init__(self) -> None:
+        self.stacks: dict[str, float] = {}
+        # (folded path, start, time spent in children)
+        self._stack: list[list] = []
+        self._token = None
+
+    def _push(self, name: str, now: float) -> None:
+        path = f"{self._stack[-1][0]};{name}" if self._stack else name
+        self._stack.append([path, now, 0.0])
+
+    def _pop(self, now: float) -> None:
+        if not self._stack:
+            return
+        path, start, children = self._stack.pop()
+        elapsed = now - start
+        self.stacks[path] = self.stacks.get(path, 0.0) + elapsed - children
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def _event(self, frame, event: str, arg) -> None:
+        if _active_tracer.get() is not self:
+            return
+        now = time.perf_counter()
+        if event == "call":
+            self._push(_frame_name(frame), now)
+        elif event == "c_call":
+            self._push(_builtin_name(arg), now)
+        else:  # return, c_return, c_exception
+            self._pop(now)
+
+    def start(self) -> None:
+        self._token = _active_tracer.set(self)
+        sys.setprofile(self._event)
+
+    def stop(self) -> dict[str, float]:
+        sys.setprofile(None)
+        _active_tracer.reset(self._token)
+        now = time.perf_counter()
+        while self._stack:
+            self._pop(now)
+        return self.stacks
+
+    def folded(self) -> str:
+        lines = [f"{path} {round(seconds * 1e6)}" for path, seconds in self.stacks.items()]
+        return "\n".join(line for line in lines if not line.endswith(" 0")) + "\n"
+
+
+@dataclass(frozen=True, slots=True)
+class ProfileInfo:
+    name: str
+    size: int
+    created_at: float
+
+
+class RequestProfiler:
+    def __init__(
+        self,
+        directory: Path = PROFILE_DIR,
+        sample_rate: float = PROFILE_SAMPLE_RATE,
+        keep: int = PROFILE_KEEP,
+    ) -> None:
+        self.directory = Path(directory)
+        self.sample_rate = sample_rate
+        self.keep = keep
+        self._active = False
+
+    def wants(self, request: Request) -> bool:
+        if self._active:
+            return False
+        if request.headers.get("x-profile") == "1":
+            return is_admin(request.headers.get("x-admin-token"))
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def run(self, request: Request, call_next: Callable[[Request], Awaitable[Response]]) -> Response:
+        tracer = FoldedStackTracer()
+        self._active = True
+        start = time.perf_counter()
+        tracer.start()
+        try:
+            response = await call_next(request)
+        finally:
+            tracer.stop()
+            self._active = False
+        duration_ms = (time.perf_counter() - start) * 1000
+        response.headers["X-Profile-Id"] = self._save(request, tracer, duration_ms)
+        return response
+
+    def _save(self, request: Request, tracer: FoldedStackTracer, duration_ms: float) -> str:
+        slug = re.sub(r"[^\w]+", "_", request.url.path).strip("_") or "root"
+        name = f"{time.time_ns() // 1000}-{request.method}-{slug}-{duration_ms:.1f}ms{PROFILE_SUFFIX}"
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / name).write_text(tracer.folded(), encoding="utf-8")
+        for old in self.profiles()[self.keep :]:
+            (self.directory / old.name).unlink(missing_ok=True)
+        return name
+
+    def profiles(self) -> list[ProfileInfo]:
+        """Stored profiles, newest first."""
+        if not self.directory.is_dir():
+            return []
+        infos = []
+        for path in self.directory.glob(f"*{PROFILE_SUFFIX}"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            infos.append(ProfileInfo(name=path.name, size=stat.st_size, created_at=stat.st_mtime))
+        return sorted(infos, key=lambda info: info.name, reverse=True)
+
+    def path_for(self, name: str) -> Path:
+        if not _PROFILE_NAME.match(name):
+            raise ValueError(f"Invalid profile name: {name}")
+        path = self.directory / name
+        if not path.is_file():
+            raise ValueError(f"Profile {name} not found")
+        return path
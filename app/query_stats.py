@@ -0,0 +1,151 @@
+"""
+Statement timing and slow-query log for the SQLAlchemy engines.
+
+`instrument_engine()` hooks `before_cursor_execute` / `after_cursor_execute`
+and records every statement under its shape: whitespace collapsed, literals
+and expanded `IN (?, ?, ...)` lists folded to `IN (?...)`. Per shape, `QueryStats`
+keeps count, total and max time, and how many runs were slow. The first
+time a SQLite shape is seen, its `EXPLAIN QUERY PLAN` is captured on the same
+connection, so full table scans show up without waiting for a slow run.
+Statements over `SLOW_QUERY_MS` are logged with that plan. Like the
+profiler it is opt-in: the hooks and the first-run EXPLAIN cost something on
+every statement, so production engines are left alone unless QUERY_STATS=1.
+
+Configuration:
+    QUERY_STATS        1 to instrument the engines, 0 (default) to leave them alone
+    SLOW_QUERY_MS      threshold for the slow-query log (default 100)
+    QUERY_STATS_MAX    distinct shapes tracked; the least recently run are dropped (default 500)
+"""
+
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+logger = logging.getLogger(__name__)
+
+QUERY_STATS = os.getenv("QUERY_STATS", "0") == "1"
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "100"))
+QUERY_STATS_MAX = int(os.getenv("QUERY_STATS_MAX", "500"))
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+# Statements EXPLAIN QUERY PLAN can describe (DDL would be prepared and may fail)
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+_SPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    shape = _STRING.sub("?", statement)
+    shape = _NUMBER.sub("?", shape)
+    shape = _IN_LIST.sub("IN (?...)", shape)
+    return _SPACE.sub(" ", shape).strip()
+
+
+@dataclass(slots=True)
+class ShapeStats:
+    statement: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+    slow: int = 0
+    plan: list[str] | None = None
+    scans: list[str] = field(default_factory=list)
+
+
+class QueryStats:
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, max_shapes: int = QUERY_STATS_MAX) -> None:
+        self.slow_ms = slow_ms
+        self.max_shapes = max_shapes
+        self._shapes: OrderedDict[str, ShapeStats] = OrderedDict()
+        # Raw statement text -> shape; SQLAlchemy reuses compiled strings
+        self._normalized: dict[str, str] = {}
+
+    def shape(self, statement: str) -> str:
+        shape = self._normalized.get(statement)
+        if shape is None:
+            if len(self._normalized) >= 4 * self.max_shapes:
+                self._normalized.clear()
+            shape = self._normalized[statement] = normalize_statement(statement)
+        return shape
+
+    def record(self, statement: str, seconds: float) -> ShapeStats:
+        shape = self.shape(statement)
+        stats = self._shapes.get(shape)
+        if stats is None:
+            stats = self._shapes[shape] = ShapeStats(statement=shape)
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        else:
+            self._shapes.move_to_end(shape)
+        stats.count += 1
+        stats.total += seconds
+        stats.max = max(stats.max, seconds)
+        if seconds * 1000 >= self.slow_ms:
+            stats.slow += 1
+        return stats
+
+    def top(self, limit: int = 20, order: str = "total") -> list[ShapeStats]:
+        keys = {
+            "total": lambda s: s.total,
+            "max": lambda s: s.max,
+            "count": lambda s: s.count,
+            "mean": lambda s: s.total / s.count,
+        }
+        if order not in keys:
+            raise ValueError(f"Unknown order: {order}")
+        return sorted(self._shapes.values(), key=keys[order], reverse=True)[:limit]
+
+    def reset(self) -> None:
+        self._shapes.clear()
+
+
+query_stats = QueryStats()
+
+
+def _explain(conn, statement: str, parameters) -> list[str]:
+    # A separate DBAPI cursor on the same connection bypasses these hooks
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters)
+        return [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def instrument_engine(engine: AsyncEngine, stats: QueryStats = query_stats) -> None:
+    sync_engine = engine.sync_engine
+    explain = sync_engine.dialect.name == "sqlite"
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        shape = stats.record(statement, elapsed)
+        first_run = shape.plan is None and not executemany
+        if explain and first_run and shape.statement.upper().startswith(_EXPLAINABLE):
+            try:
+                shape.plan = _explain(conn, statement, parameters)
+            except Exception as e:
+                shape.plan = []
+                logger.error(f"EXPLAIN QUERY PLAN failed for {shape.statement}: {e}")
+            shape.scans = [step for step in shape.plan if step.startswith("SCAN ")]
+        if elapsed * 1000 >= stats.slow_ms:
+            plan = "; ".join(shape.plan or []) or "n/a"
+            logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {shape.statement} | plan: {plan}")
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(context):
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
@@ -0,0 +1,207 @@
+"""
+In-memory ordered structures for rank queries.
+
+`FenwickTree` keeps per-key counts over a dense integer domain and answers
+prefix sums and k-th element queries in O(log n). `ScoreIndex` builds on it to
+rank players by their best score without any per-request SQL `COUNT(*)`, and
+`RatingIndex` to find items rated close to a given rating.
+"""
+
+import random
+
+
+class FenwickTree:
+    """Binary indexed tree of counts over keys 0..capacity-1, grown on demand."""
+
+    def __init__(self, capacity: int = 1024) -> None:
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self._total = 0
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    def _grow(self, key: int) -> None:
+        counts = [self.count(k) for k in range(self._size)]
+        size = self._size
+        while size <= key:
+            size <<= 1
+        self._size = size
+        self._tree = [0] * (size + 1)
+        self._total = 0
+        for k, c in enumerate(counts):
+            if c:
+                self.add(k, c)
+
+    def add(self, key: int, delta: int = 1) -> None:
+        if key < 0:
+            raise ValueError("Keys must be non-negative")
+        if key >= self._size:
+            self._grow(key)
+        self._total += delta
+        i = key + 1
+        while i <= self._size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def prefix(self, key: int) -> int:
+        """Number of items with key <= `key`."""
+        if key < 0:
+            return 0
+        i = min(key + 1, self._size)
+        total = 0
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def count(self, key: int) -> int:
+        return self.prefix(key) - self.prefix(key - 1)
+
+    def kth(self, k: int) -> int:
+        """Key of the k-th smallest item (1-based)."""
+        if k < 1 or k > self._total:
+            raise IndexError("k out of range")
+        pos = 0
+        step = self._size
+        while step:
+            nxt = pos + step
+            if nxt <= self._size and self._tree[nxt] < k:
+                pos = nxt
+                k -= self._tree[nxt]
+            step >>= 1
+        return pos
+
+
+class ScoreIndex:
+    """Best score per player with O(log n) rank and top-K queries."""
+
+    def __init__(self) -> None:
+        self._scores: dict[str, int] = {}
+        # score -> players holding it, in the order they reached it
+        self._buckets: dict[int, dict[str, None]] = {}
+        self._tree = FenwickTree()
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def score(self, player: str) -> int | None:
+        return self._scores.get(player)
+
+    def submit(self, player: str, score: int) -> bool:
+        """Record `score` for `player`; returns True if it improved their best."""
+        previous = self._scores.get(player)
+        if previous is not None and score <= previous:
+            return False
+        if previous is not None:
+            bucket = self._buckets[previous]
+            del bucket[player]
+            if not bucket:
+                del self._buckets[previous]
+            self._tree.add(previous, -1)
+        self._scores[player] = score
+        self._buckets.setdefault(score, {})[player] = None
+        self._tree.add(score, 1)
+        return True
+
+    def rank_of_score(self, score: int) -> int:
+        """1 + number of players with a strictly higher score."""
+        return self._tree.total - self._tree.prefix(score) + 1
+
+    def rank(self, player: str) -> int | None:
+        score = self._scores.get(player)
+        if score is None:
+            return None
+        return self.rank_of_score(score)
+
+    def top(self, k: int) -> list[tuple[int, str, int]]:
+        """Up to `k` (rank, player, score) tuples, best first."""
+        entries: list[tuple[int, str, int]] = []
+        seen = 0
+        total = self._tree.total
+        while seen < total and len(entries) < k:
+            score = self._tree.kth(total - seen)
+            bucket = self._buckets[score]
+            rank = seen + 1
+            for player in bucket:
+                if len(entries) >= k:
+                    break
+                entries.append((rank, player, score))
+            seen += len(bucket)
+        return entries
+
+
+class RatingIndex:
+    """
+    Items keyed by a float rating, bucketed per whole rating point.
+
+    Updates and "near rating r" lookups are O(log n): the tree counts items
+    per bucket, so the items around r are a rank window resolved with `kth`.
+    """
+
+    MAX_RATING = 4000
+
+    def __init__(self) -> None:
+        self._ratings: dict[int, float] = {}
+        # bucket -> items in it, plus each item's position for O(1) removal
+        self._buckets: dict[int, list[int]] = {}
+        self._positions: dict[int, int] = {}
+        self._tree = FenwickTree(self.MAX_RATING + 1)
+
+    def __len__(self) -> int:
+        return len(self._ratings)
+
+    def __contains__(self, item: int) -> bool:
+        return item in self._ratings
+
+    def __iter__(self):
+        return iter(self._ratings)
+
+    def _bucket(self, rating: float) -> int:
+        return min(max(int(round(rating)), 0), self.MAX_RATING)
+
+    def rating(self, item: int) -> float | None:
+        return self._ratings.get(item)
+
+    def remove(self, item: int) -> None:
+        rating = self._ratings.pop(item, None)
+        if rating is None:
+            return
+        key = self._bucket(rating)
+        bucket = self._buckets[key]
+        i = self._positions.pop(item)
+        last = bucket.pop()
+        if last != item:
+            bucket[i] = last
+            self._positions[last] = i
+        if not bucket:
+            del self._buckets[key]
+        self._tree.add(key, -1)
+
+    def set(self, item: int, rating: float) -> None:
+        previous = self._ratings.get(item)
+        if previous is not None and self._bucket(previous) == self._bucket(rating):
+            self._ratings[item] = rating
+            return
+        self.remove(item)
+        key = self._bucket(rating)
+        bucket = self._buckets.setdefault(key, [])
+        self._positions[item] = len(bucket)
+        bucket.append(item)
+        self._ratings[item] = rating
+        self._tree.add(key, 1)
+
+    def near(self, rating: float, window: int, rng: random.Random | None = None) -> int | None:
+        """A random item among the ~2 * `window` rated closest to `rating`."""
+        total = self._tree.total
+        if not total:
+            return None
+        rng = rng or random
+        rank = self._tree.prefix(self._bucket(rating))
+        k = rng.randint(max(1, rank - window + 1), min(total, max(rank, 1) + window))
+        key = self._tree.kth(k)
+        return self._buckets[key][k - self._tree.prefix(key - 1) - 1]
@@ -0,0 +1,50 @@
+"""
+Readiness gates for `/ready`.
+
+`/health` only says the process is alive. `/ready` also requires that the
+catalog holds something to serve and that every startup gate (connection
+pools opened, caches warmed) has passed. Until then the load balancer
+should keep traffic away. Gates are cleared again on shutdown so the
+instance drains before it stops.
+
+Configuration:
+    READY_POOL_CONNECTIONS  connections opened per engine before ready (default 2)
+"""
+
+import os
+from contextlib import AsyncExitStack
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from .catalog import Catalog
+
+
+READY_POOL_CONNECTIONS = int(os.getenv("READY_POOL_CONNECTIONS", "2"))
+
+
+class Readiness:
+    def __init__(self, *gates: str) -> None:
+        self._gates = dict.fromkeys(gates, False)
+
+    def mark(self, gate: str, passed: bool = True) -> None:
+        self._gates[gate] = passed
+
+    def reset(self) -> None:
+        self._gates = dict.fromkeys(self._gates, False)
+
+    def checks(self, catalog: Catalog | None) -> dict[str, bool]:
+        return {"catalog": catalog_ready(catalog), **self._gates}
+
+
+def catalog_ready(catalog: Catalog | None) -> bool:
+    """Enough data for both games: one pair of players and one question."""
+    return catalog is not None and len(catalog.players) >= 2 and len(catalog.questions.questions) > 0
+
+
+async def preconnect(engine: AsyncEngine, count: int = READY_POOL_CONNECTIONS) -> None:
+    """Open `count` pooled connections at once, so the first requests find them ready."""
+    async with AsyncExitStack() as stack:
+        for _ in range(count):
+            conn = await stack.enter_async_context(engine.connect())
+            await conn.execute(text("SELECT 1"))
@@ -0,0 +1,258 @@
+"""
+Hot reload of the player and question sources without a restart.
+
+The players source is whichever file `PLAYERS_SOURCE` selects (CSV or SQL dump).
+
+`DatasetWatcher` polls the source files' mtime and size, and hashes a file
+only when those change, so an unchanged poll costs two `stat()` calls. When
+a source's content really changed, it re-imports only that source and
+publishes a new `Catalog` with `set_catalog()`, reusing the other half of the
+current one.
+
+Under gunicorn every worker runs a watcher, but only the one holding an
+exclusive lock on `DATASET_LOCK_FILE` imports. After an import it records the
+source's digest in `dataset_versions`; the other workers read that table on
+each poll and, when a digest moves, only load the new rows from the database
+into their own catalog. If the importing worker exits, the lock is released
+and the next worker to poll takes over. Without `fcntl` (Windows) every
+process imports, which is fine for the single-process dev server.
+
+Player weight changes (`PUT /api/admin/players/weights`) are propagated the
+same way: the worker that saves them records the new players version under
+`player_weights`, and every other worker reloads its players from the
+database on its next poll.
+
+Configuration:
+    DATASET_WATCH_INTERVAL  seconds between polls (default 5, 0 disables)
+    DATASET_LOCK_FILE       lock electing the importing process (default: in the temp dir, per DATABASE_URL)
+    TRIVIA_SOURCE           question bank to watch (default app/db_init_trivia.py)
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Awaitable, Callable
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; every process imports
+    fcntl = None
+
+from .catalog import (
+    Catalog,
+    get_catalog,
+    load_catalog,
+    load_player_catalog,
+    load_question_catalog,
+    set_catalog,
+)
+from .db import DATABASE_URL, DatasetVersion, async_session_maker
+from .db_init_trivia import load_question_bank, replace_questions
+from .periodic import PeriodicTask
+from .services.player_importer import import_players, players_source_path
+
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = Path(__file__).resolve().parent
+TRIVIA_SOURCE = Path(os.getenv("TRIVIA_SOURCE", str(APP_DIR / "db_init_trivia.py")))
+DATASET_WATCH_INTERVAL = float(os.getenv("DATASET_WATCH_INTERVAL", "5"))
+# `dataset_versions` row bumped when player weights are changed by an operator
+WEIGHTS_SOURCE = "player_weights"
+DATASET_LOCK_FILE = Path(
+    os.getenv("DATASET_LOCK_FILE")
+    or Path(tempfile.gettempdir()) / f"dataset-import-{hashlib.sha1(DATABASE_URL.encode()).hexdigest()[:12]}.lock"
+)
+
+
+@dataclass
+class WatchedFile:
+    source: str
+    path: Path
+    reload: Callable[[], Awaitable[None]]
+    publish: Callable[[], Awaitable[None]]
+    stamp: tuple[int, int] | None = None
+    digest: str | None = None
+
+    def _stat(self) -> tuple[int, int] | None:
+        try:
+            st = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _hash(self) -> str:
+        return hashlib.sha256(self.path.read_bytes()).hexdigest()
+
+    def prime(self) -> None:
+        """Record the current state as already loaded."""
+        self.stamp = self._stat()
+        self.digest = self._hash() if self.stamp else None
+
+    def changed(self) -> bool:
+        stamp = self._stat()
+        if stamp is None or stamp == self.stamp:
+            return False
+        self.stamp = stamp
+        digest = self._hash()
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        return True
+
+
+def try_lock(path: Path) -> IO | None:
+    """Take an exclusive, non-blocking lock on `path`; the open file holds it until closed."""
+    lock_file = path.open("a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class DatasetWatcher:
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession] = async_session_maker,
+        players_path: Path | None = None,
+        questions_path: Path = TRIVIA_SOURCE,
+        interval: float = DATASET_WATCH_INTERVAL,
+        lock_path: Path = DATASET_LOCK_FILE,
+    ) -> None:
+        self._session_maker = session_maker
+        self.players = WatchedFile(
+            "players", players_path or players_source_path(), self.reload_players, self.publish_players
+        )
+        self.questions = WatchedFile("questions", questions_path, self.reload_questions, self.publish_questions)
+        self.lock_path = lock_path
+        self._lock_file: IO | None = None
+        self._weights_version: str | None = None
+        self._periodic = PeriodicTask(self.poll, interval)
+        self._lock = asyncio.Lock()
+
+    @property
+    def is_importer(self) -> bool:
+        """Whether this process imports changed sources (it holds the lock)."""
+        if self._lock_file is None:
+            self._lock_file = try_lock(self.lock_path)
+            if self._lock_file is not None:
+                logger.info(f"Process {os.getpid()} imports dataset changes")
+        return self._lock_file is not None
+
+    async def _current(self) -> Catalog:
+        catalog = get_catalog()
+        if catalog is None:
+            async with self._session_maker() as session:
+                catalog = await load_catalog(session)
+        return catalog
+
+    async def publish_players(self) -> None:
+        async with self._session_maker() as session:
+            players = await load_player_catalog(session)
+        set_catalog((await self._current()).with_players(players))
+        logger.info(f"Reloaded {len(players)} players from the database")
+
+    async def publish_questions(self) -> None:
+        async with self._session_maker() as session:
+            questions = await load_question_catalog(session)
+        set_catalog((await self._current()).with_questions(questions))
+        logger.info(f"Reloaded {len(questions)} questions from the database")
+
+    async def reload_players(self) -> None:
+        async with self._session_maker() as session:
+            count = await import_players(session, self.players.path)
+        logger.info(f"Imported {count} players from {self.players.path}")
+        await self.publish_players()
+
+    async def reload_questions(self) -> None:
+        bank = await asyncio.to_thread(load_question_bank, self.questions.path)
+        async with self._session_maker() as session:
+            await replace_questions(session, bank)
+        logger.info(f"Imported {len(bank)} questions from {self.questions.path}")
+        await self.publish_questions()
+
+    async def _record(self, watched: WatchedFile) -> None:
+        stmt = sqlite_insert(DatasetVersion).values(source=watched.source, digest=watched.digest)
+        stmt = stmt.on_conflict_do_update(index_elements=[DatasetVersion.source], set_={"digest": watched.digest})
+        async with self._session_maker() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    async def _import_changed(self) -> list[Path]:
+        reloaded = []
+        for watched in (self.players, self.questions):
+            try:
+                if await asyncio.to_thread(watched.changed):
+                    await watched.reload()
+                    await self._record(watched)
+                    reloaded.append(watched.path)
+            except Exception as e:
+                # Forget the stamp so the next poll retries
+                watched.stamp = watched.digest = None
+                logger.error(f"Error reloading {watched.path}: {e}")
+        return reloaded
+
+    async def _follow_imports(self, versions: dict[str, str]) -> list[Path]:
+        reloaded = []
+        for watched in (self.players, self.questions):
+            digest = versions.get(watched.source)
+            if digest is None or digest == watched.digest:
+                continue
+            try:
+                await watched.publish()
+                watched.digest = digest
+                reloaded.append(watched.path)
+            except Exception as e:
+                logger.error(f"Error reloading {watched.source} from the database: {e}")
+        return reloaded
+
+    async def _follow_weights(self, version: str | None) -> bool:
+        if version is None or version == self._weights_version:
+            return False
+        self._weights_version = version
+        catalog = get_catalog()
+        if catalog is not None and catalog.players.version == version:
+            # This worker saved the change (or already reloaded it)
+            return False
+        await self.publish_players()
+        return True
+
+    async def poll(self) -> list[Path]:
+        """Import (or, in the other workers, load) every source whose content changed; returns their paths."""
+        async with self._lock:
+            importer = self.is_importer
+            reloaded = await self._import_changed() if importer else []
+            try:
+                async with self._session_maker() as session:
+                    result = await session.execute(select(DatasetVersion.source, DatasetVersion.digest))
+                    versions = dict(result.all())
+                if not importer:
+                    reloaded += await self._follow_imports(versions)
+                if await self._follow_weights(versions.get(WEIGHTS_SOURCE)) and self.players.path not in reloaded:
+                    reloaded.append(self.players.path)
+            except Exception as e:
+                logger.error(f"Error reading dataset versions: {e}")
+            return reloaded
+
+    def start(self) -> None:
+        self.players.prime()
+        self.questions.prime()
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,182 @@
+"""
+O(1) weighted sampling with Vose's alias method.
+
+`AliasSampler` splits the weights into fixed-size blocks. Each block has its
+own alias table, and a small top-level table picks a block by its total
+weight. A draw is two table lookups. Changing a few weights rebuilds only the
+touched blocks plus the top level, O(block_size + n / block_size), rather
+than the whole table.
+
+Tables live in flat `array`s (global positions), so batch draws run
+vectorized on NumPy views when NumPy is installed.
+"""
+
+import random
+from array import array
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:  # optional; draws fall back to pure Python
+    np = None
+
+
+BLOCK_SIZE = 256
+
+
+def vose(weights: Sequence[float]) -> tuple[list[float], list[int]]:
+    """Alias table (acceptance probability, alias index) for `weights`."""
+    n = len(weights)
+    total = sum(weights)
+    if total <= 0:
+        # Never selected by the level above; keep it well-formed
+        return [1.0] * n, list(range(n))
+
+    scaled = [w * n / total for w in weights]
+    prob = [1.0] * n
+    alias = list(range(n))
+    small = [i for i, p in enumerate(scaled) if p < 1.0]
+    large = [i for i, p in enumerate(scaled) if p >= 1.0]
+    while small and large:
+        s = small.pop()
+        l = large[-1]
+        prob[s] = scaled[s]
+        alias[s] = l
+        scaled[l] -= 1.0 - scaled[s]
+        if scaled[l] < 1.0:
+            small.append(large.pop())
+    # Leftovers are 1 up to rounding error
+    return prob, alias
+
+
+class AliasSampler:
+    def __init__(self, weights: Sequence[float], block_size: int = BLOCK_SIZE) -> None:
+        if any(w < 0 for w in weights):
+            raise ValueError("Weights must not be negative")
+        self.block_size = block_size
+        self.weights = array("d", weights)
+        self.nonzero = sum(w > 0 for w in self.weights)
+        n = len(self.weights)
+        self._prob = array("d", bytes(8 * n))
+        self._alias = array("q", bytes(8 * n))
+        self._block_totals = array("d", bytes(8 * self.blocks))
+        for block in range(self.blocks):
+            self._build_block(block)
+        self._build_top()
+
+    def __len__(self) -> int:
+        return len(self.weights)
+
+    @property
+    def blocks(self) -> int:
+        return -(-len(self.weights) // self.block_size)
+
+    @property
+    def total(self) -> float:
+        return sum(self._block_totals)
+
+    def _build_block(self, block: int) -> None:
+        start = block * self.block_size
+        stop = min(start + self.block_size, len(self.weights))
+        weights = self.weights[start:stop]
+        prob, alias = vose(weights)
+        self._prob[start:stop] = array("d", prob)
+        self._alias[start:stop] = array("q", (start + a for a in alias))
+        self._block_totals[block] = sum(weights)
+
+    def _build_top(self) -> None:
+        prob, alias = vose(self._block_totals)
+        self._top_prob = array("d", prob)
+        self._top_alias = array("q", alias)
+
+    @classmethod
+    def from_tables(
+        cls,
+        weights: Sequence[float],
+        prob: Sequence[float],
+        alias: Sequence[int],
+        block_totals: Sequence[float],
+        top_prob: Sequence[float],
+        top_alias: Sequence[int],
+        block_size: int = BLOCK_SIZE,
+    ) -> "AliasSampler":
+        """A sampler over prebuilt tables (e.g. memory-mapped views), without copying them."""
+        sampler = object.__new__(cls)
+        sampler.block_size = block_size
+        sampler.weights = weights
+        sampler.nonzero = sum(w > 0 for w in weights)
+        sampler._prob = prob
+        sampler._alias = alias
+        sampler._block_totals = block_totals
+        sampler._top_prob = top_prob
+        sampler._top_alias = top_alias
+        return sampler
+
+    def tables(self) -> dict[str, Sequence]:
+        """The arrays `from_tables` takes, by name."""
+        return {
+            "weights": self.weights,
+            "prob": self._prob,
+            "alias": self._alias,
+            "block_totals": self._block_totals,
+            "top_prob": self._top_prob,
+            "top_alias": self._top_alias,
+        }
+
+    def _copy(self) -> "AliasSampler":
+        clone = object.__new__(AliasSampler)
+        clone.block_size = self.block_size
+        clone.weights = array("d", self.weights)
+        clone.nonzero = self.nonzero
+        clone._prob = array("d", self._prob)
+        clone._alias = array("q", self._alias)
+        clone._block_totals = array("d", self._block_totals)
+        clone._top_prob = array("d", self._top_prob)
+        clone._top_alias = array("q", self._top_alias)
+        return clone
+
+    def updated(self, changes: dict[int, float]) -> "AliasSampler":
+        """A new sampler with `changes` (position -> weight) applied; only touched blocks are rebuilt."""
+        if any(w < 0 for w in changes.values()):
+            raise ValueError("Weights must not be negative")
+        clone = self._copy()
+        for position, weight in changes.items():
+            clone.nonzero += (weight > 0) - (clone.weights[position] > 0)
+            clone.weights[position] = weight
+        for block in {position // self.block_size for position in changes}:
+            clone._build_block(block)
+        clone._build_top()
+        return clone
+
+    def draw(self, rng: random.Random | None = None) -> int:
+        """One position, with probability proportional to its weight."""
+        rng = rng or random
+        x = rng.random() * len(self._top_prob)
+        block = int(x)
+        if x - block >= self._top_prob[block]:
+            block = self._top_alias[block]
+
+        start = block * self.block_size
+        size = min(self.block_size, len(self.weights) - start)
+        y = rng.random() * size
+        position = start + int(y)
+        if y - int(y) >= self._prob[position]:
+            position = self._alias[position]
+        return position
+
+    def draw_many(self, count: int, gen) -> "np.ndarray":
+        """`count` independent draws using a NumPy Generator."""
+        top_prob = np.frombuffer(self._top_prob, dtype=np.float64)
+        top_alias = np.frombuffer(self._top_alias, dtype=np.int64)
+        prob = np.frombuffer(self._prob, dtype=np.float64)
+        alias = np.frombuffer(self._alias, dtype=np.int64)
+
+        x = gen.random(count) * len(top_prob)
+        block = x.astype(np.int64)
+        block = np.where(x - block < top_prob[block], block, top_alias[block])
+
+        start = block * self.block_size
+        size = np.minimum(self.block_size, len(self.weights) - start)
+        y = gen.random(count) * size
+        position = start + y.astype(np.int64)
+        return np.where(y - np.floor(y) < prob[position], position, alias[position])
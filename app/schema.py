@@ -1,8 +1,13 @@
+from datetime import date
 from typing import List, Literal
 
 from pydantic import BaseModel, Field
 
 
+# Keys of app.db.PLAYER_STATS
+StatName = Literal["market_value", "goals", "caps", "age"]
+
+
 class PlayerOut(BaseModel):
     id: int
     name: str
@@ -12,12 +17,15 @@ class PlayerOut(BaseModel):
 
 class RandomPlayersResponse(BaseModel):
     players: List[PlayerOut]
+    stat: StatName = "market_value"
 
 
 class VerifyRequest(BaseModel):
     player_left_id: int = Field(..., ge=1)
     player_right_id: int = Field(..., ge=1)
     guess: Literal["left", "right"]
+    stat: StatName = "market_value"
+    session_id: str | None = None
 
 
 class VerifyResponse(BaseModel):
@@ -26,6 +34,50 @@ class VerifyResponse(BaseModel):
     right_value: int
 
 
+class PlayerSearchResponse(BaseModel):
+    query: str
+    results: List[PlayerOut]
+
+
+class PlayerWeight(BaseModel):
+    player_id: int = Field(..., ge=1)
+    weight: float = Field(..., ge=0, le=1000)
+
+
+class PlayerWeightsUpdate(BaseModel):
+    weights: List[PlayerWeight] = Field(..., min_length=1, max_length=1000)
+
+
+class PlayerWeightsResponse(BaseModel):
+    updated: int
+    version: str | None = None
+    # Applied in the worker that answered; the others load it on their next
+    # dataset poll, within this many seconds (None: not until they restart)
+    other_workers_within: float | None = None
+
+
+class PlayerPairsResponse(BaseModel):
+    pairs: List[List[PlayerOut]]
+    stat: StatName
+
+
+class GuessRound(BaseModel):
+    player_left_id: int = Field(..., ge=1)
+    player_right_id: int = Field(..., ge=1)
+    guess: Literal["left", "right"]
+
+
+class GameBatchVerifyRequest(BaseModel):
+    rounds: List[GuessRound] = Field(..., min_length=1, max_length=100)
+    stat: StatName = "market_value"
+
+
+class GameBatchVerifyResponse(BaseModel):
+    results: List[VerifyResponse]
+    total_correct: int
+    total: int
+
+
 class QuestionOut(BaseModel):
     id: int
     question_text: str
@@ -47,6 +99,7 @@ class RandomQuestionsResponse(BaseModel):
 class TriviaVerifyRequest(BaseModel):
     question_id: int = Field(..., ge=1)
     selected_answer: str = Field(..., min_length=1, max_length=1)
+    session_id: str | None = None
 
 
 class TriviaVerifyResponse(BaseModel):
@@ -55,9 +108,143 @@ class TriviaVerifyResponse(BaseModel):
     explanation: str
 
 
+class TriviaAnswer(BaseModel):
+    question_id: int = Field(..., ge=1)
+    selected_answer: str = Field(..., min_length=1, max_length=1)
+
+
+class TriviaBatchVerifyRequest(BaseModel):
+    answers: List[TriviaAnswer] = Field(..., min_length=1, max_length=100)
+    session_id: str | None = None
+
+
+class TriviaAnswerResult(BaseModel):
+    question_id: int
+    correct: bool
+    correct_answer: str
+
+
+class TriviaBatchVerifyResponse(BaseModel):
+    results: List[TriviaAnswerResult]
+    total_correct: int
+    total: int
+
+
+class QuestionAccuracy(BaseModel):
+    question_id: int
+    category: str
+    answers: int
+    correct: int
+    accuracy: float
+    picks: dict[str, int]
+
+
+class CategoryAccuracy(BaseModel):
+    category: str
+    answers: int
+    correct: int
+    accuracy: float
+
+
+class TriviaStatsResponse(BaseModel):
+    questions: List[QuestionAccuracy]
+    categories: List[CategoryAccuracy]
+
+
+class QueryShapeOut(BaseModel):
+    statement: str
+    count: int
+    total_ms: float
+    mean_ms: float
+    max_ms: float
+    slow: int
+    plan: List[str] | None
+    scans: List[str]
+
+
+class QueryStatsResponse(BaseModel):
+    slow_query_ms: float
+    queries: List[QueryShapeOut]
+
+
+class ProfileOut(BaseModel):
+    name: str
+    size: int
+    created_at: float
+
+
+class ProfileListResponse(BaseModel):
+    profiles: List[ProfileOut]
+
+
 class HealthResponse(BaseModel):
     status: str
 
 
+class ReadinessResponse(BaseModel):
+    status: str
+    checks: dict[str, bool]
+
+
 class CountResponse(BaseModel):
     total_questions: int
+
+
+class DailyChallengeResponse(BaseModel):
+    date: date
+    version: str
+    stat: StatName
+    pairs: List[List[PlayerOut]]
+    questions: List[QuestionOut]
+
+
+LEADERBOARD_GAMES = ("higher_lower", "trivia")
+
+
+class LeaderboardSubmitRequest(BaseModel):
+    game: Literal["higher_lower", "trivia"]
+    player_name: str = Field(..., min_length=1, max_length=50)
+    score: int = Field(..., ge=0, le=1_000_000)
+
+
+class LeaderboardSubmitResponse(BaseModel):
+    game: str
+    player_name: str
+    rank: int
+    best_score: int
+    total_players: int
+
+
+class LeaderboardEntryOut(BaseModel):
+    rank: int
+    player_name: str
+    score: int
+
+
+class LeaderboardResponse(BaseModel):
+    game: str
+    total_players: int
+    entries: List[LeaderboardEntryOut]
+
+
+class LeaderboardRankResponse(BaseModel):
+    game: str
+    player_name: str
+    rank: int
+    score: int
+    total_players: int
+
+
+class SessionCreateRequest(BaseModel):
+    game: Literal["higher_lower", "trivia"]
+
+
+class SessionStateOut(BaseModel):
+    session_id: str
+    game: str
+    cursor: int
+    streak: int
+    best_streak: int
+    score: int
+    seen_ids: List[int]
+    rating: float
@@ -0,0 +1,84 @@
+"""
+Unicode-normalized prefix index over player names.
+
+Names are folded to lowercase ASCII-ish keys (accents stripped, letters such
+as "ı" or "ø" mapped by hand), so "calhanoglu" finds "Hakan Çalhanoğlu".
+Every word start of a name is indexed, so "kane" finds "Harry Kane". Lookups
+are a `bisect` into one sorted list of keys: O(log n + k), no per-query scan.
+"""
+
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Sequence
+
+
+# Letters that NFKD does not decompose into base letter + combining mark
+_FOLD = str.maketrans(
+    {
+        "ı": "i",
+        "ø": "o",
+        "đ": "d",
+        "ð": "d",
+        "ł": "l",
+        "æ": "ae",
+        "œ": "oe",
+        "þ": "th",
+        "ß": "ss",
+    }
+)
+
+
+def normalize_name(text: str) -> str:
+    """Casefold, strip accents and collapse separators to single spaces."""
+    text = unicodedata.normalize("NFKD", text.casefold().translate(_FOLD))
+    chars = []
+    for ch in text:
+        if unicodedata.combining(ch):
+            continue
+        chars.append(ch if ch.isalnum() else " ")
+    return " ".join("".join(chars).split())
+
+
+class NamePrefixIndex:
+    def __init__(self, names: list[str] | tuple[str, ...]) -> None:
+        entries: list[tuple[str, int]] = []
+        for offset, name in enumerate(names):
+            key = normalize_name(name)
+            start = 0
+            while True:
+                entries.append((key[start:], offset))
+                start = key.find(" ", start) + 1
+                if start == 0:
+                    break
+        entries.sort()
+        self._keys = [key for key, _ in entries]
+        self._offsets = array("q", (offset for _, offset in entries))
+
+    @classmethod
+    def from_sorted(cls, keys: Sequence[str], offsets: Sequence[int]) -> "NamePrefixIndex":
+        """An index over already sorted keys (e.g. memory-mapped views), without copying them."""
+        index = object.__new__(cls)
+        index._keys = keys
+        index._offsets = offsets
+        return index
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def search(self, query: str, limit: int = 10) -> list[int]:
+        """Offsets of up to `limit` names with a word starting with `query`, in key order."""
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+
+        results: list[int] = []
+        seen: set[int] = set()
+        i = bisect_left(self._keys, prefix)
+        while i < len(self._keys) and len(results) < limit and self._keys[i].startswith(prefix):
+            offset = self._offsets[i]
+            if offset not in seen:
+                seen.add(offset)
+                results.append(offset)
+            i += 1
+        return results
@@ -0,0 +1,78 @@
+"""
+Production launcher: gunicorn with uvicorn workers, sized to the container.
+
+`python -m app.server` runs gunicorn with `gunicorn.conf.py`, which takes
+its worker count from `cpu_limit()` (CPU affinity and the cgroup quota)
+unless `WEB_CONCURRENCY` is set. Workers are `ProductionWorker`s, which use
+uvloop and httptools when they are installed and fall back to asyncio and
+h11 otherwise. `main.py` stays the single-process dev server with reload.
+
+Configuration (read by gunicorn.conf.py):
+    WEB_CONCURRENCY      worker processes (default: usable cores); more than one needs shared sessions
+    BIND                 listen address (default 0.0.0.0:8000)
+    BACKLOG              pending connections queue (default 2048)
+    KEEP_ALIVE           seconds an idle keep-alive connection stays open (default 5)
+    MAX_REQUESTS         recycle a worker after this many requests, 0 = never (default 0)
+    MAX_REQUESTS_JITTER  random extra requests per worker, so they don't recycle together (default 0)
+    GRACEFUL_TIMEOUT     seconds workers get to finish requests on shutdown (default 30)
+    TIMEOUT              seconds before a silent worker is killed and restarted (default 30)
+"""
+
+import importlib.util
+import math
+import os
+import sys
+import warnings
+from pathlib import Path
+
+with warnings.catch_warnings():
+    # The bundled worker still works; it only points at the uvicorn-worker package
+    warnings.simplefilter("ignore", DeprecationWarning)
+    from uvicorn.workers import UvicornWorker
+
+
+CGROUP_CPU_MAX = Path("/sys/fs/cgroup/cpu.max")
+GUNICORN_CONF = Path(__file__).resolve().parents[1] / "gunicorn.conf.py"
+
+
+def cgroup_cpu_limit(path: Path = CGROUP_CPU_MAX) -> int | None:
+    """CPUs allowed by a cgroup v2 `cpu.max` quota, rounded up; None if unlimited."""
+    try:
+        quota, period = path.read_text().split()[:2]
+    except (OSError, ValueError):
+        return None
+    if quota == "max":
+        return None
+    return max(1, math.ceil(int(quota) / int(period)))
+
+
+def cpu_limit() -> int:
+    """Cores this process may actually use: affinity mask, capped by the cgroup quota."""
+    try:
+        cores = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS
+        cores = os.cpu_count() or 1
+    quota = cgroup_cpu_limit()
+    return min(cores, quota) if quota else cores
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class ProductionWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _installed("uvloop") else "asyncio",
+        "http": "httptools" if _installed("httptools") else "h11",
+    }
+
+
+def main() -> None:
+    from gunicorn.app.wsgiapp import run
+
+    sys.argv = ["gunicorn", "--config", str(GUNICORN_CONF), "app.app:app", *sys.argv[1:]]
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import logging
+import os
+from array import array
+
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import Question, QuestionStat
+from app.periodic import PeriodicTask
+from app.schema import CategoryAccuracy, QuestionAccuracy, TriviaStatsResponse
+
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_FLUSH_INTERVAL = float(os.getenv("ANALYTICS_FLUSH_INTERVAL", "10"))
+
+# Counter layout per question: answers, correct, then one slot per option
+COUNTER_COLUMNS = ("answers", "correct", "picks_a", "picks_b", "picks_c", "picks_d")
+_OPTION_SLOT = {"A": 2, "B": 3, "C": 4, "D": 5}
+
+
+class AnswerAnalytics:
+    """
+    Per-question answer counters.
+
+    `record()` bumps counters in this worker's memory and never touches the
+    database. The flush task swaps the whole counter dict out and adds it to
+    `question_stats` in one batched upsert. Each worker flushes its own
+    deltas, so counts from all workers simply add up. The event loop runs one
+    handler at a time, so no lock is needed.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        interval: float = ANALYTICS_FLUSH_INTERVAL,
+    ) -> None:
+        self._session_maker = session_maker
+        self._counts: dict[int, array] = {}
+        self._periodic = PeriodicTask(self.flush, interval)
+
+    def record(self, question_id: int, selected_answer: str, correct: bool) -> None:
+        counts = self._counts.get(question_id)
+        if counts is None:
+            counts = self._counts[question_id] = array("q", bytes(8 * len(COUNTER_COLUMNS)))
+        counts[0] += 1
+        counts[1] += correct
+        slot = _OPTION_SLOT.get(selected_answer.upper())
+        if slot is not None:
+            counts[slot] += 1
+
+    def _merge(self, counts: dict[int, array]) -> None:
+        for question_id, delta in counts.items():
+            current = self._counts.get(question_id)
+            if current is None:
+                self._counts[question_id] = delta
+            else:
+                for i, value in enumerate(delta):
+                    current[i] += value
+
+    async def flush(self) -> int:
+        """Persist the counters gathered since the last flush; returns the questions written."""
+        counts, self._counts = self._counts, {}
+        if not counts:
+            return 0
+
+        rows = [
+            {"question_id": question_id, **dict(zip(COUNTER_COLUMNS, delta))}
+            for question_id, delta in counts.items()
+        ]
+        stmt = sqlite_insert(QuestionStat)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[QuestionStat.question_id],
+            set_={c: getattr(QuestionStat, c) + getattr(stmt.excluded, c) for c in COUNTER_COLUMNS},
+        )
+        try:
+            async with self._session_maker() as session:
+                await session.execute(stmt, rows)
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Analytics flush failed, keeping {len(rows)} questions: {e}")
+            self._merge(counts)
+            return 0
+        except BaseException:
+            # Cancelled mid-write: fold the counts back in for the next flush
+            self._merge(counts)
+            raise
+        return len(rows)
+
+    async def stats(self, session: AsyncSession, min_answers: int = 1) -> TriviaStatsResponse:
+        """Accuracy per question and per category, persisted plus this worker's unflushed counts."""
+        totals: dict[int, list[int]] = {}
+        async with self._session_maker() as state:
+            result = await state.execute(
+                select(QuestionStat.question_id, *(getattr(QuestionStat, c) for c in COUNTER_COLUMNS))
+            )
+            for question_id, *values in result.all():
+                totals[question_id] = values
+        for question_id, delta in self._counts.items():
+            current = totals.setdefault(question_id, [0] * len(COUNTER_COLUMNS))
+            for i, value in enumerate(delta):
+                current[i] += value
+
+        result = await session.execute(
+            select(Question.id, Question.category).where(Question.id.in_(totals))
+        )
+        categories = dict(result.all())
+
+        questions = []
+        by_category: dict[str, list[int]] = {}
+        for question_id, (answers, correct, *picks) in sorted(totals.items()):
+            category = categories.get(question_id)
+            if category is None or answers < min_answers:
+                continue
+            questions.append(
+                QuestionAccuracy(
+                    question_id=question_id,
+                    category=category,
+                    answers=answers,
+                    correct=correct,
+                    accuracy=correct / answers,
+                    picks=dict(zip("ABCD", picks)),
+                )
+            )
+            bucket = by_category.setdefault(category, [0, 0])
+            bucket[0] += answers
+            bucket[1] += correct
+
+        return TriviaStatsResponse(
+            questions=questions,
+            categories=[
+                CategoryAccuracy(category=category, answers=answers, correct=correct, accuracy=correct / answers)
+                for category, (answers, correct) in sorted(by_category.items())
+            ],
+        )
+
+    def start(self) -> None:
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+        await self.flush()
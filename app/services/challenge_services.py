@@ -0,0 +1,74 @@
+import hashlib
+import os
+import random
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.catalog import Catalog, fallback_catalog, get_catalog
+from app.db import DEFAULT_STAT
+from app.http_cache import CachedBody, ResponseCache
+from app.schema import DailyChallengeResponse
+
+
+DAILY_CHALLENGE_PAIRS = int(os.getenv("DAILY_CHALLENGE_PAIRS", "10"))
+DAILY_CHALLENGE_QUESTIONS = int(os.getenv("DAILY_CHALLENGE_QUESTIONS", "10"))
+# Cache lifetime of a past day's challenge; today's expires at UTC midnight
+DAILY_CHALLENGE_MAX_AGE = int(os.getenv("DAILY_CHALLENGE_MAX_AGE", "86400"))
+
+# A handful of (day, catalog version) entries: today, plus recent replays
+_daily_cache = ResponseCache(max_entries=32)
+
+
+class ChallengeService:
+    @staticmethod
+    def today() -> date:
+        return datetime.now(timezone.utc).date()
+
+    @staticmethod
+    def seed_for(day: date, version: str) -> int:
+        digest = hashlib.sha256(f"daily:{day.isoformat()}:{version}".encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big")
+
+    @staticmethod
+    def build_daily_challenge(catalog: Catalog, day: date) -> DailyChallengeResponse:
+        """The challenge for `day`: a pure function of the date and catalog version."""
+        rng = random.Random(ChallengeService.seed_for(day, catalog.version))
+        players = catalog.players
+        questions = catalog.questions.questions
+        return DailyChallengeResponse(
+            date=day,
+            version=catalog.version,
+            stat=DEFAULT_STAT,
+            pairs=[
+                [players.player(left), players.player(right)]
+                for left, right in players.sample_pairs(DAILY_CHALLENGE_PAIRS, DEFAULT_STAT, rng)
+            ],
+            questions=rng.sample(questions, min(DAILY_CHALLENGE_QUESTIONS, len(questions))),
+        )
+
+    @staticmethod
+    async def get_daily_challenge(session: AsyncSession, day: date) -> CachedBody:
+        if day > ChallengeService.today():
+            raise ValueError("The challenge for that day is not available yet")
+
+        catalog = get_catalog()
+        if catalog is None:
+            # No published catalog: use the one shared by the SQL fallbacks
+            catalog = await fallback_catalog(session)
+
+        return _daily_cache.get_or_build(
+            (day, catalog.version),
+            lambda: CachedBody.from_model(
+                ChallengeService.build_daily_challenge(catalog, day), catalog.version
+            ),
+        )
+
+    @staticmethod
+    def cache_control(day: date) -> str:
+        today = ChallengeService.today()
+        if day < today:
+            return f"public, max-age={DAILY_CHALLENGE_MAX_AGE}"
+        midnight = datetime.combine(today + timedelta(days=1), time.min, tzinfo=timezone.utc)
+        remaining = int((midnight - datetime.now(timezone.utc)).total_seconds())
+        return f"public, max-age={max(remaining, 0)}"
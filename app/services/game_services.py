@@ -1,17 +1,71 @@
 import random
 
-from sqlalchemy import func, select
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db import Player
-from app.schema import PlayerOut, RandomPlayersResponse, VerifyRequest, VerifyResponse
+from app.catalog import (
+    PlayerCatalog,
+    fallback_players,
+    forget_fallback,
+    get_catalog,
+    load_player_catalog,
+    set_catalog,
+)
+from app.db import DEFAULT_STAT, PLAYER_STATS, DatasetVersion, Player
+from app.db_readonly import ReadOnlyDatabase
+from app.http_cache import CachedBody, ResponseCache
+from app.reloader import DATASET_WATCH_INTERVAL, WEIGHTS_SOURCE
+from app.schema import (
+    GameBatchVerifyRequest,
+    GameBatchVerifyResponse,
+    GuessRound,
+    PlayerOut,
+    PlayerPairsResponse,
+    PlayerSearchResponse,
+    PlayerWeightsResponse,
+    PlayerWeightsUpdate,
+    RandomPlayersResponse,
+    VerifyRequest,
+    VerifyResponse,
+)
+from app.sessions import GameState
+
+
+_seeded_pairs = ResponseCache(max_entries=4096)
 
 
 class GameService:
     @staticmethod
-    async def get_two_random_players(session: AsyncSession) -> RandomPlayersResponse:
+    async def get_two_random_players(
+        session: AsyncSession, stat: str = DEFAULT_STAT, state: GameState | None = None
+    ) -> RandomPlayersResponse:
+        """
+        Two random players. With a session `state`, players it has already
+        seen are avoided (catalog only; the SQL fallback ignores it).
+        """
+        catalog = get_catalog()
+        if catalog is not None:
+            players = catalog.players
+            if state is not None:
+                seen = state.seen_players_for(players.version, len(players))
+                left, right = players.sample_unseen_pair(seen, stat)
+            else:
+                ((left, right),) = players.sample_pairs(1, stat)
+            return RandomPlayersResponse(
+                players=[players.player(left, stat), players.player(right, stat)],
+                stat=stat,
+            )
+
+        column = getattr(Player, PLAYER_STATS[stat])
+
         # Select two random IDs first (fast)
-        id_query = select(Player.id).order_by(func.random()).limit(2)
+        # Weights are only honoured by the catalog's sampler; here they just exclude
+        id_query = select(Player.id).where(Player.weight > 0)
+        if stat != DEFAULT_STAT:
+            # 0 means the stat is unknown for that player
+            id_query = id_query.where(column > 0)
+        id_query = id_query.order_by(func.random()).limit(2)
         id_result = await session.execute(id_query)
         ids = id_result.scalars().all()
 
@@ -24,26 +78,180 @@ class GameService:
         players = result.scalars().all()
 
         return RandomPlayersResponse(
-            players=[GameService._to_player_out(p) for p in players]
+            players=[GameService._to_player_out(p, stat) for p in players],
+            stat=stat,
+        )
+
+
+    @staticmethod
+    async def get_random_pairs(
+        session: AsyncSession, count: int, stat: str = DEFAULT_STAT
+    ) -> PlayerPairsResponse:
+        catalog = get_catalog()
+        if catalog is None:
+            pairs = [
+                (await GameService.get_two_random_players(session, stat)).players
+                for _ in range(count)
+            ]
+            return PlayerPairsResponse(pairs=pairs, stat=stat)
+
+        players = catalog.players
+        return PlayerPairsResponse(
+            pairs=[
+                [players.player(left, stat), players.player(right, stat)]
+                for left, right in players.sample_pairs(count, stat)
+            ],
+            stat=stat,
+        )
+
+    @staticmethod
+    async def get_seeded_pair(session: AsyncSession, seed: int, stat: str = DEFAULT_STAT) -> CachedBody:
+        """The pair for `seed`: a pure function of the seed, stat and catalog version."""
+        catalog = get_catalog()
+        players = catalog.players if catalog is not None else await fallback_players(session)
+
+        def build() -> CachedBody:
+            rng = random.Random(f"pair:{seed}:{stat}:{players.version}")
+            ((left, right),) = players.sample_pairs(1, stat, rng)
+            response = RandomPlayersResponse(
+                players=[players.player(left, stat), players.player(right, stat)], stat=stat
+            )
+            return CachedBody.from_model(response, players.version)
+
+        return _seeded_pairs.get_or_build((seed, stat, players.version), build)
+
+    @staticmethod
+    async def set_player_weights(
+        session: AsyncSession, payload: PlayerWeightsUpdate
+    ) -> PlayerWeightsResponse:
+        """
+        Save new weights and publish the reloaded players in this worker.
+
+        The new players version is recorded under `WEIGHTS_SOURCE` in the same
+        transaction, so every other worker's `DatasetWatcher` reloads the same
+        rows on its next poll and all of them serve the same catalog version.
+        """
+        weights = {w.player_id: w.weight for w in payload.weights}
+
+        result = await session.execute(select(Player.id).where(Player.id.in_(weights)))
+        missing = sorted(set(weights) - set(result.scalars().all()))
+        if missing:
+            raise ValueError(f"Players not found: {', '.join(map(str, missing))}")
+        for player_id, weight in weights.items():
+            await session.execute(update(Player).where(Player.id == player_id).values(weight=weight))
+
+        players = await load_player_catalog(session)
+        stmt = sqlite_insert(DatasetVersion).values(source=WEIGHTS_SOURCE, digest=players.version)
+        stmt = stmt.on_conflict_do_update(index_elements=[DatasetVersion.source], set_={"digest": players.version})
+        await session.execute(stmt)
+        await session.commit()
+
+        catalog = get_catalog()
+        if catalog is None:
+            forget_fallback()
+        else:
+            set_catalog(catalog.with_players(players))
+        return PlayerWeightsResponse(
+            updated=len(weights),
+            version=players.version,
+            other_workers_within=DATASET_WATCH_INTERVAL or None,
         )
 
+    @staticmethod
+    async def search_players(
+        session: AsyncSession, query: str, limit: int = 10
+    ) -> PlayerSearchResponse:
+        catalog = get_catalog()
+        # Without a published catalog, search the shared fallback's index
+        players = catalog.players if catalog is not None else await fallback_players(session)
+        return PlayerSearchResponse(query=query, results=players.search(query, limit))
+
+    @staticmethod
+    async def verify_guesses(
+        session: AsyncSession, payload: GameBatchVerifyRequest
+    ) -> GameBatchVerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            players = catalog.players
+            left = [players.offset_of(r.player_left_id) for r in payload.rounds]
+            right = [players.offset_of(r.player_right_id) for r in payload.rounds]
+            if None in left or None in right:
+                raise ValueError("Players not found")
+            signs = players.compare(left, right, payload.stat)
+            column = players.stats[payload.stat]
+            results = [
+                VerifyResponse(
+                    correct=sign >= 0 if r.guess == "left" else sign <= 0,
+                    left_value=column[l],
+                    right_value=column[rt],
+                )
+                for r, sign, l, rt in zip(payload.rounds, signs, left, right)
+            ]
+        else:
+            column = getattr(Player, PLAYER_STATS[payload.stat])
+            ids = {i for r in payload.rounds for i in (r.player_left_id, r.player_right_id)}
+            result = await session.execute(select(Player.id, column).where(Player.id.in_(ids)))
+            values = dict(result.all())
+            results = [GameService._verify_values(r, values) for r in payload.rounds]
+
+        return GameBatchVerifyResponse(
+            results=results,
+            total_correct=sum(r.correct for r in results),
+            total=len(results),
+        )
 
     @staticmethod
     async def verify_guess(session: AsyncSession, payload: VerifyRequest) -> VerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return GameService._verify_in_catalog(catalog.players, payload)
+
+        column = getattr(Player, PLAYER_STATS[payload.stat])
         ids = [payload.player_left_id, payload.player_right_id]
-        result = await session.execute(select(Player).where(Player.id.in_(ids)))
-        players = {p.id: p for p in result.scalars().all()}
+        result = await session.execute(select(Player.id, column).where(Player.id.in_(ids)))
+        values = dict(result.all())
+
+        return GameService._verify_values(payload, values)
 
-        left = players.get(payload.player_left_id)
-        right = players.get(payload.player_right_id)
+    @staticmethod
+    async def verify_guess_readonly(db: ReadOnlyDatabase, payload: VerifyRequest) -> VerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return GameService._verify_in_catalog(catalog.players, payload)
+
+        # Column names come from the PLAYER_STATS whitelist, never from the client
+        rows = await db.fetchall(
+            f"SELECT id, {PLAYER_STATS[payload.stat]} FROM players WHERE id IN (?, ?)",
+            (payload.player_left_id, payload.player_right_id),
+        )
+
+        return GameService._verify_values(payload, dict(rows))
+
+    @staticmethod
+    def _verify_values(payload: VerifyRequest | GuessRound, values: dict[int, int]) -> VerifyResponse:
+        left_val = values.get(payload.player_left_id)
+        right_val = values.get(payload.player_right_id)
+
+        if left_val is None or right_val is None:
+            raise ValueError("Players not found")
+
+        return GameService.compare(payload.guess, int(left_val), int(right_val))
+
+    @staticmethod
+    def _verify_in_catalog(players: PlayerCatalog, payload: VerifyRequest) -> VerifyResponse:
+        left = players.offset_of(payload.player_left_id)
+        right = players.offset_of(payload.player_right_id)
 
         if left is None or right is None:
             raise ValueError("Players not found")
 
-        left_val = int(left.stat_value)
-        right_val = int(right.stat_value)
+        return GameService.compare(
+            payload.guess, players.value(left, payload.stat), players.value(right, payload.stat)
+        )
 
-        if payload.guess == "left":
+    @staticmethod
+    def compare(guess: str, left_val: int, right_val: int) -> VerifyResponse:
+        if guess == "left":
             correct = left_val >= right_val
         else:
             correct = right_val >= left_val
@@ -55,10 +263,10 @@ class GameService:
         )
 
     @staticmethod
-    def _to_player_out(player: Player) -> PlayerOut:
+    def _to_player_out(player: Player, stat: str = DEFAULT_STAT) -> PlayerOut:
         return PlayerOut(
             id=player.id,
             name=player.name,
             image_url=player.image_url,
-            stat_value=player.stat_value,
+            stat_value=getattr(player, PLAYER_STATS[stat]),
         )
@@ -0,0 +1,151 @@
+import logging
+import os
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.db import LeaderboardEntry
+from app.periodic import PeriodicTask
+from app.ranking import ScoreIndex
+from app.schema import (
+    LEADERBOARD_GAMES,
+    LeaderboardEntryOut,
+    LeaderboardRankResponse,
+    LeaderboardResponse,
+    LeaderboardSubmitRequest,
+    LeaderboardSubmitResponse,
+)
+from app.write_behind import WriteBehindQueue
+
+
+logger = logging.getLogger(__name__)
+
+# Seconds between pulls of the submissions other workers persisted
+LEADERBOARD_SYNC_INTERVAL = float(os.getenv("LEADERBOARD_SYNC_INTERVAL", "2"))
+
+
+class LeaderboardService:
+    """
+    Leaderboards served from memory.
+
+    Rankings live in one `ScoreIndex` per game; every submission is also
+    queued for batched persistence so the request path never writes to the DB.
+    Each worker has its own indexes, so a background task pulls the rows
+    persisted since the last pull (by any worker) into them. Replaying this
+    worker's own rows is a no-op, since only a better score changes a player.
+    Another worker's submissions show up here within roughly the flush plus
+    the sync interval.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        sync_interval: float = LEADERBOARD_SYNC_INTERVAL,
+    ) -> None:
+        self._session_maker = session_maker
+        self._indexes = {game: ScoreIndex() for game in LEADERBOARD_GAMES}
+        # Highest `leaderboard_entries.id` applied to the indexes
+        self._synced_id = 0
+        self.queue: WriteBehindQueue[dict] = WriteBehindQueue(
+            self._persist, batch_size=batch_size, interval=flush_interval
+        )
+        self._periodic = PeriodicTask(self.sync, sync_interval)
+
+    async def load(self) -> int:
+        """Rebuild the in-memory rankings from persisted submissions."""
+        query = (
+            select(LeaderboardEntry.game, LeaderboardEntry.player_name, func.max(LeaderboardEntry.score))
+            .group_by(LeaderboardEntry.game, LeaderboardEntry.player_name)
+            .order_by(func.min(LeaderboardEntry.id))
+        )
+        async with self._session_maker() as session:
+            synced_id = (await session.execute(select(func.max(LeaderboardEntry.id)))).scalar() or 0
+            rows = (await session.execute(query.where(LeaderboardEntry.id <= synced_id))).all()
+
+        self._synced_id = synced_id
+        self._indexes = {game: ScoreIndex() for game in LEADERBOARD_GAMES}
+        for game, player_name, score in rows:
+            if game in self._indexes:
+                self._indexes[game].submit(player_name, score)
+        return len(rows)
+
+    async def sync(self) -> int:
+        """Apply submissions persisted since the last load or sync; returns how many rows were read."""
+        query = (
+            select(LeaderboardEntry.id, LeaderboardEntry.game, LeaderboardEntry.player_name, LeaderboardEntry.score)
+            .where(LeaderboardEntry.id > self._synced_id)
+            .order_by(LeaderboardEntry.id)
+        )
+        async with self._session_maker() as session:
+            rows = (await session.execute(query)).all()
+
+        for entry_id, game, player_name, score in rows:
+            index = self._indexes.get(game)
+            if index is not None:
+                index.submit(player_name, score)
+            self._synced_id = entry_id
+        return len(rows)
+
+    def start(self) -> None:
+        self.queue.start()
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+        await self.queue.stop()
+
+    async def _persist(self, rows: list[dict]) -> None:
+        async with self._session_maker() as session:
+            await session.execute(insert(LeaderboardEntry), rows)
+            await session.commit()
+
+    def submit(self, payload: LeaderboardSubmitRequest) -> LeaderboardSubmitResponse:
+        index = self._indexes[payload.game]
+        player_name = payload.player_name.strip()
+        if not player_name:
+            raise ValueError("Player name must not be blank")
+
+        index.submit(player_name, payload.score)
+        self.queue.put({"game": payload.game, "player_name": player_name, "score": payload.score})
+
+        return LeaderboardSubmitResponse(
+            game=payload.game,
+            player_name=player_name,
+            rank=index.rank(player_name),
+            best_score=index.score(player_name),
+            total_players=len(index),
+        )
+
+    def top(self, game: str, limit: int = 10) -> LeaderboardResponse:
+        index = self._index(game)
+        return LeaderboardResponse(
+            game=game,
+            total_players=len(index),
+            entries=[
+                LeaderboardEntryOut(rank=rank, player_name=player, score=score)
+                for rank, player, score in index.top(limit)
+            ],
+        )
+
+    def rank(self, game: str, player_name: str) -> LeaderboardRankResponse:
+        index = self._index(game)
+        player_name = player_name.strip()
+        rank = index.rank(player_name)
+        if rank is None:
+            raise ValueError("Player not on the leaderboard")
+
+        return LeaderboardRankResponse(
+            game=game,
+            player_name=player_name,
+            rank=rank,
+            score=index.score(player_name),
+            total_players=len(index),
+        )
+
+    def _index(self, game: str) -> ScoreIndex:
+        index = self._indexes.get(game)
+        if index is None:
+            raise ValueError(f"Unknown game: {game}")
+        return index
@@ -1,28 +1,68 @@
+import asyncio
 import csv
+import itertools
+import os
+import re
+import sqlite3
 from pathlib import Path
+from typing import AsyncIterator, Iterator
 from urllib.parse import quote_plus
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db import Player
 
 
-async def import_players_from_csv(session: AsyncSession, csv_path: Path) -> None:
+DB_DIR = Path(__file__).resolve().parents[1] / "db"
+
+# Where players come from on a cold start: "csv" (players_source.csv) or
+# "sql" (the seed_players.sql dump, loaded through the raw driver).
+PLAYERS_SOURCE = os.getenv("PLAYERS_SOURCE", "csv").lower()
+PLAYERS_SOURCE_PATHS = {
+    "csv": DB_DIR / "players_source.csv",
+    "sql": DB_DIR / "seed_players.sql",
+}
+
+# Rows parsed per chunk when importing a CSV
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "500"))
+
+# Draw weight of players that only have the placeholder portrait
+DEFAULT_IMAGE_WEIGHT = float(os.getenv("DEFAULT_IMAGE_WEIGHT", "0.25"))
+DEFAULT_IMAGE_PATTERN = "%/default.jpg%"
+
+SQL_DUMP_INSERT = "INSERT INTO players (name, image_url, stat_value) VALUES"
+
+# Any players table spelling the dump uses (`players`, `players_1`, backticked
+# phpMyAdmin column names); the three columns are positional.
+_DUMP_INSERT = re.compile(r"INSERT\s+INTO\s+`?players(?:_\d+)?`?\s*\([^)]*\)\s*VALUES", re.IGNORECASE)
+# MySQL session/transaction statements that have no SQLite equivalent
+_DUMP_NOISE = re.compile(
+    r"^\s*(?:/\*!.*?\*/|COMMIT|START\s+TRANSACTION|BEGIN|SET\s+[^;]*|(?:UN)?LOCK\s+TABLES[^;]*)\s*;\s*$",
+    re.IGNORECASE | re.MULTILINE,
+)
+
+
+def _parse_int(value: str | None) -> int:
+    try:
+        return int((value or "0").strip())
+    except ValueError:
+        return 0
+
+
+def default_weight(image_url: str) -> float:
+    return DEFAULT_IMAGE_WEIGHT if "/default.jpg" in image_url else 1.0
+
+
+def iter_players_csv(csv_path: Path) -> Iterator[dict]:
     """
-    Import players from CSV.
+    Parse the players CSV into row dicts ready for insertion, one at a time.
 
     CSV format:
-    name,image_url,stat_value
+    name,image_url,stat_value[,goals,caps,age]
     """
 
-    if not csv_path.exists():
-        return
-
-    # Clear table for fresh import
-    await session.execute(Player.__table__.delete())
-
     with csv_path.open(newline="", encoding="utf-8") as f:
         reader = csv.DictReader(f)
-        players: list[Player] = []
 
         for row in reader:
             name = (row.get("name") or "").strip()
@@ -37,20 +77,160 @@ async def import_players_from_csv(session: AsyncSession, csv_path: Path) -> None
                 safe = quote_plus(name)
                 image_url = f"https://robohash.org/{safe}.png?set=set5&bgset=bg1"
 
-            # stat value
-            try:
-                stat_value = int((row.get("stat_value") or "0").strip())
-            except ValueError:
-                stat_value = 0
-
-            players.append(
-                Player(
-                    name=name,
-                    image_url=image_url,
-                    stat_value=stat_value,
-                )
-            )
-
-    if players:
-        session.add_all(players)
+            yield {
+                "name": name,
+                "image_url": image_url,
+                "stat_value": _parse_int(row.get("stat_value")),
+                # optional stats; 0 means unknown
+                "goals": _parse_int(row.get("goals")),
+                "caps": _parse_int(row.get("caps")),
+                "age": _parse_int(row.get("age")),
+                "weight": default_weight(image_url),
+            }
+
+
+def parse_players_csv(csv_path: Path) -> list[dict]:
+    return list(iter_players_csv(csv_path))
+
+
+async def stream_player_chunks(csv_path: Path, chunk_size: int = IMPORT_CHUNK_SIZE) -> AsyncIterator[list[dict]]:
+    """
+    Parse `csv_path` on a worker thread, yielding chunks of rows.
+
+    The next chunk is parsed while the caller writes the current one. The
+    event loop only ever waits on the thread, so a large import never stalls
+    requests for longer than a GIL switch interval.
+    """
+    rows = iter_players_csv(csv_path)
+
+    def next_chunk() -> list[dict]:
+        return list(itertools.islice(rows, chunk_size))
+
+    pending = asyncio.ensure_future(asyncio.to_thread(next_chunk))
+    try:
+        while chunk := await pending:
+            pending = asyncio.ensure_future(asyncio.to_thread(next_chunk))
+            yield chunk
+    finally:
+        # Let an abandoned parse finish before the file is closed
+        if not pending.done():
+            await asyncio.wait([pending])
+        rows.close()
+
+
+def players_source_path(source: str = PLAYERS_SOURCE) -> Path:
+    try:
+        return PLAYERS_SOURCE_PATHS[source]
+    except KeyError:
+        raise ValueError(f"Unknown players source: {source}") from None
+
+
+def normalize_sql_dump(text: str) -> tuple[str, int]:
+    """
+    Rewrite a MySQL-flavoured players dump into a SQLite script.
+
+    Returns the script and its number of INSERT statements. Raises ValueError
+    if anything other than inserts into `players` remains, so the script can
+    be trusted to run through `executescript`.
+    """
+    text = _DUMP_NOISE.sub("", text)
+    text = _DUMP_INSERT.sub(SQL_DUMP_INSERT, text)
+    # MySQL escapes quotes as \' ; SQLite doubles them
+    text = text.replace("\\'", "''")
+
+    statements: list[str] = []
+    pending = ""
+    for line in text.splitlines(keepends=True):
+        pending += line
+        # Only a line ending in ';' can complete a statement; avoids rescanning
+        if line.rstrip().endswith(";") and sqlite3.complete_statement(pending):
+            statement = pending.strip()
+            pending = ""
+            if not statement.startswith(SQL_DUMP_INSERT):
+                raise ValueError(f"Unexpected statement in SQL dump: {statement[:60]!r}")
+            statements.append(statement)
+    if pending.strip():
+        raise ValueError("SQL dump ends with an incomplete statement")
+    if not statements:
+        raise ValueError("SQL dump contains no player inserts")
+
+    return "\n".join(statements), len(statements)
+
+
+async def import_players_from_sql_dump(session: AsyncSession, sql_path: Path) -> int:
+    """
+    Import players from a SQL dump in a single transaction.
+
+    The dump is validated, then executed with the raw driver's
+    `executescript`, skipping per-row ORM work. Returns the row count.
+    """
+
+    if not sql_path.exists():
+        return 0
+
+    # Reading and validating a large dump is CPU work; keep it off the loop
+    script, _ = await asyncio.to_thread(lambda: normalize_sql_dump(sql_path.read_text(encoding="utf-8")))
+
+    conn = await session.connection()
+    if conn.dialect.name != "sqlite":
+        raise ValueError("SQL dump import requires a SQLite database")
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+
+    try:
+        # Left open so the result can be validated before it becomes visible
+        await driver.executescript(f"BEGIN;\nDELETE FROM players;\n{script}")
+        await driver.execute(
+            "UPDATE players SET weight = ? WHERE image_url LIKE ?",
+            (DEFAULT_IMAGE_WEIGHT, DEFAULT_IMAGE_PATTERN),
+        )
+        async with driver.execute("SELECT COUNT(*), SUM(TRIM(name) = '') FROM players") as cursor:
+            count, blank = await cursor.fetchone()
+        if not count:
+            raise ValueError("SQL dump loaded no players")
+        if blank:
+            raise ValueError(f"SQL dump contains {blank} players without a name")
+        await driver.commit()
+    except Exception:
+        await driver.rollback()
+        raise
+
+    return count
+
+
+async def import_players(session: AsyncSession, path: Path) -> int:
+    """Import players from a CSV file or a `.sql` dump, by file extension."""
+    if path.suffix == ".sql":
+        return await import_players_from_sql_dump(session, path)
+    return await import_players_from_csv(session, path)
+
+
+async def import_players_from_csv(session: AsyncSession, csv_path: Path) -> int:
+    """
+    Import players from CSV in a single transaction.
+
+    Rows are parsed off the event loop (`stream_player_chunks`) and each
+    chunk is written with one executemany while the next is parsed.
+
+    CSV format (see `iter_players_csv`):
+    name,image_url,stat_value[,goals,caps,age]
+    """
+
+    if not csv_path.exists():
+        return 0
+
+    # Clear table for fresh import
+    await session.execute(Player.__table__.delete())
+
+    count = 0
+    try:
+        async for chunk in stream_player_chunks(csv_path):
+            await session.execute(insert(Player), chunk)
+            count += len(chunk)
+    except Exception:
+        await session.rollback()
+        raise
+
+    if count:
         await session.commit()
+    return count
@@ -0,0 +1,175 @@
+import logging
+import os
+import random
+
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.catalog import QuestionCatalog, get_catalog
+from app.db import QuestionRating
+from app.periodic import PeriodicTask
+from app.ranking import RatingIndex
+from app.schema import QuestionOut
+
+
+logger = logging.getLogger(__name__)
+
+# Starting ratings of questions that have never been rated, by difficulty
+INITIAL_RATINGS = {"easy": 1200.0, "medium": 1500.0, "hard": 1800.0}
+DEFAULT_RATING = 1500.0
+
+RATING_K_PLAYER = float(os.getenv("RATING_K_PLAYER", "32"))
+RATING_K_QUESTION = float(os.getenv("RATING_K_QUESTION", "16"))
+# Candidates on each side of the player's rating for the next question
+RATING_WINDOW = int(os.getenv("RATING_WINDOW", "10"))
+RATINGS_FLUSH_INTERVAL = float(os.getenv("RATINGS_FLUSH_INTERVAL", "10"))
+
+
+def expected_score(rating: float, opponent: float) -> float:
+    return 1.0 / (1.0 + 10 ** ((opponent - rating) / 400.0))
+
+
+class QuestionRatings:
+    """
+    Elo ratings of trivia questions, held in a `RatingIndex`.
+
+    A graded answer is a game between the player (session) and the question.
+    Both ratings move in memory, in O(log n). The change of each question is
+    accumulated and added to `question_ratings` in batches by a background
+    task, so workers sharing the table add up their updates; each flush also
+    picks up the stored totals of the questions it wrote.
+    The index follows the in-memory catalog: questions added by a reload
+    start from their difficulty's rating, and removed ones are dropped.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        interval: float = RATINGS_FLUSH_INTERVAL,
+    ) -> None:
+        self._session_maker = session_maker
+        self._index = RatingIndex()
+        self._stored: dict[int, float] = {}
+        self._version: str | None = None
+        # Rating change of each question since the last flush
+        self._deltas: dict[int, float] = {}
+        self._periodic = PeriodicTask(self.flush, interval)
+
+    async def load(self) -> int:
+        """Read persisted ratings; they are applied on the next sync with the catalog."""
+        async with self._session_maker() as session:
+            result = await session.execute(select(QuestionRating.question_id, QuestionRating.rating))
+            self._stored = dict(result.all())
+        self._version = None
+        return len(self._stored)
+
+    def _sync(self, questions: QuestionCatalog) -> None:
+        if questions.version == self._version:
+            return
+        for question_id in [q for q in self._index if q not in questions.by_id]:
+            self._index.remove(question_id)
+        for question in questions.questions:
+            if question.id not in self._index:
+                rating = self._stored.get(question.id)
+                if rating is None:
+                    rating = INITIAL_RATINGS.get(question.difficulty.lower(), DEFAULT_RATING)
+                self._index.set(question.id, rating)
+        self._version = questions.version
+
+    def _questions(self) -> QuestionCatalog | None:
+        catalog = get_catalog()
+        if catalog is None:
+            return None
+        self._sync(catalog.questions)
+        return catalog.questions
+
+    def rating(self, question_id: int) -> float | None:
+        if self._questions() is None:
+            return None
+        return self._index.rating(question_id)
+
+    def record(self, question_id: int, correct: bool, player_rating: float = DEFAULT_RATING) -> float:
+        """Update the question's rating for one answer; returns the player's new rating."""
+        if self._questions() is None:
+            return player_rating
+        question_rating = self._index.rating(question_id)
+        if question_rating is None:
+            return player_rating
+
+        surprise = (1.0 if correct else 0.0) - expected_score(player_rating, question_rating)
+        change = -RATING_K_QUESTION * surprise
+        self._index.set(question_id, question_rating + change)
+        self._deltas[question_id] = self._deltas.get(question_id, 0.0) + change
+        return player_rating + RATING_K_PLAYER * surprise
+
+    def pick(
+        self,
+        rating: float,
+        exclude_ids: set[int] | None = None,
+        rng: random.Random | None = None,
+    ) -> QuestionOut | None:
+        """A question rated near `rating`, or None if none is found quickly."""
+        questions = self._questions()
+        if questions is None:
+            return None
+        excluded = exclude_ids or set()
+        for _ in range(8):
+            question_id = self._index.near(rating, RATING_WINDOW, rng)
+            if question_id is None:
+                return None
+            if question_id not in excluded:
+                return questions.by_id[question_id]
+        return None
+
+    async def flush(self) -> int:
+        """Add the rating changes since the last flush to `question_ratings`; returns how many."""
+        deltas, self._deltas = self._deltas, {}
+        rows = [
+            {"question_id": q, "rating": rating, "delta": delta}
+            for q, delta in deltas.items()
+            if (rating := self._index.rating(q)) is not None
+        ]
+        if not rows:
+            return 0
+
+        # Each worker adds its own changes to the stored rating instead of
+        # overwriting the others'; a question rated for the first time is inserted as is
+        stmt = sqlite_insert(QuestionRating)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[QuestionRating.question_id],
+            set_={"rating": QuestionRating.rating + bindparam("delta")},
+        )
+        flushed = select(QuestionRating.question_id, QuestionRating.rating).where(
+            QuestionRating.question_id.in_([row["question_id"] for row in rows])
+        )
+        try:
+            async with self._session_maker() as session:
+                await session.execute(stmt, rows)
+                stored = dict((await session.execute(flushed)).all())
+                await session.commit()
+        except Exception as e:
+            logger.error(f"Rating flush failed, keeping {len(rows)} questions: {e}")
+            self._keep(deltas)
+            return 0
+        except BaseException:
+            # Cancelled mid-write: the changes are still in the index, just keep them pending
+            self._keep(deltas)
+            raise
+        self._stored.update(stored)
+        # Pick up the other workers' changes, on top of any recorded during the write
+        for question_id, rating in stored.items():
+            if question_id in self._index:
+                self._index.set(question_id, rating + self._deltas.get(question_id, 0.0))
+        return len(rows)
+
+    def _keep(self, deltas: dict[int, float]) -> None:
+        for question_id, delta in deltas.items():
+            self._deltas[question_id] = self._deltas.get(question_id, 0.0) + delta
+
+    def start(self) -> None:
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+        await self.flush()
@@ -3,15 +3,25 @@ import random
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.catalog import QuestionCatalog, fallback_questions, get_catalog
 from app.db import Question
+from app.db_readonly import ReadOnlyDatabase
+from app.http_cache import CachedBody, ResponseCache
 from app.schema import (
     CountResponse,
     QuestionOut,
     RandomQuestionResponse,
     RandomQuestionsResponse,
+    TriviaAnswerResult,
+    TriviaBatchVerifyRequest,
+    TriviaBatchVerifyResponse,
     TriviaVerifyRequest,
     TriviaVerifyResponse,
 )
+from app.services.rating_services import QuestionRatings
+
+
+_seeded_decks = ResponseCache(max_entries=4096)
 
 
 class TriviaService:
@@ -20,6 +30,12 @@ class TriviaService:
         session: AsyncSession,
         exclude_ids: list[int] | None = None,
     ) -> RandomQuestionResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return RandomQuestionResponse(
+                question=TriviaService._pick_question(catalog.questions, exclude_ids)
+            )
+
         query = select(Question)
         if exclude_ids:
             query = query.where(~Question.id.in_(exclude_ids))
@@ -34,11 +50,33 @@ class TriviaService:
             question=TriviaService._to_question_out(question)
         )
 
+    @staticmethod
+    async def get_adaptive_question(
+        session: AsyncSession,
+        ratings: QuestionRatings,
+        rating: float,
+        exclude_ids: list[int] | None = None,
+    ) -> RandomQuestionResponse:
+        """A question rated near `rating`; falls back to a random one."""
+        question = ratings.pick(rating, set(exclude_ids or ()))
+        if question is not None:
+            return RandomQuestionResponse(question=question)
+        return await TriviaService.get_random_question(session, exclude_ids)
+
     @staticmethod
     async def get_random_questions(
         session: AsyncSession,
         limit: int = 20,
     ) -> RandomQuestionsResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            questions = catalog.questions.questions
+            if not questions:
+                raise ValueError("No questions in the database")
+            return RandomQuestionsResponse(
+                questions=random.sample(questions, min(limit, len(questions)))
+            )
+
         query = select(Question).order_by(func.random()).limit(limit)
         result = await session.execute(query)
         questions = result.scalars().all()
@@ -50,28 +88,139 @@ class TriviaService:
             questions=[TriviaService._to_question_out(q) for q in questions]
         )
 
+    @staticmethod
+    async def get_seeded_deck(session: AsyncSession, seed: int, limit: int = 20) -> CachedBody:
+        """The deck for `seed`: a pure function of the seed, size and catalog version."""
+        catalog = get_catalog()
+        questions = catalog.questions if catalog is not None else await fallback_questions(session)
+        if not questions.questions:
+            raise ValueError("No questions in the database")
+
+        def build() -> CachedBody:
+            rng = random.Random(f"deck:{seed}:{limit}:{questions.version}")
+            pool = questions.questions
+            response = RandomQuestionsResponse(questions=rng.sample(pool, min(limit, len(pool))))
+            return CachedBody.from_model(response, questions.version)
+
+        return _seeded_decks.get_or_build((seed, limit, questions.version), build)
+
     @staticmethod
     async def get_question_count(session: AsyncSession) -> CountResponse:
-        result = await session.execute(select(func.count()).select_from(Question))
-        total = result.scalar_one()
+        catalog = get_catalog()
+        if catalog is not None:
+            total = len(catalog.questions)
+        else:
+            result = await session.execute(select(func.count()).select_from(Question))
+            total = result.scalar_one()
         game_limit = 20
         return CountResponse(total_questions=min(total, game_limit))
 
     @staticmethod
     async def verify_answer(session: AsyncSession, payload: TriviaVerifyRequest) -> TriviaVerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return TriviaService._grade_answer(payload, catalog.questions.answers.get(payload.question_id))
+
         result = await session.execute(select(Question).where(Question.id == payload.question_id))
         question = result.scalar()
 
-        if question is None:
+        return TriviaService._grade_answer(payload, question.correct_answer if question else None)
+
+    @staticmethod
+    async def verify_answer_readonly(
+        db: ReadOnlyDatabase, payload: TriviaVerifyRequest
+    ) -> TriviaVerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return TriviaService._grade_answer(payload, catalog.questions.answers.get(payload.question_id))
+
+        row = await db.fetchone(
+            "SELECT correct_answer FROM questions WHERE id = ?", (payload.question_id,)
+        )
+
+        return TriviaService._grade_answer(payload, row[0] if row else None)
+
+    @staticmethod
+    def _grade_answer(payload: TriviaVerifyRequest, correct_answer: str | None) -> TriviaVerifyResponse:
+        if correct_answer is None:
             raise ValueError("Question not found")
 
-        correct = payload.selected_answer.upper() == question.correct_answer
+        correct = payload.selected_answer.upper() == correct_answer
 
         return TriviaVerifyResponse(
             correct=correct,
-            correct_answer=question.correct_answer,
-            explanation=f"The correct answer is {question.correct_answer}."
+            correct_answer=correct_answer,
+            explanation=f"The correct answer is {correct_answer}."
+        )
+
+    @staticmethod
+    async def verify_answers(
+        session: AsyncSession, payload: TriviaBatchVerifyRequest
+    ) -> TriviaBatchVerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return TriviaService._grade_answers(payload, catalog.questions.answers)
+
+        ids = {answer.question_id for answer in payload.answers}
+        result = await session.execute(
+            select(Question.id, Question.correct_answer).where(Question.id.in_(ids))
+        )
+        return TriviaService._grade_answers(payload, dict(result.all()))
+
+    @staticmethod
+    async def verify_answers_readonly(
+        db: ReadOnlyDatabase, payload: TriviaBatchVerifyRequest
+    ) -> TriviaBatchVerifyResponse:
+        catalog = get_catalog()
+        if catalog is not None:
+            return TriviaService._grade_answers(payload, catalog.questions.answers)
+
+        ids = sorted({answer.question_id for answer in payload.answers})
+        placeholders = ", ".join("?" for _ in ids)
+        rows = await db.fetchall(
+            f"SELECT id, correct_answer FROM questions WHERE id IN ({placeholders})", ids
         )
+        return TriviaService._grade_answers(payload, dict(rows))
+
+    @staticmethod
+    def _grade_answers(
+        payload: TriviaBatchVerifyRequest, answers: dict[int, str]
+    ) -> TriviaBatchVerifyResponse:
+        missing = sorted({a.question_id for a in payload.answers} - answers.keys())
+        if missing:
+            raise ValueError(f"Questions not found: {', '.join(map(str, missing))}")
+
+        results = [
+            TriviaAnswerResult(
+                question_id=answer.question_id,
+                correct=answer.selected_answer.upper() == answers[answer.question_id],
+                correct_answer=answers[answer.question_id],
+            )
+            for answer in payload.answers
+        ]
+
+        return TriviaBatchVerifyResponse(
+            results=results,
+            total_correct=sum(r.correct for r in results),
+            total=len(results),
+        )
+
+    @staticmethod
+    def _pick_question(questions: QuestionCatalog, exclude_ids: list[int] | None) -> QuestionOut:
+        pool = questions.questions
+        excluded = set(exclude_ids or ())
+
+        # Random probing is O(1) while most of the deck is still available
+        if pool and len(excluded) < len(pool) // 2:
+            for _ in range(8):
+                question = random.choice(pool)
+                if question.id not in excluded:
+                    return question
+
+        remaining = [q for q in pool if q.id not in excluded]
+        if not remaining:
+            raise ValueError("No questions in the database")
+        return random.choice(remaining)
 
     @staticmethod
     def _to_question_out(question: Question) -> QuestionOut:
@@ -0,0 +1,314 @@
+"""
+Server-side game sessions.
+
+`SessionStore` holds per-game progress (deck cursor, streak, seen IDs) keyed by
+an opaque session id. Two backends are provided:
+
+- `MemorySessionStore`: in-process, bounded by `max_sessions` with LRU eviction
+  and a sliding TTL. Since every access refreshes the TTL, LRU order is also
+  expiry order, so expired sessions are swept from the front in O(1) each.
+- `SqliteSessionStore`: durable, stores the state as JSON in `game_sessions`.
+  Reads never write: the TTL is refreshed by `save`, which every state change
+  already goes through, so a draw costs one read and one upsert. Expired rows
+  are deleted by `purge_expired`, at startup and every `SESSION_PURGE_INTERVAL`.
+
+Memory sessions are only visible to the process that created them, so with
+several workers (and no sticky routing) the default picks the shared table.
+
+Configuration:
+    SESSION_BACKEND      auto (default: sqlite if WEB_CONCURRENCY > 1, else memory) | memory | sqlite
+    SESSION_TTL_SECONDS  idle lifetime of a session (default 1800)
+    SESSION_MAX          cap on in-memory sessions (default 200000)
+    SESSION_PURGE_INTERVAL  seconds between sweeps of expired sqlite sessions (default 300, 0 disables)
+    SEEN_PLAYERS_BITS    cap on the per-session seen-player bitset (default 8192)
+"""
+
+import base64
+import json
+import os
+import secrets
+import time
+from abc import ABC, abstractmethod
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from .db import GameSession, state_session_maker
+from .periodic import PeriodicTask
+
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "auto").lower()
+SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "1800"))
+SESSION_MAX = int(os.getenv("SESSION_MAX", "200000"))
+SESSION_PURGE_INTERVAL = float(os.getenv("SESSION_PURGE_INTERVAL", "300"))
+
+# Seen IDs kept per session; the oldest are forgotten beyond this.
+MAX_SEEN_IDS = 256
+
+# Bits in a session's seen-player set (1 KiB by default). Larger catalogs fold
+# offsets onto it, which only makes some unseen players look seen. With the
+# seen IDs a full session is about 3.4 KB, ~700 MB at SESSION_MAX.
+SEEN_PLAYERS_BITS = int(os.getenv("SEEN_PLAYERS_BITS", "8192"))
+
+
+@dataclass(slots=True)
+class SeenPlayers:
+    """
+    Players (catalog offsets) already shown to a session, as a bitset.
+
+    Offsets only mean something for one catalog version, so the set is tied
+    to it and starts over when the catalog changes.
+    """
+
+    version: str
+    bits: bytearray
+    count: int = 0
+
+    @classmethod
+    def empty(cls, version: str, players: int) -> "SeenPlayers":
+        size = max(1, min(players, SEEN_PLAYERS_BITS))
+        return cls(version=version, bits=bytearray((size + 7) // 8))
+
+    @property
+    def capacity(self) -> int:
+        return len(self.bits) * 8
+
+    def __contains__(self, offset: int) -> bool:
+        i = offset % self.capacity
+        return bool(self.bits[i >> 3] & (1 << (i & 7)))
+
+    def add(self, offset: int) -> None:
+        i = offset % self.capacity
+        mask = 1 << (i & 7)
+        if not self.bits[i >> 3] & mask:
+            self.bits[i >> 3] |= mask
+            self.count += 1
+
+    def clear(self) -> None:
+        self.bits[:] = bytes(len(self.bits))
+        self.count = 0
+
+    def to_dict(self) -> dict:
+        return {
+            "version": self.version,
+            "bits": base64.b64encode(self.bits).decode("ascii"),
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SeenPlayers":
+        return cls(
+            version=data["version"],
+            bits=bytearray(base64.b64decode(data["bits"])),
+            count=data["count"],
+        )
+
+
+@dataclass(slots=True)
+class GameState:
+    game: str
+    cursor: int = 0
+    streak: int = 0
+    best_streak: int = 0
+    score: int = 0
+    seen_ids: array = field(default_factory=lambda: array("q"))
+    seen_players: SeenPlayers | None = None
+    # Elo rating of the player in this session (trivia)
+    rating: float = 1500.0
+
+    def record_answer(self, correct: bool, item_id: int | None = None) -> None:
+        self.cursor += 1
+        if correct:
+            self.score += 1
+            self.streak += 1
+            self.best_streak = max(self.best_streak, self.streak)
+        else:
+            self.streak = 0
+        if item_id is not None:
+            self.mark_seen(item_id)
+
+    def mark_seen(self, item_id: int) -> None:
+        if item_id in self.seen_ids:
+            return
+        self.seen_ids.append(item_id)
+        if len(self.seen_ids) > MAX_SEEN_IDS:
+            del self.seen_ids[: len(self.seen_ids) - MAX_SEEN_IDS]
+
+    def seen_players_for(self, version: str, players: int) -> SeenPlayers:
+        """The seen-player set for this catalog version, reset if it is stale."""
+        if self.seen_players is None or self.seen_players.version != version:
+            self.seen_players = SeenPlayers.empty(version, players)
+        return self.seen_players
+
+    def to_dict(self) -> dict:
+        data = {
+            "game": self.game,
+            "cursor": self.cursor,
+            "streak": self.streak,
+            "best_streak": self.best_streak,
+            "score": self.score,
+            "seen_ids": self.seen_ids.tolist(),
+            "rating": self.rating,
+        }
+        if self.seen_players is not None:
+            data["seen_players"] = self.seen_players.to_dict()
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "GameState":
+        return cls(
+            game=data["game"],
+            cursor=data.get("cursor", 0),
+            streak=data.get("streak", 0),
+            best_streak=data.get("best_streak", 0),
+            score=data.get("score", 0),
+            seen_ids=array("q", data.get("seen_ids", [])),
+            seen_players=SeenPlayers.from_dict(data["seen_players"]) if data.get("seen_players") else None,
+            rating=data.get("rating", 1500.0),
+        )
+
+
+class SessionStore(ABC):
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS) -> None:
+        self.ttl = ttl
+
+    async def create(self, game: str) -> tuple[str, GameState]:
+        session_id = secrets.token_urlsafe(16)
+        state = GameState(game=game)
+        await self.save(session_id, state)
+        return session_id, state
+
+    @abstractmethod
+    async def get(self, session_id: str) -> GameState | None:
+        """Return the live state for `session_id`, or None if it expired."""
+
+    @abstractmethod
+    async def save(self, session_id: str, state: GameState) -> None:
+        """Store `state` and refresh its TTL."""
+
+    @abstractmethod
+    async def delete(self, session_id: str) -> None:
+        """Forget `session_id`."""
+
+    def start(self) -> None:
+        """Start background upkeep, if the backend needs any."""
+
+    async def stop(self) -> None:
+        """Stop background upkeep."""
+
+
+class MemorySessionStore(SessionStore):
+    def __init__(self, ttl: float = SESSION_TTL_SECONDS, max_sessions: int = SESSION_MAX) -> None:
+        super().__init__(ttl)
+        self.max_sessions = max_sessions
+        # session_id -> (expires_at, state), least recently used first
+        self._sessions: OrderedDict[str, tuple[float, GameState]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _sweep(self, now: float) -> None:
+        while self._sessions:
+            session_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now:
+                break
+            del self._sessions[session_id]
+
+    async def get(self, session_id: str) -> GameState | None:
+        now = time.monotonic()
+        self._sweep(now)
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        state = entry[1]
+        self._sessions[session_id] = (now + self.ttl, state)
+        self._sessions.move_to_end(session_id)
+        return state
+
+    async def save(self, session_id: str, state: GameState) -> None:
+        now = time.monotonic()
+        self._sweep(now)
+        self._sessions[session_id] = (now + self.ttl, state)
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+
+class SqliteSessionStore(SessionStore):
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        ttl: float = SESSION_TTL_SECONDS,
+        purge_interval: float = SESSION_PURGE_INTERVAL,
+    ) -> None:
+        super().__init__(ttl)
+        self._session_maker = session_maker
+        self._periodic = PeriodicTask(self.purge_expired, purge_interval)
+
+    async def get(self, session_id: str) -> GameState | None:
+        async with self._session_maker() as session:
+            row = (
+                await session.execute(select(GameSession).where(GameSession.id == session_id))
+            ).scalar()
+            if row is None or row.expires_at <= time.time():
+                return None
+            return GameState.from_dict(json.loads(row.state))
+
+    async def save(self, session_id: str, state: GameState) -> None:
+        values = {
+            "id": session_id,
+            "state": json.dumps(state.to_dict(), separators=(",", ":")),
+            "expires_at": time.time() + self.ttl,
+        }
+        stmt = sqlite_insert(GameSession).values(values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GameSession.id],
+            set_={"state": stmt.excluded.state, "expires_at": stmt.excluded.expires_at},
+        )
+        async with self._session_maker() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    async def delete(self, session_id: str) -> None:
+        async with self._session_maker() as session:
+            await session.execute(delete(GameSession).where(GameSession.id == session_id))
+            await session.commit()
+
+    async def purge_expired(self) -> int:
+        async with self._session_maker() as session:
+            result = await session.execute(delete(GameSession).where(GameSession.expires_at <= time.time()))
+            await session.commit()
+            return result.rowcount or 0
+
+    def start(self) -> None:
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+
+
+def worker_count() -> int:
+    """Server processes sharing the database, as announced by `WEB_CONCURRENCY`."""
+    return int(os.getenv("WEB_CONCURRENCY") or 1)
+
+
+def session_backend(backend: str = SESSION_BACKEND, workers: int | None = None) -> str:
+    if backend == "auto":
+        return "sqlite" if (workers or worker_count()) > 1 else "memory"
+    return backend
+
+
+def create_session_store(backend: str = SESSION_BACKEND) -> SessionStore:
+    backend = session_backend(backend)
+    if backend == "sqlite":
+        return SqliteSessionStore(state_session_maker)
+    if backend == "memory":
+        return MemorySessionStore()
+    raise ValueError(f"Unknown session backend: {backend}")
@@ -0,0 +1,84 @@
+"""
+Write-behind buffering for mutable game data.
+
+Request handlers update in-memory state and `put()` rows here; a background
+task hands them to an async `flush` callable in batches, either when
+`batch_size` rows are pending or every `interval` seconds. A batch whose
+write fails or is cancelled goes back to the front of the queue. Past
+`max_pending` rows the oldest are dropped; `dropped` counts them and the
+first drop of each overflow is logged.
+"""
+
+import logging
+from typing import Awaitable, Callable, Generic, TypeVar
+
+from .periodic import PeriodicTask
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WriteBehindQueue(Generic[T]):
+    def __init__(
+        self,
+        flush: Callable[[list[T]], Awaitable[None]],
+        batch_size: int = 500,
+        interval: float = 1.0,
+        max_pending: int = 100_000,
+    ) -> None:
+        self._flush = flush
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._pending: list[T] = []
+        # Rows discarded because the queue was full, since startup
+        self.dropped = 0
+        self._overflowing = False
+        self._periodic = PeriodicTask(self.flush, interval)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, item: T) -> None:
+        self._pending.append(item)
+        if len(self._pending) > self.max_pending:
+            # Persistence is falling behind; drop the oldest rows rather than grow unbounded
+            overflow = len(self._pending) - self.max_pending
+            del self._pending[:overflow]
+            if not self._overflowing:
+                self._overflowing = True
+                logger.error(f"Write-behind queue full ({self.max_pending} rows), dropping the oldest")
+            self.dropped += overflow
+        if len(self._pending) >= self.batch_size:
+            self._periodic.wake()
+
+    async def flush(self) -> int:
+        """Write everything pending now; returns the number of rows written."""
+        written = 0
+        while self._pending:
+            batch = self._pending[: self.batch_size]
+            del self._pending[: len(batch)]
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                logger.error(f"Write-behind flush failed, requeueing {len(batch)} rows: {e}")
+                self._pending[:0] = batch
+                break
+            except BaseException:
+                # Cancelled mid-write: keep the rows for the next flush
+                self._pending[:0] = batch
+                raise
+            written += len(batch)
+        if self._overflowing and not self._pending:
+            # Fully drained: a later overflow is logged again
+            self._overflowing = False
+            logger.warning(f"Write-behind queue drained; {self.dropped} rows dropped since startup")
+        return written
+
+    def start(self) -> None:
+        self._periodic.start()
+
+    async def stop(self) -> None:
+        await self._periodic.stop()
+        await self.flush()
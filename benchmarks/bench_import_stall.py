@@ -0,0 +1,79 @@
+"""
+Event-loop stalls during a large CSV player import.
+
+A ticker task sleeps 1 ms in a loop and records how late it wakes up, while
+the import runs. "inline parse" parses the whole file on the event loop
+before writing (the old importer); "streamed" is `import_players_from_csv`,
+which parses chunks on a worker thread.
+
+Usage:
+    python -m benchmarks.bench_import_stall [players]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.datagen import PLAYER_FIELDS, generate_players, write_csv
+from app.db import Base, Player
+from app.services.player_importer import import_players_from_csv, parse_players_csv
+
+
+async def inline_import(session: AsyncSession, csv_path: Path) -> int:
+    await session.execute(Player.__table__.delete())
+    rows = parse_players_csv(csv_path)
+    await session.execute(insert(Player), rows)
+    await session.commit()
+    return len(rows)
+
+
+async def ticker(lags: list[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - start - 0.001)
+
+
+async def bench(label: str, importer, csv_path: Path, tmp: str) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/{label.replace(' ', '_')}.db")
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    lags: list[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    try:
+        async with Session() as session:
+            start = time.perf_counter()
+            rows = await importer(session, csv_path)
+            elapsed = time.perf_counter() - start
+    finally:
+        stop.set()
+        await tick
+        await engine.dispose()
+
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99)] if lags else 0.0
+    print(
+        f"{label:<14} {rows} rows in {elapsed:6.2f} s   "
+        f"loop lag max {max(lags, default=0) * 1000:8.1f} ms  p99 {p99 * 1000:6.1f} ms"
+    )
+
+
+async def main(players: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "players.csv"
+        with csv_path.open("w", newline="", encoding="utf-8") as out:
+            write_csv(generate_players(players), PLAYER_FIELDS, out)
+        await bench("inline parse", inline_import, csv_path, tmp)
+        await bench("streamed", import_players_from_csv, csv_path, tmp)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000))
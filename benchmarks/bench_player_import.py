@@ -0,0 +1,54 @@
+"""
+Cold-start player import: players_source.csv parsed on a worker thread and
+written in executemany chunks, versus seed_players.sql through the raw
+driver's `executescript`.
+
+Usage:
+    python -m benchmarks.bench_player_import [repeats]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import Base
+from app.services.player_importer import (
+    PLAYERS_SOURCE_PATHS,
+    import_players_from_csv,
+    import_players_from_sql_dump,
+)
+
+
+async def bench(label: str, importer, path: Path, repeats: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/bench.db")
+        Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        timings = []
+        rows = 0
+        try:
+            for _ in range(repeats):
+                async with Session() as session:
+                    start = time.perf_counter()
+                    rows = await importer(session, path)
+                    timings.append(time.perf_counter() - start)
+        finally:
+            await engine.dispose()
+
+    best = min(timings)
+    print(f"{label:<10} {rows:>6} rows  {best * 1000:8.1f} ms  ({rows / best:,.0f} rows/s)")
+
+
+async def main(repeats: int) -> None:
+    await bench("csv (streamed)", import_players_from_csv, PLAYERS_SOURCE_PATHS["csv"], repeats)
+    await bench("sql dump", import_players_from_sql_dump, PLAYERS_SOURCE_PATHS["sql"], repeats)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5))
@@ -0,0 +1,116 @@
+"""
+Measure per-worker memory under gunicorn with and without PRELOAD_APP.
+
+Builds a read-only snapshot with a synthetic catalog, starts gunicorn once
+per mode, and reads each worker's /proc/<pid>/smaps_rollup. "private" is
+memory only that worker holds (Private_Clean + Private_Dirty); "pss" charges
+shared pages proportionally. Preloading should move the catalog from private
+to shared memory. Linux only.
+
+Usage:
+    python -m benchmarks.bench_preload_rss [players] [workers]
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+from app.db_snapshot import build_snapshot
+
+
+ROOT = Path(__file__).resolve().parents[1]
+PORT = 8765
+
+
+def write_players_csv(path: Path, players: int) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write("name,image_url,stat_value,goals,caps,age\n")
+        for i in range(players):
+            stats = f"{i * 7919 % 10**8},{i % 900},{i % 150},{18 + i % 20}"
+            f.write(f"Player {i:07d},https://example.com/players/{i}.jpg,{stats}\n")
+
+
+def smaps_kib(pid: int) -> dict[str, int]:
+    values = {}
+    for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines()[1:]:
+        key, _, rest = line.partition(":")
+        values[key] = int(rest.split()[0])
+    return values
+
+
+def worker_pids(master: int) -> list[int]:
+    children = Path(f"/proc/{master}/task/{master}/children").read_text().split()
+    return [int(pid) for pid in children]
+
+
+def wait_until_serving(workers: int, master: int, timeout: float = 120.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{PORT}/health", timeout=1):
+                pass
+            if len(worker_pids(master)) >= workers:
+                # Let the remaining workers finish their lifespan
+                time.sleep(3)
+                return
+        except OSError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError("gunicorn did not start")
+
+
+def measure(snapshot: Path, state_db: Path, workers: int, preload: bool) -> None:
+    env = dict(
+        os.environ,
+        DATABASE_SNAPSHOT=str(snapshot),
+        # Leaderboards, sessions, ... go to a scratch file, not the repo's test.db
+        DATABASE_URL=f"sqlite+aiosqlite:///{state_db}",
+        PRELOAD_APP="1" if preload else "0",
+        WEB_CONCURRENCY=str(workers),
+        BIND=f"127.0.0.1:{PORT}",
+        DATASET_WATCH_INTERVAL="0",
+    )
+    env.pop("CATALOG_FILE", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app.app:app", "--log-level", "warning"],
+        cwd=ROOT,
+        env=env,
+    )
+    try:
+        wait_until_serving(workers, proc.pid)
+        rows = [smaps_kib(pid) for pid in worker_pids(proc.pid)]
+    finally:
+        proc.send_signal(signal.SIGTERM)
+        proc.wait(timeout=30)
+
+    private = [r["Private_Clean"] + r["Private_Dirty"] for r in rows]
+    pss = [r["Pss"] for r in rows]
+    label = "preload + freeze" if preload else "per-worker lifespan"
+    print(
+        f"{label:<20} {len(rows)} workers: private {sum(private) / len(rows) / 1024:7.1f} MiB/worker, "
+        f"pss {sum(pss) / len(rows) / 1024:7.1f} MiB/worker, rss {rows[0]['Rss'] / 1024:7.1f} MiB"
+    )
+
+
+def main(players: int, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        source = Path(tmp) / "players.csv"
+        write_players_csv(source, players)
+        snapshot = Path(tmp) / "catalog.db"
+        build_snapshot(snapshot, csv_path=source)
+        print(f"{players:,} players, {workers} workers")
+        state_db = Path(tmp) / "state.db"
+        measure(snapshot, state_db, workers, preload=False)
+        measure(snapshot, state_db, workers, preload=True)
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 200_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 4,
+    )
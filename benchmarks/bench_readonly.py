@@ -0,0 +1,64 @@
+"""
+Compare trivia answer verification through `async_session_maker` (aiosqlite)
+against the direct read-only sqlite3 layer in inline and thread-pool modes.
+
+Usage:
+    python -m benchmarks.bench_readonly [iterations]
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db import snapshot_url
+from app.db_readonly import ReadOnlyDatabase
+from app.db_snapshot import build_snapshot
+from app.schema import TriviaVerifyRequest
+from app.services.trivia_services import TriviaService
+
+
+def report(label: str, iterations: int, elapsed: float) -> None:
+    print(f"{label:<24} {elapsed / iterations * 1e6:8.1f} us/op  ({iterations / elapsed:,.0f} ops/s)")
+
+
+async def bench_session(path: Path, iterations: int, payloads: list[TriviaVerifyRequest]) -> None:
+    engine = create_async_engine(snapshot_url(path))
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    try:
+        start = time.perf_counter()
+        for i in range(iterations):
+            async with Session() as session:
+                await TriviaService.verify_answer(session, payloads[i % len(payloads)])
+        report("async_session_maker", iterations, time.perf_counter() - start)
+    finally:
+        await engine.dispose()
+
+
+async def bench_readonly(path: Path, mode: str, iterations: int, payloads: list[TriviaVerifyRequest]) -> None:
+    db = ReadOnlyDatabase(path, mode=mode, immutable=True)
+    try:
+        start = time.perf_counter()
+        for i in range(iterations):
+            await TriviaService.verify_answer_readonly(db, payloads[i % len(payloads)])
+        report(f"sqlite3 ro ({mode})", iterations, time.perf_counter() - start)
+    finally:
+        db.close()
+
+
+async def main(iterations: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "catalog.db"
+        build_snapshot(path)
+        payloads = [TriviaVerifyRequest(question_id=i, selected_answer="A") for i in range(1, 201)]
+
+        await bench_session(path, iterations, payloads)
+        await bench_readonly(path, "pool", iterations, payloads)
+        await bench_readonly(path, "inline", iterations, payloads)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000))
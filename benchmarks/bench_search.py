@@ -0,0 +1,48 @@
+"""
+Player name search: building the prefix index and looking names up, over a
+synthetic roster with accented names.
+
+Usage:
+    python -m benchmarks.bench_search [players]
+"""
+
+import random
+import sys
+import time
+
+from app.search import NamePrefixIndex, normalize_name
+
+
+FIRST = ["Hakan", "Martin", "Harry", "Kylian", "Luka", "Joško", "Ørjan", "Iñaki", "Sergio", "Zoë"]
+LAST = ["Çalhanoğlu", "Ødegaard", "Kane", "Mbappé", "Modrić", "Gvardiol", "Williams", "Müller", "Łukasz"]
+
+
+def synthetic_names(count: int, rng: random.Random) -> list[str]:
+    return [f"{rng.choice(FIRST)} {rng.choice(LAST)}{rng.randrange(count)}" for _ in range(count)]
+
+
+def main(count: int) -> None:
+    rng = random.Random(0)
+    names = synthetic_names(count, rng)
+
+    start = time.perf_counter()
+    index = NamePrefixIndex(names)
+    build = time.perf_counter() - start
+    print(f"build      {count:>8} names  {build * 1000:8.1f} ms  ({len(index)} keys)")
+
+    queries = [normalize_name(rng.choice(names))[: rng.randint(2, 8)] for _ in range(10_000)]
+    start = time.perf_counter()
+    for query in queries:
+        index.search(query)
+    elapsed = time.perf_counter() - start
+    print(f"search     {len(queries):>8} queries {elapsed / len(queries) * 1e6:7.1f} µs/query")
+
+    start = time.perf_counter()
+    for query in queries[:100]:
+        [n for n in names if query in normalize_name(n)][:10]
+    scan = (time.perf_counter() - start) / 100
+    print(f"full scan  {100:>8} queries {scan * 1e6:7.1f} µs/query")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
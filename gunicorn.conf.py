@@ -0,0 +1,86 @@
+"""
+Gunicorn settings (picked up automatically from the working directory).
+
+With PRELOAD_APP=1 (default) the master imports the app and builds the
+catalog once in `when_ready`, before any worker is forked; workers share
+those pages copy-on-write and their lifespan skips the load. Collection is
+disabled in the master and everything it allocated is moved to the GC's
+permanent generation with `gc.freeze()` just before each fork, so the
+collector in a worker never writes to (and copies) the shared objects.
+
+Worker sizing, uvloop/httptools and the remaining settings are described in
+app/server.py. The final worker count is exported as `WEB_CONCURRENCY`, so
+the app picks the shared session table when there are several workers, and
+the server refuses to start with `SESSION_BACKEND=memory` and more than one
+worker: each worker would only see the sessions it created.
+
+Configuration:
+    PRELOAD_APP      1 (default) to load the catalog in the master, 0 per worker
+    (see app/server.py for the server settings)
+
+Usage:
+    python -m app.server        or        gunicorn app.app:app
+"""
+
+import gc
+import os
+import sys
+
+from app.server import cpu_limit
+from app.sessions import SESSION_BACKEND, create_session_store, session_backend
+
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or cpu_limit())
+worker_class = "app.server.ProductionWorker"
+backlog = int(os.getenv("BACKLOG", "2048"))
+keepalive = int(os.getenv("KEEP_ALIVE", "5"))
+max_requests = int(os.getenv("MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "0"))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("TIMEOUT", "30"))
+preload_app = os.getenv("PRELOAD_APP", "1") == "1"
+
+# Read by the app (see app/sessions.py) in the master and in every worker
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+if preload_app:
+    # A collection in the master would leave freed holes in pages that the
+    # workers are about to share
+    gc.disable()
+
+
+def on_starting(server):
+    # `workers` may have been overridden on the command line (-w), so export
+    # the final count again; forked workers inherit it
+    count = server.cfg.workers
+    os.environ["WEB_CONCURRENCY"] = str(count)
+    if count > 1 and session_backend(SESSION_BACKEND, count) == "memory":
+        raise SystemExit(
+            f"SESSION_BACKEND=memory with {count} workers: sessions would only be visible to the "
+            "worker that created them. Use SESSION_BACKEND=sqlite (or auto) or WEB_CONCURRENCY=1."
+        )
+    app_module = sys.modules.get("app.app")
+    if app_module is not None:
+        # preload_app imported the app before this hook, with the old count
+        app_module.session_store = create_session_store()
+
+
+def when_ready(server):
+    if preload_app:
+        from app.app import get_catalog, preload
+
+        preload()
+        catalog = get_catalog()
+        if catalog is not None:
+            server.log.info(f"Catalog {catalog.version} preloaded ({len(catalog.players)} players)")
+
+
+def pre_fork(server, worker):
+    if preload_app:
+        gc.freeze()
+
+
+def post_fork(server, worker):
+    if preload_app:
+        gc.enable()
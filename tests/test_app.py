@@ -1,13 +1,22 @@
+import asyncio
+import functools
+import os
+from contextvars import ContextVar
+
 import pytest
 import pytest_asyncio
 from httpx import ASGITransport, AsyncClient
-from sqlalchemy import select
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
+# Statement stats are opt-in; exercise the instrumented engines in the suite
+os.environ["QUERY_STATS"] = "1"
+
 from app.app import app
 from app.db import Base, Player, Question, get_async_session
 from app.services.trivia_services import TriviaService
-from app.schema import TriviaVerifyRequest
+from app.schema import LeaderboardSubmitRequest, TriviaVerifyRequest
 
 
 @pytest_asyncio.fixture()
@@ -26,6 +35,76 @@ async def session_maker(tmp_path, monkeypatch):
     await engine.dispose()
 
 
+class QueryLog:
+    """Statements run by each request made through `client`, in order."""
+
+    def __init__(self) -> None:
+        self.requests: list[tuple[str, list[str]]] = []
+
+    def check(self, budgets: dict[str, int]) -> None:
+        for route, statements in self.requests:
+            budget = budgets.get(route)
+            assert budget is None or len(statements) <= budget, (
+                f"{route} ran {len(statements)} statements (budget {budget}):\n" + "\n".join(statements)
+            )
+
+
+_query_log: QueryLog | None = None
+_request_statements: ContextVar[list[str] | None] = ContextVar("request_statements", default=None)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    statements = _request_statements.get()
+    if statements is not None:
+        statements.append(statement)
+
+
+def _log_queries(asgi_app):
+    """Wrap an ASGI app so statements are attributed to the request that ran them."""
+
+    async def logged(scope, receive, send):
+        if _query_log is None or scope["type"] != "http":
+            return await asgi_app(scope, receive, send)
+        statements: list[str] = []
+        token = _request_statements.set(statements)
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            _request_statements.reset(token)
+            _query_log.requests.append((f"{scope['method']} {scope['path']}", statements))
+
+    return logged
+
+
+@pytest.fixture()
+def query_log():
+    global _query_log
+    _query_log = QueryLog()
+    event.listen(Engine, "before_cursor_execute", _record_statement)
+    try:
+        yield _query_log
+    finally:
+        event.remove(Engine, "before_cursor_execute", _record_statement)
+        _query_log = None
+
+
+def query_budget(budgets: dict[str, int]):
+    """
+    Fail the test if a request to one of `budgets` ("METHOD /path") runs more
+    statements than allowed. The test must take the `query_log` fixture.
+    """
+
+    def decorate(test):
+        @functools.wraps(test)
+        async def wrapper(*args, **kwargs):
+            await test(*args, **kwargs)
+            kwargs["query_log"].check(budgets)
+
+        return wrapper
+
+    return decorate
+
+
 @pytest_asyncio.fixture()
 async def client(session_maker):
     async def override_get_async_session():
@@ -33,7 +112,7 @@ async def client(session_maker):
             yield session
 
     app.dependency_overrides[get_async_session] = override_get_async_session
-    transport = ASGITransport(app=app)
+    transport = ASGITransport(app=_log_queries(app))
 
     async with AsyncClient(transport=transport, base_url="http://test") as c:
         yield c
@@ -167,3 +246,1566 @@ async def test_trivia_service_verify_answer(session_maker):
     assert correct.correct is True
     assert wrong.correct is False
     assert wrong.correct_answer == q.correct_answer
+
+
+def test_build_snapshot_is_indexed_and_read_only(tmp_path):
+    import sqlite3
+
+    from app.db_snapshot import build_snapshot, read_snapshot_meta
+
+    csv_path = tmp_path / "players.csv"
+    csv_path.write_text(
+        "name,image_url,stat_value\nHakan Çalhanoğlu,http://example.com/h.jpg,35000000\n",
+        encoding="utf-8",
+    )
+    questions = [
+        {
+            "question_text": "Who won the 2018 World Cup?",
+            "option_a": "France",
+            "option_b": "Croatia",
+            "option_c": "Germany",
+            "option_d": "Brazil",
+            "correct_answer": "A",
+            "difficulty": "easy",
+            "category": "World Cup",
+        }
+    ]
+    snapshot = tmp_path / "catalog.db"
+
+    version = build_snapshot(snapshot, csv_path=csv_path, questions=questions)
+
+    meta = read_snapshot_meta(snapshot)
+    assert meta["version"] == version
+    assert meta["players"] == "1"
+    assert meta["questions"] == "1"
+    assert build_snapshot(snapshot, csv_path=csv_path, questions=questions) == version
+
+    conn = sqlite3.connect(f"file:{snapshot.as_posix()}?mode=ro&immutable=1", uri=True)
+    try:
+        indexes = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        assert "ix_players_stat_value" in indexes
+        assert conn.execute("SELECT name FROM players").fetchone() == ("Hakan Çalhanoğlu",)
+        with pytest.raises(sqlite3.OperationalError):
+            conn.execute("DELETE FROM players")
+    finally:
+        conn.close()
+
+
+@pytest.mark.asyncio
+async def test_snapshot_url_opens_read_only(tmp_path):
+    from app.db import snapshot_url
+    from app.db_snapshot import build_snapshot
+
+    snapshot = tmp_path / "catalog.db"
+    build_snapshot(snapshot, csv_path=tmp_path / "missing.csv")
+
+    engine = create_async_engine(snapshot_url(snapshot))
+    try:
+        Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+        async with Session() as session:
+            count = await TriviaService.get_question_count(session)
+            assert count.total_questions == 20
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mode", ["inline", "pool"])
+async def test_readonly_database_verify(tmp_path, mode):
+    import sqlite3
+
+    from app.db_readonly import ReadOnlyDatabase
+    from app.db_snapshot import build_snapshot
+    from app.services.game_services import GameService
+    from app.schema import VerifyRequest
+
+    csv_path = tmp_path / "players.csv"
+    csv_path.write_text(
+        "name,image_url,stat_value\nPlayer A,http://example.com/a.jpg,10\nPlayer B,http://example.com/b.jpg,20\n",
+        encoding="utf-8",
+    )
+    snapshot = tmp_path / "catalog.db"
+    build_snapshot(snapshot, csv_path=csv_path)
+
+    db = ReadOnlyDatabase(snapshot, mode=mode)
+    try:
+        result = await TriviaService.verify_answer_readonly(
+            db, TriviaVerifyRequest(question_id=1, selected_answer="a")
+        )
+        assert result.correct is True
+
+        guess = await GameService.verify_guess_readonly(
+            db, VerifyRequest(player_left_id=1, player_right_id=2, guess="right")
+        )
+        assert (guess.correct, guess.left_value, guess.right_value) == (True, 10, 20)
+
+        from app.schema import TriviaBatchVerifyRequest
+
+        batch = await TriviaService.verify_answers_readonly(
+            db,
+            TriviaBatchVerifyRequest(
+                answers=[
+                    {"question_id": 1, "selected_answer": "A"},
+                    {"question_id": 2, "selected_answer": "A"},
+                ]
+            ),
+        )
+        assert (batch.total_correct, batch.total) == (1, 2)
+
+        with pytest.raises(ValueError):
+            await TriviaService.verify_answer_readonly(
+                db, TriviaVerifyRequest(question_id=99999, selected_answer="A")
+            )
+        with pytest.raises(sqlite3.OperationalError):
+            await db.fetchone("DELETE FROM questions")
+    finally:
+        db.close()
+
+
+def test_score_index_matches_brute_force_ranking():
+    import random
+
+    from app.ranking import ScoreIndex
+
+    rng = random.Random(7)
+    index = ScoreIndex()
+    best: dict[str, int] = {}
+    for _ in range(2000):
+        player = f"p{rng.randrange(300)}"
+        score = rng.randrange(5000)
+        index.submit(player, score)
+        best[player] = max(score, best.get(player, -1))
+
+    for player, score in best.items():
+        assert index.rank(player) == 1 + sum(1 for s in best.values() if s > score)
+
+    top = index.top(10)
+    assert [score for _, _, score in top] == sorted(best.values(), reverse=True)[:10]
+    assert top[0][0] == 1
+
+
+@pytest.mark.asyncio
+async def test_leaderboard_submit_rank_and_persist(session_maker, client):
+    from app.app import get_leaderboard_service
+    from app.services.leaderboard_services import LeaderboardService
+
+    service = LeaderboardService(session_maker)
+    app.dependency_overrides[get_leaderboard_service] = lambda: service
+
+    for name, score in [("ana", 5), ("ben", 12), ("cam", 8), ("ana", 3)]:
+        resp = await client.post(
+            "/api/leaderboard", json={"game": "higher_lower", "player_name": name, "score": score}
+        )
+        assert resp.status_code == 200
+
+    top = (await client.get("/api/leaderboard/higher_lower?limit=2")).json()
+    assert top["total_players"] == 3
+    assert [(e["rank"], e["player_name"], e["score"]) for e in top["entries"]] == [(1, "ben", 12), (2, "cam", 8)]
+
+    rank = (await client.get("/api/leaderboard/higher_lower/rank?player_name=ana")).json()
+    assert (rank["rank"], rank["score"]) == (3, 5)
+
+    missing = await client.get("/api/leaderboard/trivia/rank?player_name=ana")
+    assert missing.status_code == 404
+
+    assert await service.queue.flush() == 4
+    reloaded = LeaderboardService(session_maker)
+    assert await reloaded.load() == 3
+    assert reloaded.rank("higher_lower", "ana").rank == 3
+
+    # Another worker's submissions reach this one through sync()
+    service.submit(LeaderboardSubmitRequest(game="trivia", player_name="dan", score=4))
+    await service.queue.flush()
+    assert reloaded.top("trivia").total_players == 0
+    assert await reloaded.sync() == 1
+    assert reloaded.rank("trivia", "dan").rank == 1
+    assert await reloaded.sync() == 0
+    # Replaying a worker's own rows changes nothing
+    assert await service.sync() == 5
+    assert service.top("trivia").total_players == 1
+    assert service.rank("higher_lower", "ana").rank == 3
+
+
+@pytest.mark.asyncio
+async def test_memory_session_store_ttl_and_lru(monkeypatch):
+    from app import sessions
+    from app.sessions import MemorySessionStore
+
+    now = [1000.0]
+    monkeypatch.setattr(sessions.time, "monotonic", lambda: now[0])
+
+    store = MemorySessionStore(ttl=10, max_sessions=2)
+    a, _ = await store.create("trivia")
+    b, _ = await store.create("trivia")
+    assert await store.get(a) is not None  # a is now most recently used
+    c, _ = await store.create("trivia")
+
+    assert len(store) == 2
+    assert await store.get(b) is None
+
+    now[0] += 11
+    assert await store.get(a) is None
+    assert await store.get(c) is None
+    assert len(store) == 0
+
+
+
+def test_session_backend_defaults_to_the_shared_table_with_several_workers(monkeypatch):
+    from app.sessions import MemorySessionStore, SqliteSessionStore, create_session_store, session_backend
+
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert session_backend("auto") == "memory"
+    assert isinstance(create_session_store("auto"), MemorySessionStore)
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert session_backend("auto") == "sqlite"
+    assert isinstance(create_session_store("auto"), SqliteSessionStore)
+    assert session_backend("sqlite", workers=1) == "sqlite"
+
+
+@pytest.mark.asyncio
+async def test_session_tracks_progress(session_maker, client):
+    from app.app import get_session_store
+    from app.sessions import SqliteSessionStore
+
+    store = SqliteSessionStore(session_maker)
+    app.dependency_overrides[get_session_store] = lambda: store
+
+    async with session_maker() as session:
+        await seed_questions(session)
+        q = (await session.execute(select(Question).limit(1))).scalar_one()
+
+    created = (await client.post("/api/session", json={"game": "trivia"})).json()
+    session_id = created["session_id"]
+
+    for answer in (q.correct_answer, q.correct_answer, "D"):
+        resp = await client.post(
+            "/api/trivia/verify",
+            json={"question_id": q.id, "selected_answer": answer, "session_id": session_id},
+        )
+        assert resp.status_code == 200
+
+    state = (await client.get(f"/api/session/{session_id}")).json()
+    assert (state["cursor"], state["score"], state["streak"], state["best_streak"]) == (3, 2, 0, 2)
+    assert state["seen_ids"] == [q.id]
+
+    assert (await client.get("/api/session/unknown")).status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_sqlite_session_reads_do_not_write(session_maker):
+    from app.db import GameSession
+    from app.sessions import GameState, SqliteSessionStore
+
+    async def expires_at(session_id):
+        async with session_maker() as session:
+            return (
+                await session.execute(select(GameSession.expires_at).where(GameSession.id == session_id))
+            ).scalar_one()
+
+    store = SqliteSessionStore(session_maker, ttl=60)
+    session_id, _ = await store.create("trivia")
+    created = await expires_at(session_id)
+
+    await asyncio.sleep(0.01)
+    assert (await store.get(session_id)).game == "trivia"
+    assert await expires_at(session_id) == created
+
+    await store.save(session_id, GameState(game="trivia", cursor=1))
+    assert await expires_at(session_id) > created
+
+    store.ttl = -1
+    await store.save(session_id, GameState(game="trivia"))
+    assert await store.get(session_id) is None
+
+
+@pytest.mark.asyncio
+async def test_sqlite_sessions_are_purged_periodically(session_maker):
+    from app.db import GameSession
+    from app.sessions import GameState, SqliteSessionStore
+
+    store = SqliteSessionStore(session_maker, ttl=-1, purge_interval=0.01)
+    await store.save("expired", GameState(game="trivia"))
+    store.start()
+    try:
+        for _ in range(100):
+            async with session_maker() as session:
+                if (await session.execute(select(GameSession.id))).first() is None:
+                    break
+            await asyncio.sleep(0.01)
+        else:
+            pytest.fail("expired session was never purged")
+    finally:
+        await store.stop()
+
+
+@pytest.mark.asyncio
+async def test_trivia_batch_verify(session_maker, client):
+    async with session_maker() as session:
+        await seed_questions(session)
+        questions = (await session.execute(select(Question).order_by(Question.id))).scalars().all()
+
+    first, second = questions
+    resp = await client.post(
+        "/api/trivia/verify/batch",
+        json={
+            "answers": [
+                {"question_id": first.id, "selected_answer": first.correct_answer.lower()},
+                {"question_id": second.id, "selected_answer": "D"},
+            ]
+        },
+    )
+    assert resp.status_code == 200
+    body = resp.json()
+    assert (body["total_correct"], body["total"]) == (1, 2)
+    assert [r["correct"] for r in body["results"]] == [True, False]
+    assert body["results"][1]["correct_answer"] == second.correct_answer
+
+    missing = await client.post(
+        "/api/trivia/verify/batch",
+        json={"answers": [{"question_id": 9999, "selected_answer": "A"}]},
+    )
+    assert missing.status_code == 400
+
+
+def test_websocket_game_channel(tmp_path):
+    from sqlalchemy import create_engine, insert
+    from sqlalchemy.pool import NullPool
+    from starlette.testclient import TestClient
+
+    sync_engine = create_engine(f"sqlite:///{tmp_path}/ws.db")
+    Base.metadata.create_all(sync_engine)
+    with sync_engine.begin() as conn:
+        conn.execute(
+            insert(Player),
+            [
+                {"name": "Player A", "image_url": "http://example.com/a.jpg", "stat_value": 10},
+                {"name": "Player B", "image_url": "http://example.com/b.jpg", "stat_value": 20},
+            ],
+        )
+    sync_engine.dispose()
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/ws.db", poolclass=NullPool)
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def override_get_async_session():
+        async with Session() as session:
+            yield session
+
+    app.dependency_overrides[get_async_session] = override_get_async_session
+    try:
+        with TestClient(app).websocket_connect("/ws/game") as ws:
+            score = 0
+            for _ in range(3):
+                pair = ws.receive_json()
+                assert pair["t"] == "pair"
+                assert "stat_value" not in pair["l"]
+                guess = "l" if pair["l"]["n"] == "Player B" else "r"
+                ws.send_json({"g": guess})
+                result = ws.receive_json()
+                score += 1
+                assert (result["t"], result["c"], result["s"]) == ("res", True, score)
+
+            pair = ws.receive_json()
+            ws.send_json({"g": "x"})
+            assert ws.receive_json()["t"] == "err"
+            ws.send_text("not json")
+            assert ws.receive_json()["t"] == "err"
+            # The connection survives both and still grades the same pair
+            ws.send_json({"g": "l" if pair["l"]["n"] == "Player B" else "r"})
+            assert ws.receive_json()["t"] == "res"
+    finally:
+        app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_catalog_serves_requests_from_memory(session_maker, client):
+    from app.catalog import get_catalog, load_catalog, set_catalog
+
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+
+    set_catalog(catalog)
+    try:
+        # Emptying the DB proves the responses come from the catalog
+        async with session_maker() as session:
+            await session.execute(Player.__table__.delete())
+            await session.execute(Question.__table__.delete())
+            await session.commit()
+
+        players = (await client.get("/api/player/random")).json()["players"]
+        assert {p["name"] for p in players} == {"Player A", "Player B"}
+
+        verify = await client.post(
+            "/api/game/verify",
+            json={"player_left_id": players[0]["id"], "player_right_id": players[1]["id"], "guess": "left"},
+        )
+        assert verify.status_code == 200
+
+        first = (await client.get("/api/trivia/question")).json()["question"]
+        second = (await client.get(f"/api/trivia/question?exclude={first['id']}")).json()["question"]
+        assert second["id"] != first["id"]
+        assert (await client.get("/api/trivia/count")).json()["total_questions"] == 2
+
+        answer = catalog.questions.answers[first["id"]]
+        result = await client.post("/api/trivia/verify", json={"question_id": first["id"], "selected_answer": answer})
+        assert result.json()["correct"] is True
+        assert get_catalog() is catalog
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_dataset_watcher_reloads_only_changed_source(session_maker, tmp_path):
+    import json
+
+    from app.catalog import get_catalog, load_catalog, set_catalog
+    from app.reloader import DatasetWatcher
+
+    csv_path = tmp_path / "players.csv"
+    csv_path.write_text("name,image_url,stat_value\nPlayer A,http://example.com/a.jpg,10\n", encoding="utf-8")
+    bank_path = tmp_path / "questions.json"
+    bank_path.write_text("[]", encoding="utf-8")
+
+    async with session_maker() as session:
+        await seed_questions(session)
+        set_catalog(await load_catalog(session))
+
+    try:
+        original = get_catalog()
+        watcher = DatasetWatcher(
+            session_maker, players_path=csv_path, questions_path=bank_path, interval=0, lock_path=tmp_path / "lock"
+        )
+        watcher.start()
+        assert await watcher.poll() == []
+
+        csv_path.write_text(
+            "name,image_url,stat_value\nPlayer A,http://example.com/a.jpg,10\nPlayer B,http://example.com/b.jpg,20\n",
+            encoding="utf-8",
+        )
+        assert await watcher.poll() == [csv_path]
+
+        reloaded = get_catalog()
+        assert reloaded is not original
+        assert reloaded.players.names == ("Player A", "Player B")
+        assert reloaded.questions is original.questions
+        assert reloaded.version != original.version
+
+        # Rewriting identical content is detected by the hash and skipped
+        bank_path.write_text("[]", encoding="utf-8")
+        assert await watcher.poll() == []
+
+        bank_path.write_text(json.dumps([{
+            "question_text": "Q?", "option_a": "a", "option_b": "b", "option_c": "c", "option_d": "d",
+            "correct_answer": "C", "difficulty": "hard", "category": "Test",
+        }]), encoding="utf-8")
+        assert await watcher.poll() == [bank_path]
+        assert list(get_catalog().questions.answers.values()) == ["C"]
+        assert get_catalog().players is reloaded.players
+        await watcher.stop()
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_dataset_watcher_imports_in_one_process_only(session_maker, tmp_path, monkeypatch):
+    from app import reloader
+    from app.catalog import get_catalog, load_catalog, set_catalog
+
+    csv_path = tmp_path / "players.csv"
+    csv_path.write_text("name,image_url,stat_value\nPlayer A,http://example.com/a.jpg,10\n", encoding="utf-8")
+    bank_path = tmp_path / "questions.json"
+    bank_path.write_text("[]", encoding="utf-8")
+    imports = []
+    original_import = reloader.import_players
+
+    async def counting_import(session, path):
+        imports.append(path)
+        return await original_import(session, path)
+
+    monkeypatch.setattr(reloader, "import_players", counting_import)
+    async with session_maker() as session:
+        set_catalog(await load_catalog(session))
+
+    watchers = [
+        reloader.DatasetWatcher(
+            session_maker, players_path=csv_path, questions_path=bank_path, interval=0, lock_path=tmp_path / "lock"
+        )
+        for _ in range(3)
+    ]
+    try:
+        for watcher in watchers:
+            watcher.start()
+        csv_path.write_text(
+            "name,image_url,stat_value\nPlayer A,http://example.com/a.jpg,10\nPlayer B,http://example.com/b.jpg,20\n",
+            encoding="utf-8",
+        )
+        assert [await w.poll() for w in watchers] == [[csv_path]] * 3
+        assert imports == [csv_path]
+        assert [w.is_importer for w in watchers] == [True, False, False]
+        assert get_catalog().players.names == ("Player A", "Player B")
+        assert [await w.poll() for w in watchers] == [[], [], []]
+
+        # The importer exits; the next worker to poll takes over
+        await watchers[0].stop()
+        assert watchers[1].is_importer
+    finally:
+        for watcher in watchers:
+            await watcher.stop()
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_import_players_from_sql_dump(session_maker, tmp_path):
+    from app.services.player_importer import (
+        PLAYERS_SOURCE_PATHS,
+        import_players_from_sql_dump,
+        normalize_sql_dump,
+    )
+
+    dump = tmp_path / "dump.sql"
+    dump.write_text(
+        "INSERT INTO `players_1` (`COL 4`, `COL 18`, `COL 22`) VALUES\n"
+        "('Stephen O\\'Donnell', 'http://example.com/o.jpg', 200000),\n"
+        "('Hakan Çalhanoğlu', 'http://example.com/h.jpg', 35000000);\n"
+        "COMMIT;\n"
+        "/*!40101 SET CHARACTER_SET_CLIENT=@OLD_CHARACTER_SET_CLIENT */;\n",
+        encoding="utf-8",
+    )
+
+    async with session_maker() as session:
+        await seed_players(session)
+        assert await import_players_from_sql_dump(session, dump) == 2
+        names = (await session.execute(select(Player.name).order_by(Player.id))).scalars().all()
+    assert names == ["Stephen O'Donnell", "Hakan Çalhanoğlu"]
+
+    with pytest.raises(ValueError):
+        normalize_sql_dump("INSERT INTO players (name, image_url, stat_value) VALUES ('a', 'b', 1);\nDROP TABLE players;\n")
+
+    # A failing dump leaves the previous players in place
+    bad = tmp_path / "bad.sql"
+    bad.write_text("INSERT INTO players (name, image_url, stat_value) VALUES ('', 'x', 1);\n", encoding="utf-8")
+    async with session_maker() as session:
+        with pytest.raises(ValueError):
+            await import_players_from_sql_dump(session, bad)
+    async with session_maker() as session:
+        assert len((await session.execute(select(Player))).scalars().all()) == 2
+
+    async with session_maker() as session:
+        assert await import_players_from_sql_dump(session, PLAYERS_SOURCE_PATHS["sql"]) == 6419
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_numpy", [True, False])
+async def test_multi_stat_rounds_from_columnar_catalog(session_maker, client, monkeypatch, use_numpy):
+    from app import catalog as catalog_module
+    from app.catalog import load_catalog, set_catalog
+
+    if not use_numpy:
+        monkeypatch.setattr(catalog_module, "np", None)
+
+    async with session_maker() as session:
+        session.add_all(
+            [
+                Player(name="Striker", image_url="http://example.com/s.jpg", stat_value=10, goals=300, caps=90, age=30),
+                Player(name="Keeper", image_url="http://example.com/k.jpg", stat_value=20, goals=0, caps=100, age=35),
+                Player(name="Winger", image_url="http://example.com/w.jpg", stat_value=30, goals=120, caps=0, age=22),
+            ]
+        )
+        await session.commit()
+        catalog = await load_catalog(session)
+
+    for loaded in (None, catalog):
+        set_catalog(loaded)
+        try:
+            resp = await client.get("/api/player/random?stat=goals")
+            assert resp.status_code == 200
+            body = resp.json()
+            assert body["stat"] == "goals"
+            # The keeper has no known goals and is never drawn for that stat
+            assert {p["name"] for p in body["players"]} == {"Striker", "Winger"}
+            by_name = {p["name"]: p for p in body["players"]}
+            assert by_name["Striker"]["stat_value"] == 300
+
+            verify = await client.post(
+                "/api/game/verify",
+                json={
+                    "player_left_id": by_name["Striker"]["id"],
+                    "player_right_id": by_name["Winger"]["id"],
+                    "guess": "left",
+                    "stat": "goals",
+                },
+            )
+            assert verify.json() == {"correct": True, "left_value": 300, "right_value": 120}
+
+            pairs = (await client.get("/api/player/pairs?count=5&stat=caps")).json()["pairs"]
+            assert len(pairs) == 5
+            assert all(left["id"] != right["id"] for left, right in pairs)
+            assert all({left["name"], right["name"]} == {"Striker", "Keeper"} for left, right in pairs)
+
+            batch = await client.post(
+                "/api/game/verify/batch",
+                json={
+                    "stat": "age",
+                    "rounds": [
+                        {"player_left_id": by_name["Striker"]["id"], "player_right_id": by_name["Winger"]["id"], "guess": "left"},
+                        {"player_left_id": by_name["Striker"]["id"], "player_right_id": by_name["Winger"]["id"], "guess": "right"},
+                    ],
+                },
+            )
+            assert batch.json()["total_correct"] == 1
+            assert batch.json()["results"][0] == {"correct": True, "left_value": 30, "right_value": 22}
+
+            assert (await client.get("/api/player/random?stat=height")).status_code == 422
+        finally:
+            set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_player_search_is_accent_insensitive(session_maker, client, query_log):
+    from app.catalog import load_catalog, set_catalog
+
+    async with session_maker() as session:
+        session.add_all(
+            [
+                Player(name="Hakan Çalhanoğlu", image_url="http://example.com/h.jpg", stat_value=35000000),
+                Player(name="Harry Kane", image_url="http://example.com/k.jpg", stat_value=90000000),
+                Player(name="Martin Ødegaard", image_url="http://example.com/o.jpg", stat_value=110000000),
+            ]
+        )
+        await session.commit()
+        catalog = await load_catalog(session)
+
+    for loaded in (None, catalog):
+        set_catalog(loaded)
+        try:
+            resp = await client.get("/api/player/search?q=calhanoglu")
+            assert [p["name"] for p in resp.json()["results"]] == ["Hakan Çalhanoğlu"]
+
+            resp = await client.get("/api/player/search?q=HA")
+            assert {p["name"] for p in resp.json()["results"]} == {"Hakan Çalhanoğlu", "Harry Kane"}
+
+            resp = await client.get("/api/player/search?q=kane")
+            assert [p["name"] for p in resp.json()["results"]] == ["Harry Kane"]
+
+            resp = await client.get("/api/player/search?q=odeg")
+            assert [p["name"] for p in resp.json()["results"]] == ["Martin Ødegaard"]
+
+            resp = await client.get("/api/player/search?q=zzz")
+            assert resp.json()["results"] == []
+        finally:
+            set_catalog(None)
+
+    # The SQL fallback builds its name index once, not per query
+    assert [len(run) for _, run in query_log.requests[:5]] == [1, 0, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_daily_challenge_is_deterministic_and_cacheable(session_maker, client, query_log):
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+
+    first = await client.get("/api/challenge/daily?date=2024-06-01")
+    assert first.status_code == 200
+    body = first.json()
+    assert body["date"] == "2024-06-01"
+    assert len(body["pairs"]) == 10
+    assert len(body["questions"]) == 2
+    assert "public, max-age=" in first.headers["cache-control"]
+    etag = first.headers["etag"]
+    assert etag.startswith(f'"{body["version"]}-')
+
+    again = await client.get("/api/challenge/daily?date=2024-06-01")
+    assert again.content == first.content
+    assert again.headers["etag"] == etag
+
+    revalidated = await client.get(
+        "/api/challenge/daily?date=2024-06-01", headers={"If-None-Match": etag}
+    )
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+    today = await client.get("/api/challenge/daily")
+    assert today.status_code == 200
+
+    future = await client.get("/api/challenge/daily?date=2999-01-01")
+    assert future.status_code == 400
+
+    # Without a published catalog, only the first request loads one
+    assert [len(run) for _, run in query_log.requests[:4]] == [2, 0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_seeded_pair_and_deck_are_pure_functions_of_the_seed(session_maker, client):
+    from app.catalog import load_catalog, set_catalog
+
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+
+    responses = {}
+    for loaded in (None, catalog):
+        set_catalog(loaded)
+        try:
+            for path in ("/api/player/pair?seed=42", "/api/trivia/deck?seed=42&limit=1"):
+                resp = await client.get(path)
+                assert resp.status_code == 200
+                assert resp.headers["cache-control"].startswith("public, max-age=")
+                # Same bytes and ETag with or without the in-memory catalog
+                assert responses.setdefault(path, (resp.content, resp.headers["etag"])) == (
+                    resp.content,
+                    resp.headers["etag"],
+                )
+                cached = await client.get(path, headers={"If-None-Match": resp.headers["etag"]})
+                assert cached.status_code == 304
+        finally:
+            set_catalog(None)
+
+    pair = (await client.get("/api/player/pair?seed=42")).json()
+    assert {p["name"] for p in pair["players"]} == {"Player A", "Player B"}
+    assert len((await client.get("/api/trivia/deck?seed=42&limit=1")).json()["questions"]) == 1
+    assert (await client.get("/api/player/pair?seed=-1")).status_code == 422
+
+
+def test_alias_sampler_matches_weights_after_incremental_update():
+    import random
+    from collections import Counter
+
+    from app.sampling import AliasSampler
+
+    rng = random.Random(7)
+    weights = [rng.choice([0.0, 0.25, 1.0, 4.0]) for _ in range(300)]
+    sampler = AliasSampler(weights, block_size=16)
+    changed = sampler.updated({3: 10.0, 100: 0.0, 299: 2.5})
+    weights_changed = list(weights)
+    weights_changed[3], weights_changed[100], weights_changed[299] = 10.0, 0.0, 2.5
+
+    # The original sampler is untouched
+    assert sampler.weights[3] == weights[3]
+
+    for s, w in ((sampler, weights), (changed, weights_changed)):
+        draws = 200_000
+        counts = Counter(s.draw(rng) for _ in range(draws))
+        total = sum(w)
+        for position, weight in enumerate(w):
+            if weight == 0:
+                assert counts[position] == 0
+            else:
+                assert abs(counts[position] / draws - weight / total) < 0.003
+
+
+@pytest.mark.asyncio
+async def test_admin_player_weights_steer_sampling(session_maker, client, monkeypatch):
+    from app import admin
+    from app.catalog import get_catalog, load_catalog, set_catalog
+
+    async with session_maker() as session:
+        await seed_players(session)
+        session.add(Player(name="Player C", image_url="http://example.com/c.jpg", stat_value=30))
+        await session.commit()
+        catalog = await load_catalog(session)
+        ids = {p.name: p.id for p in (await session.execute(select(Player))).scalars()}
+
+    payload = {"weights": [{"player_id": ids["Player C"], "weight": 0}]}
+    assert (await client.put("/api/admin/players/weights", json=payload)).status_code == 404
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    resp = await client.put("/api/admin/players/weights", json=payload, headers={"X-Admin-Token": "nope"})
+    assert resp.status_code == 403
+    resp = await client.put("/api/admin/players/weights", json=payload, headers={"X-Admin-Token": "sécret".encode()})
+    assert resp.status_code == 403
+    resp = await client.get("/health", headers={"X-Profile": "1", "X-Admin-Token": "ü".encode()})
+    assert resp.status_code == 200 and "x-profile-id" not in resp.headers
+
+    set_catalog(catalog)
+    try:
+        resp = await client.put("/api/admin/players/weights", json=payload, headers={"X-Admin-Token": "secret"})
+        assert resp.status_code == 200
+        assert resp.json()["updated"] == 1
+        assert get_catalog().players.version == resp.json()["version"] != catalog.players.version
+
+        resp = await client.get("/api/player/pairs?count=50")
+        names = {p["name"] for pair in resp.json()["pairs"] for p in pair}
+        assert names == {"Player A", "Player B"}
+    finally:
+        set_catalog(None)
+
+    async with session_maker() as session:
+        player = await session.get(Player, ids["Player C"])
+        assert player.weight == 0
+
+    resp = await client.get("/api/player/random")
+    assert {p["name"] for p in resp.json()["players"]} == {"Player A", "Player B"}
+
+    missing = {"weights": [{"player_id": 999, "weight": 1}]}
+    resp = await client.put("/api/admin/players/weights", json=missing, headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_player_weights_reach_the_other_workers(session_maker, client, tmp_path, monkeypatch):
+    from app import admin
+    import app.app as app_module
+    from app.catalog import get_catalog, load_catalog, set_catalog
+    from app.reloader import DATASET_WATCH_INTERVAL, DatasetWatcher
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    headers = {"X-Admin-Token": "secret"}
+    async with session_maker() as session:
+        await seed_players(session)
+        stale = await load_catalog(session)
+        player_id = (await session.execute(select(Player.id))).scalars().first()
+
+    # Two workers: the importer and a follower, sharing the lock and the database
+    watchers = [
+        DatasetWatcher(
+            session_maker, tmp_path / "players.csv", tmp_path / "q.json", interval=0, lock_path=tmp_path / "lock"
+        )
+        for _ in range(2)
+    ]
+    set_catalog(stale)
+    try:
+        assert watchers[0].is_importer and not watchers[1].is_importer
+        payload = {"weights": [{"player_id": player_id, "weight": 3.0}]}
+        resp = await client.put("/api/admin/players/weights", json=payload, headers=headers)
+        assert resp.status_code == 200
+        body = resp.json()
+        assert get_catalog().players.version == body["version"] != stale.players.version
+        assert body["other_workers_within"] == DATASET_WATCH_INTERVAL
+
+        # The worker that answered already serves it; a worker still on the old catalog reloads
+        assert await watchers[0].poll() == []
+        set_catalog(stale)
+        assert await watchers[1].poll() == [tmp_path / "players.csv"]
+        assert get_catalog().players.version == body["version"]
+        assert await watchers[1].poll() == []
+    finally:
+        for watcher in watchers:
+            await watcher.stop()
+        set_catalog(None)
+
+    monkeypatch.setattr(app_module, "CATALOG_FILE", str(tmp_path / "catalog.bin"))
+    resp = await client.put("/api/admin/players/weights", json=payload, headers=headers)
+    assert resp.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_session_avoids_repeating_players(session_maker, client, monkeypatch):
+    import app.sessions
+    from app.catalog import load_catalog, set_catalog
+    from app.sessions import GameState, SeenPlayers
+
+    async with session_maker() as session:
+        session.add_all(
+            Player(name=f"Player {i}", image_url=f"http://example.com/{i}.jpg", stat_value=i)
+            for i in range(1, 21)
+        )
+        await session.commit()
+        catalog = await load_catalog(session)
+
+    set_catalog(catalog)
+    try:
+        session_id = (await client.post("/api/session", json={"game": "higher_lower"})).json()["session_id"]
+        # 20 players, reset at half: the first 5 pairs never repeat a player
+        shown = []
+        for _ in range(5):
+            resp = await client.get(f"/api/player/random?session_id={session_id}")
+            shown += [p["id"] for p in resp.json()["players"]]
+        assert len(set(shown)) == 10
+
+        resp = await client.get(f"/api/player/random?session_id={session_id}")
+        assert resp.status_code == 200
+    finally:
+        set_catalog(None)
+
+    # The bitset round-trips through the JSON session format and is capped
+    monkeypatch.setattr(app.sessions, "SEEN_PLAYERS_BITS", 64)
+    state = GameState(game="higher_lower")
+    seen = state.seen_players_for("v1", 1000)
+    assert len(seen.bits) == 8
+    seen.add(3)
+    restored = GameState.from_dict(state.to_dict()).seen_players
+    assert 3 in restored and 4 not in restored and restored.count == 1
+    assert state.seen_players_for("v2", 1000).count == 0
+    assert isinstance(restored, SeenPlayers)
+
+
+@pytest.mark.asyncio
+async def test_answer_analytics_counts_and_flushes(session_maker, client, monkeypatch):
+    from app import admin
+    from app.app import get_answer_analytics
+    from app.db import QuestionStat
+    from app.services.analytics_services import AnswerAnalytics
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    analytics = AnswerAnalytics(session_maker)
+    app.dependency_overrides[get_answer_analytics] = lambda: analytics
+
+    async with session_maker() as session:
+        await seed_questions(session)
+        questions = {q.category: q.id for q in (await session.execute(select(Question))).scalars()}
+    world_cup, ucl = questions["World Cup"], questions["Champions League"]
+
+    await client.post("/api/trivia/verify", json={"question_id": world_cup, "selected_answer": "A"})
+    await client.post("/api/trivia/verify", json={"question_id": world_cup, "selected_answer": "c"})
+    await client.post(
+        "/api/trivia/verify/batch",
+        json={"answers": [{"question_id": world_cup, "selected_answer": "A"}, {"question_id": ucl, "selected_answer": "B"}]},
+    )
+
+    # Nothing is written on the request path
+    async with session_maker() as session:
+        assert (await session.execute(select(QuestionStat))).first() is None
+
+    assert await analytics.flush() == 2
+    await client.post("/api/trivia/verify", json={"question_id": ucl, "selected_answer": "D"})
+
+    resp = await client.get("/api/admin/trivia/stats", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 200
+    stats = resp.json()
+    by_id = {q["question_id"]: q for q in stats["questions"]}
+    assert (by_id[world_cup]["answers"], by_id[world_cup]["correct"]) == (3, 2)
+    assert by_id[world_cup]["picks"] == {"A": 2, "B": 0, "C": 1, "D": 0}
+    # Persisted and unflushed counts add up
+    assert (by_id[ucl]["answers"], by_id[ucl]["accuracy"]) == (2, 0.5)
+    assert {c["category"]: c["answers"] for c in stats["categories"]} == {"Champions League": 2, "World Cup": 3}
+
+    assert await analytics.flush() == 1
+    assert await analytics.flush() == 0
+    async with session_maker() as session:
+        row = await session.get(QuestionStat, ucl)
+        assert (row.answers, row.correct, row.picks_b, row.picks_d) == (2, 1, 1, 1)
+
+
+class HangingSession:
+    """Session whose writes never finish, to cancel a flush mid-await."""
+
+    def __init__(self, started):
+        self.started = started
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, *args, **kwargs):
+        self.started.set()
+        await asyncio.Event().wait()
+
+
+@pytest.mark.asyncio
+async def test_answer_analytics_keeps_counts_when_flush_is_cancelled():
+    from app.services.analytics_services import AnswerAnalytics
+
+    started = asyncio.Event()
+    analytics = AnswerAnalytics(lambda: HangingSession(started))
+    analytics.record(1, "A", True)
+    flushing = asyncio.create_task(analytics.flush())
+    await asyncio.wait_for(started.wait(), 1)
+    analytics.record(1, "B", False)
+    flushing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flushing
+    assert list(analytics._counts[1]) == [2, 1, 1, 1, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_question_ratings_stay_dirty_when_flush_is_cancelled():
+    from app.services.rating_services import QuestionRatings
+
+    started = asyncio.Event()
+    ratings = QuestionRatings(lambda: HangingSession(started))
+    ratings._index.set(7, 1480.0)
+    ratings._deltas[7] = -20.0
+    flushing = asyncio.create_task(ratings.flush())
+    await asyncio.wait_for(started.wait(), 1)
+    flushing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flushing
+    assert ratings._deltas == {7: -20.0}
+
+
+@pytest.mark.asyncio
+async def test_question_ratings_add_up_across_workers(session_maker):
+    from app.catalog import load_catalog, set_catalog
+    from app.db import QuestionRating
+    from app.services.rating_services import QuestionRatings
+
+    async with session_maker() as session:
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+    question = catalog.questions.questions[0]
+
+    first, second = QuestionRatings(session_maker), QuestionRatings(session_maker)
+    set_catalog(catalog)
+    try:
+        initial = first.rating(question.id)
+        first.record(question.id, correct=True)
+        second.record(question.id, correct=True)
+        second.record(question.id, correct=True)
+        changes = [first.rating(question.id) - initial, second.rating(question.id) - initial]
+
+        assert await first.flush() == 1
+        assert await second.flush() == 1
+        async with session_maker() as session:
+            stored = (await session.get(QuestionRating, question.id)).rating
+        assert stored == pytest.approx(initial + sum(changes))
+        # The last writer now also sees the first worker's answers
+        assert second.rating(question.id) == pytest.approx(stored)
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_adaptive_trivia_follows_session_rating(session_maker, client, monkeypatch):
+    from app.app import get_question_ratings
+    from app.catalog import load_catalog, set_catalog
+    from app.db import QuestionRating
+    from app.services import rating_services
+    from app.services.rating_services import QuestionRatings
+
+    monkeypatch.setattr(rating_services, "RATING_WINDOW", 1)
+    ratings = QuestionRatings(session_maker)
+    app.dependency_overrides[get_question_ratings] = lambda: ratings
+
+    async with session_maker() as session:
+        for difficulty in ("easy", "medium", "hard"):
+            session.add(
+                Question(
+                    question_text=f"A {difficulty} question?",
+                    option_a="A",
+                    option_b="B",
+                    option_c="C",
+                    option_d="D",
+                    correct_answer="A",
+                    difficulty=difficulty,
+                    category="General",
+                )
+            )
+        await session.commit()
+        catalog = await load_catalog(session)
+    ids = {q.difficulty: q.id for q in catalog.questions.questions}
+
+    set_catalog(catalog)
+    try:
+        session_id = (await client.post("/api/session", json={"game": "trivia"})).json()["session_id"]
+        # A fresh session (1500) only meets the questions next to its rating
+        picked = set()
+        for _ in range(10):
+            resp = await client.get(f"/api/trivia/question?session_id={session_id}")
+            picked.add(resp.json()["question"]["id"])
+        assert ids["easy"] not in picked
+
+        for _ in range(6):
+            await client.post(
+                "/api/trivia/verify",
+                json={"question_id": ids["medium"], "selected_answer": "B", "session_id": session_id},
+            )
+        state = (await client.get(f"/api/session/{session_id}")).json()
+        assert state["rating"] < 1450
+        assert ratings.rating(ids["medium"]) > 1500
+
+        # Struggling players move down to the easy question and never see the hard one
+        picked = set()
+        for _ in range(10):
+            resp = await client.get(f"/api/trivia/question?session_id={session_id}")
+            picked.add(resp.json()["question"]["id"])
+        assert ids["hard"] not in picked
+    finally:
+        set_catalog(None)
+
+    assert await ratings.flush() == 1
+    async with session_maker() as session:
+        stored = await session.get(QuestionRating, ids["medium"])
+        assert stored.rating > 1500
+
+    reloaded = QuestionRatings(session_maker)
+    assert await reloaded.load() == 1
+    set_catalog(catalog)
+    try:
+        assert reloaded.rating(ids["medium"]) == stored.rating
+        assert reloaded.rating(ids["hard"]) == 1800
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_catalog_file_serves_the_same_catalog(session_maker, client, tmp_path):
+    import random
+
+    from app.catalog import load_catalog, set_catalog
+    from app.catalog_file import CatalogFile, open_catalog_file, write_catalog_file
+
+    async with session_maker() as session:
+        await seed_players(session)
+        session.add(Player(name="Martin Ødegaard", image_url="http://example.com/o.jpg", stat_value=5, goals=3))
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+
+    path = tmp_path / "catalog.bin"
+    write_catalog_file(catalog, path)
+    mapped = open_catalog_file(path)
+
+    assert mapped.version == catalog.version
+    assert isinstance(mapped.players.ids, memoryview)
+    assert [mapped.players.player(i, "goals") for i in range(3)] == [
+        catalog.players.player(i, "goals") for i in range(3)
+    ]
+    assert mapped.players.search("odegaard") == catalog.players.search("odegaard")
+    assert mapped.players.sample_pairs(20, rng=random.Random(5)) == catalog.players.sample_pairs(
+        20, rng=random.Random(5)
+    )
+    assert mapped.questions.by_id == catalog.questions.by_id
+    assert mapped.questions.answers == catalog.questions.answers
+
+    # Weight changes copy the touched tables out of the read-only mapping
+    reweighted = mapped.players.with_weights({0: 0.0})
+    assert reweighted.weights[0] == 0.0 and mapped.players.weights[0] == 1.0
+
+    set_catalog(mapped)
+    try:
+        resp = await client.get("/api/player/search?q=mart")
+        assert [p["name"] for p in resp.json()["results"]] == ["Martin Ødegaard"]
+    finally:
+        set_catalog(None)
+
+    path.write_bytes(b"not a catalog" + bytes(100))
+    with pytest.raises(ValueError):
+        CatalogFile(path)
+
+
+def test_preload_builds_catalog_before_fork(tmp_path, monkeypatch):
+    import asyncio
+
+    import app.app as app_module
+    from app.catalog import get_catalog, set_catalog
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/preload.db")
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with Session() as session:
+            await seed_players(session)
+            await seed_questions(session)
+        await engine.dispose()
+
+    async def no_seed():
+        pass
+
+    asyncio.run(setup())
+    monkeypatch.setattr(app_module, "engine", engine)
+    monkeypatch.setattr(app_module, "state_engine", engine)
+    monkeypatch.setattr(app_module, "async_session_maker", Session)
+    monkeypatch.setattr(app_module, "seed_database", no_seed)
+    monkeypatch.setattr(app_module, "DATABASE_SNAPSHOT", None)
+    monkeypatch.setattr(app_module, "CATALOG_FILE", None)
+    monkeypatch.setattr(app_module, "preloaded", False)
+    try:
+        app_module.preload()
+        assert app_module.preloaded
+        assert len(get_catalog().players) == 2
+        assert len(get_catalog().questions.questions) == 2
+        # Nothing pooled survives into the forked workers
+        assert engine.pool.checkedin() == 0
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_ready_waits_for_catalog_and_warm_up(session_maker, client, monkeypatch):
+    import app.app as app_module
+    from app.catalog import load_catalog, set_catalog
+    from app.readiness import Readiness
+
+    monkeypatch.setattr(app_module, "readiness", Readiness("database", "caches"))
+    monkeypatch.setattr(app_module, "async_session_maker", session_maker)
+    monkeypatch.setattr(app_module, "engine", session_maker.kw["bind"])
+    monkeypatch.setattr(app_module, "state_engine", session_maker.kw["bind"])
+
+    resp = await client.get("/ready")
+    assert resp.status_code == 503
+    assert resp.json()["checks"] == {"catalog": False, "database": False, "caches": False}
+    assert (await client.get("/health")).status_code == 200
+
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+    set_catalog(catalog)
+    try:
+        await app_module.warm_up()
+        resp = await client.get("/ready")
+        assert resp.status_code == 200
+        assert resp.json()["status"] == "ready"
+
+        app_module.readiness.reset()
+        assert (await client.get("/ready")).status_code == 503
+    finally:
+        set_catalog(None)
+
+
+@pytest.mark.asyncio
+async def test_profiling_is_opt_in_and_listed(client, tmp_path, monkeypatch):
+    from app import admin
+    import app.app as app_module
+    from app.profiling import RequestProfiler
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module, "request_profiler", RequestProfiler(tmp_path / "profiles", sample_rate=0))
+    headers = {"X-Admin-Token": "secret"}
+
+    resp = await client.get("/health", headers={"X-Profile": "1"})
+    assert "x-profile-id" not in resp.headers
+    resp = await client.get("/health", headers={"X-Profile": "1", "X-Admin-Token": "wrong"})
+    assert "x-profile-id" not in resp.headers
+
+    resp = await client.get("/health", headers={"X-Profile": "1", **headers})
+    assert resp.status_code == 200
+    name = resp.headers["x-profile-id"]
+
+    listed = (await client.get("/api/admin/profiles", headers=headers)).json()["profiles"]
+    assert [p["name"] for p in listed] == [name]
+
+    folded = (await client.get(f"/api/admin/profiles/{name}", headers=headers)).text
+    lines = folded.splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+    assert any("app.app:health_check" in line for line in lines)
+
+    resp = await client.get("/api/admin/profiles/..%2Fsecret.folded", headers=headers)
+    assert resp.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_profile_skips_work_of_concurrent_tasks():
+    from app.profiling import FoldedStackTracer
+
+    def own_work():
+        return sum(range(100))
+
+    def other_work():
+        return sum(range(100))
+
+    async def other_task(stop):
+        while not stop.is_set():
+            other_work()
+            await asyncio.sleep(0)
+
+    stop = asyncio.Event()
+    other = asyncio.create_task(other_task(stop))
+    await asyncio.sleep(0)
+    tracer = FoldedStackTracer()
+    tracer.start()
+    try:
+        for _ in range(5):
+            own_work()
+            await asyncio.sleep(0)
+    finally:
+        tracer.stop()
+    stop.set()
+    await other
+
+    folded = tracer.folded()
+    assert "own_work" in folded
+    assert "other_work" not in folded
+
+
+@pytest.mark.asyncio
+async def test_query_stats_group_shapes_and_capture_plans(client, tmp_path, monkeypatch):
+    from app import admin
+    import app.app as app_module
+    from app.query_stats import QueryStats, instrument_engine, normalize_statement
+
+    assert normalize_statement("SELECT * FROM q WHERE id NOT IN (?, ?, ?) LIMIT 5") == (
+        "SELECT * FROM q WHERE id NOT IN (?...) LIMIT ?"
+    )
+
+    stats = QueryStats(slow_ms=0)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/stats.db")
+    instrument_engine(engine, stats)
+    Session = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with Session() as session:
+        await seed_questions(session)
+        for exclude in ([1], [1, 99]):
+            await TriviaService.get_random_question(session, exclude)
+    await engine.dispose()
+
+    random_shapes = [s for s in stats.top(100) if "random()" in s.statement]
+    assert len(random_shapes) == 1 and random_shapes[0].count == 2
+    assert random_shapes[0].scans and random_shapes[0].scans[0].startswith("SCAN questions")
+
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+    monkeypatch.setattr(app_module, "query_stats", stats)
+    resp = await client.get("/api/admin/db/queries?order=count", headers={"X-Admin-Token": "secret"})
+    assert resp.status_code == 200
+    assert any(q["scans"] for q in resp.json()["queries"])
+
+    # Opted in for the suite (see the top of this file), so the app's engine is hooked
+    assert app_module.engine.sync_engine.dispatch.after_cursor_execute
+
+
+async def _play_both_games(client) -> None:
+    left, right = (await client.get("/api/player/random")).json()["players"]
+    resp = await client.post(
+        "/api/game/verify",
+        json={"player_left_id": left["id"], "player_right_id": right["id"], "guess": "left"},
+    )
+    assert resp.status_code == 200
+    question = (await client.get("/api/trivia/question")).json()["question"]
+    resp = await client.post("/api/trivia/verify", json={"question_id": question["id"], "selected_answer": "A"})
+    assert resp.status_code == 200
+
+
+@pytest.mark.asyncio
+@query_budget(
+    {
+        "GET /api/player/random": 0,
+        "POST /api/game/verify": 0,
+        "GET /api/trivia/question": 0,
+        "POST /api/trivia/verify": 0,
+    }
+)
+async def test_query_budget_catalog_hot_paths(session_maker, client, query_log):
+    from app.catalog import load_catalog, set_catalog
+
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+        catalog = await load_catalog(session)
+    set_catalog(catalog)
+    try:
+        await _play_both_games(client)
+    finally:
+        set_catalog(None)
+    assert len(query_log.requests) == 4
+
+
+@pytest.mark.asyncio
+@query_budget(
+    {
+        # Random ids, then the rows
+        "GET /api/player/random": 2,
+        "POST /api/game/verify": 1,
+        "GET /api/trivia/question": 1,
+        "POST /api/trivia/verify": 1,
+    }
+)
+async def test_query_budget_sql_fallback(session_maker, client, query_log):
+    async with session_maker() as session:
+        await seed_players(session)
+        await seed_questions(session)
+
+    await _play_both_games(client)
+
+    with pytest.raises(AssertionError, match="budget 0"):
+        query_log.check({"POST /api/game/verify": 0})
+
+    # Seeded rounds and decks load the fallback catalog once, not per request
+    for seed in range(3):
+        assert (await client.get(f"/api/player/pair?seed={seed}")).status_code == 200
+        assert (await client.get(f"/api/trivia/deck?seed={seed}&limit=2")).status_code == 200
+    statements = {}
+    for route, run in query_log.requests:
+        statements.setdefault(route, []).append(len(run))
+    assert statements["GET /api/player/pair"] == [1, 0, 0]
+    assert statements["GET /api/trivia/deck"] == [1, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_datagen_is_deterministic_and_importable(session_maker, tmp_path, monkeypatch):
+    from app import datagen
+    from app.db_init_trivia import load_question_bank
+    from app.services.player_importer import parse_players_csv
+
+    players = list(datagen.generate_players(500, seed=3))
+    assert players == list(datagen.generate_players(500, seed=3))
+    assert players != list(datagen.generate_players(500, seed=4))
+    assert any(not p["name"].isascii() for p in players)
+    assert all(25_000 <= p["stat_value"] <= datagen.MARKET_VALUE_MAX for p in players)
+
+    csv_path = tmp_path / "players.csv"
+    datagen.main(["players", "500", "--seed", "3", "--output", str(csv_path)])
+    assert parse_players_csv(csv_path) == players
+
+    jsonl_path = tmp_path / "questions.jsonl"
+    datagen.main(["questions", "50", "--format", "jsonl", "--output", str(jsonl_path)])
+    questions = load_question_bank(jsonl_path)
+    assert len(questions) == 50
+    for q in questions:
+        options = [q[f"option_{c}"] for c in "abcd"]
+        assert len(set(options)) == 4 and q["correct_answer"] in "ABCD"
+
+    async def no_tables():
+        pass
+
+    monkeypatch.setattr(datagen, "engine", session_maker.kw["bind"])
+    monkeypatch.setattr(datagen, "create_db_and_tables", no_tables)
+    monkeypatch.setattr(datagen, "DB_CHUNK_SIZE", 64)
+    assert await datagen.write_db(iter(players), Player) == 500
+    async with session_maker() as session:
+        assert len((await session.execute(select(Player.id))).all()) == 500
+
+
+def test_server_sizes_workers_to_cgroup_quota(tmp_path, monkeypatch):
+    from app import server
+
+    cpu_max = tmp_path / "cpu.max"
+    cpu_max.write_text("max 100000\n")
+    assert server.cgroup_cpu_limit(cpu_max) is None
+    cpu_max.write_text("250000 100000\n")
+    assert server.cgroup_cpu_limit(cpu_max) == 3
+    assert server.cgroup_cpu_limit(tmp_path / "missing") is None
+
+    monkeypatch.setattr(server, "cgroup_cpu_limit", lambda: 1)
+    assert server.cpu_limit() == 1
+    assert server.ProductionWorker.CONFIG_KWARGS["loop"] in ("uvloop", "asyncio")
+
+
+def test_gunicorn_refuses_memory_sessions_with_several_workers(monkeypatch):
+    import runpy
+    from types import SimpleNamespace
+
+    from app import server, sessions
+
+    monkeypatch.setenv("PRELOAD_APP", "0")
+    monkeypatch.setenv("WEB_CONCURRENCY", "3")
+    conf = runpy.run_path(str(server.GUNICORN_CONF))
+    assert conf["workers"] == 3
+    conf["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=3)))
+
+    monkeypatch.setattr(sessions, "SESSION_BACKEND", "memory")
+    conf = runpy.run_path(str(server.GUNICORN_CONF))
+    with pytest.raises(SystemExit, match="SESSION_BACKEND=memory"):
+        conf["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=3)))
+    conf["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=1)))
+
+
+def test_gunicorn_exports_worker_count_overridden_on_the_command_line(monkeypatch):
+    import runpy
+    from types import SimpleNamespace
+
+    import app.app as app_module
+    from app import server
+    from app.sessions import SqliteSessionStore
+
+    monkeypatch.setenv("PRELOAD_APP", "0")
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    monkeypatch.setattr(server, "cpu_limit", lambda: 1)
+    monkeypatch.setattr(app_module, "session_store", app_module.session_store)
+    conf = runpy.run_path(str(server.GUNICORN_CONF))
+    assert conf["workers"] == 1
+
+    # `-w 4` changes cfg.workers after the config file was read
+    conf["on_starting"](SimpleNamespace(cfg=SimpleNamespace(workers=4)))
+    assert os.environ["WEB_CONCURRENCY"] == "4"
+    assert isinstance(app_module.session_store, SqliteSessionStore)
+
+
+@pytest.mark.asyncio
+async def test_csv_import_streams_chunks_off_the_loop(session_maker, tmp_path, monkeypatch):
+    import threading
+
+    from app.datagen import PLAYER_FIELDS, generate_players, write_csv
+    from app.services import player_importer
+
+    csv_path = tmp_path / "players.csv"
+    with csv_path.open("w", newline="", encoding="utf-8") as out:
+        write_csv(generate_players(1050), PLAYER_FIELDS, out)
+
+    parse_threads = set()
+    original = player_importer.iter_players_csv
+
+    def tracking_iter(path):
+        for row in original(path):
+            parse_threads.add(threading.get_ident())
+            yield row
+
+    monkeypatch.setattr(player_importer, "iter_players_csv", tracking_iter)
+    sizes = [len(chunk) async for chunk in player_importer.stream_player_chunks(csv_path, 500)]
+    assert sizes == [500, 500, 50]
+    assert threading.get_ident() not in parse_threads
+
+    async with session_maker() as session:
+        assert await player_importer.import_players_from_csv(session, csv_path) == 1050
+        assert await player_importer.import_players_from_csv(session, csv_path) == 1050
+    async with session_maker() as session:
+        assert len((await session.execute(select(Player.id))).all()) == 1050
+
+
+@pytest.mark.asyncio
+async def test_write_behind_stop_lets_a_running_flush_finish():
+    from app.write_behind import WriteBehindQueue
+
+    written: list[int] = []
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow_flush(batch):
+        started.set()
+        await release.wait()
+        written.extend(batch)
+
+    queue = WriteBehindQueue(slow_flush, batch_size=2, interval=60)
+    queue.start()
+    for i in range(3):
+        queue.put(i)
+    await asyncio.wait_for(started.wait(), 1)
+
+    stopping = asyncio.create_task(queue.stop())
+    await asyncio.sleep(0.01)
+    assert not stopping.done()
+    release.set()
+    await asyncio.wait_for(stopping, 1)
+    assert written == [0, 1, 2]
+    assert len(queue) == 0
+
+
+@pytest.mark.asyncio
+async def test_write_behind_keeps_cancelled_batch_and_counts_drops(caplog):
+    from app.write_behind import WriteBehindQueue
+
+    started = asyncio.Event()
+
+    async def hanging_flush(batch):
+        started.set()
+        await asyncio.Event().wait()
+
+    queue = WriteBehindQueue(hanging_flush, batch_size=10, max_pending=3)
+    for i in range(5):
+        queue.put(i)
+    assert (len(queue), queue.dropped) == (3, 2)
+    assert "dropping the oldest" in caplog.text
+
+    flushing = asyncio.create_task(queue.flush())
+    await asyncio.wait_for(started.wait(), 1)
+    flushing.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await flushing
+    assert queue._pending == [2, 3, 4]
+
+    async def failing_flush(batch):
+        raise RuntimeError("database is locked")
+
+    written = []
+
+    async def working_flush(batch):
+        written.extend(batch)
+
+    # A failed drain leaves the rows and the overflow state alone
+    queue._flush = failing_flush
+    assert await queue.flush() == 0
+    assert (len(queue), queue.dropped) == (3, 2)
+    assert "drained" not in caplog.text
+
+    queue._flush = working_flush
+    assert await queue.flush() == 3
+    assert written == [2, 3, 4]
+    assert queue.dropped == 2
+    assert "2 rows dropped since startup" in caplog.text